@@ -0,0 +1,101 @@
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+# 停止标记
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    微批合并器
+    多个工作线程各自 submit() 单条请求，后台线程把已在排队的请求 (最多 max_size 条)
+    合并成一批交给 handler，再把结果分发回各自的 Future。
+    最多 concurrency 批同时执行 (各占一个执行线程)；名额占满期间到达的请求自然攒成下一批，
+    有空闲名额时队列一空就立即发出，并发数少、凑不满一批时不会让已到达的请求空等。
+    max_wait > 0 时队列空后再多等这么久。
+    线程池模式与流水线模式都只需在工作线程里阻塞等待 Future。
+    """
+
+    def __init__(self, handler, max_size=8, max_wait=0.0, concurrency=1, name="batcher"):
+        """
+        :param handler: handler(items) -> 与 items 顺序一致的结果列表
+        :param concurrency: 同时执行的批次数
+        """
+        self.handler = handler
+        self.max_size = max(1, int(max_size))
+        self.max_wait = max_wait
+        self.name = name
+        self._queue = queue.Queue()
+        self._stopped = False
+        concurrency = max(1, int(concurrency))
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=name)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        if self._stopped:
+            raise RuntimeError(f"{self.name} 已停止")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self, first):
+        """取走已在排队的请求，攒满一批或队列为空 (且超过 max_wait) 即返回"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_size:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if entry is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            # 等到有空闲的执行名额再取走排队的请求，等待期间到达的请求合并进这一批
+            self._slots.acquire()
+            batch = self._collect(first)
+            self._executor.submit(self._execute, batch)
+
+    def _execute(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = self.handler(items)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            logger.error(f"    💥 [{self.name}] 批处理异常: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def stop(self):
+        """处理完已提交的请求后停止后台线程 (可重复调用)"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,112 @@
+import re
+import math
+import logging
+from dataclasses import dataclass
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+# 各服务商分词器的近似换算：(每个中文字符的 token 数, 每个其他字符的 token 数)
+# 国产模型的分词器无法离线获取，按各家文档给出的换算比例估算，宁多勿少
+TOKEN_RATIOS = {
+    "deepseek": (0.6, 0.3),
+    "aliyun": (0.7, 0.3),
+    "zhipu": (0.7, 0.3),
+    "silicon": (0.7, 0.3),
+}
+DEFAULT_RATIO = (1.0, 0.3)
+
+_CJK_RE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+
+class TokenCounter:
+    """按目标模型估算 token 数；同一角色有多个候选模型时取最保守的换算比例"""
+
+    def __init__(self, providers=None):
+        ratios = [TOKEN_RATIOS.get(p, DEFAULT_RATIO) for p in (providers or [])] or [DEFAULT_RATIO]
+        self.cjk_cost = max(r[0] for r in ratios)
+        self.other_cost = max(r[1] for r in ratios)
+
+    def _char_cost(self, ch):
+        return self.cjk_cost if _CJK_RE.match(ch) else self.other_cost
+
+    def count(self, text):
+        if not text:
+            return 0
+        cjk = len(_CJK_RE.findall(text))
+        return math.ceil(cjk * self.cjk_cost + (len(text) - cjk) * self.other_cost)
+
+    def truncate(self, text, tokens):
+        """截取不超过 tokens 个 token 的前缀"""
+        used = 0.0
+        for idx, ch in enumerate(text):
+            used += self._char_cost(ch)
+            if used > tokens:
+                return text[:idx]
+        return text
+
+
+@dataclass
+class Section:
+    """
+    上下文中的一段内容
+    priority 越小越优先分到剩余预算；min_share 为保底占比 (相对于总预算)
+    """
+    name: str
+    header: str
+    text: str
+    priority: int
+    min_share: float = 0.0
+
+
+class ContextPacker:
+    """
+    按 token 预算打包上下文
+    1. 每段先拿到保底份额 (min_share × 预算，不超过自身长度)
+    2. 剩余预算按优先级依次补足
+    3. 放不下的段落截断并加标记，保持原有顺序输出
+    正文过长时不会再把末尾的附件整段挤掉。
+    """
+
+    def __init__(self, counter):
+        self.counter = counter
+
+    def _marker(self, section, omitted):
+        return f"\n…[{section.name}已截断，省略约 {omitted} 字]"
+
+    def allocate(self, sections, budget):
+        """返回每段分到的 token 数 (不含标题行)"""
+        costs = [self.counter.count(s.text) for s in sections]
+        overhead = sum(self.counter.count(s.header) for s in sections)
+        available = max(0, budget - overhead)
+
+        alloc = [min(cost, int(available * s.min_share)) for s, cost in zip(sections, costs)]
+        remaining = available - sum(alloc)
+        if remaining < 0:
+            # 保底份额之和超过预算时按比例缩减
+            scale = available / sum(alloc)
+            alloc = [int(a * scale) for a in alloc]
+            remaining = available - sum(alloc)
+
+        for idx in sorted(range(len(sections)), key=lambda i: sections[i].priority):
+            extra = min(costs[idx] - alloc[idx], remaining)
+            alloc[idx] += extra
+            remaining -= extra
+        return alloc, costs
+
+    def pack(self, sections, budget):
+        alloc, costs = self.allocate(sections, budget)
+        parts = []
+        for section, share, cost in zip(sections, alloc, costs):
+            text = section.text
+            if share < cost:
+                marker = self._marker(section, len(text))
+                keep = self.counter.truncate(text, max(0, share - self.counter.count(marker)))
+                text = keep + self._marker(section, len(text) - len(keep))
+                logger.debug(f"    ✂️ [上下文] {section.name}: {cost} → {share} tokens")
+            parts.append(section.header + text)
+        return "".join(parts)
+
+
+def total_length(sections):
+    return sum(len(s.text) for s in sections)
@@ -0,0 +1,65 @@
+import os
+import sys
+import hashlib
+import logging
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.disk_cache import DiskCache
+from utils.paths import data_dir
+from ai_brain.extractors import EXTRACTOR_VERSIONS
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = "extract_cache.db"
+
+
+def _file_sha256(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_cacheable(text):
+    """解析失败的提示文本 (形如 [PDF解析错误]) 不缓存，下次重新解析"""
+    if not text:
+        return False
+    stripped = text.strip()
+    return not (stripped.startswith("[") and stripped.endswith("]") and len(stripped) < 200)
+
+
+class ExtractCache:
+    """
+    附件解析结果缓存：内容哈希 + 解析器版本 → 解析文本
+    重试的公告、被多条公告引用的同一模板文件都不会重复解析，
+    图片 OCR (glm-4v-flash) 对相同字节只调用一次。
+    """
+
+    def __init__(self, path=None):
+        path = path or data_dir(CACHE_NAME)
+        max_mb = config.AI_CONFIG.get("EXTRACT_CACHE_MAX_MB", 200)
+        self.cache = DiskCache(path, max_mb * 1024 * 1024, name="extract")
+
+    def key_for(self, kind, filepath):
+        version = EXTRACTOR_VERSIONS.get(kind, 1)
+        return f"{_file_sha256(filepath)}:{kind}:v{version}"
+
+    def get(self, key):
+        """返回 (text, complete)；complete=False 表示缓存的是按预算截断的前缀"""
+        text, meta = self.cache.get_with_meta(key)
+        if text is None:
+            return None
+        return text, (meta or {}).get("complete", True)
+
+    def put(self, key, text, complete=True):
+        if _is_cacheable(text):
+            self.cache.set(key, text, meta={"complete": complete})
+
+    def log_stats(self):
+        stats = self.cache.stats()
+        logger.info(f"    🗃️ [解析缓存] 命中 {stats['hits']} / 未命中 {stats['misses']} "
+                    f"(命中率 {stats['hit_rate']:.0%}，{stats['entries']} 条，{stats['bytes'] // 1024}KB)")
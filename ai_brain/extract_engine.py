@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import logging
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+try:
+    import resource
+    HAS_RLIMIT = hasattr(resource, "RLIMIT_AS")
+except ImportError:
+    HAS_RLIMIT = False
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+# 全进程共用的子进程名额：EXTRACT_PROCESSES 是同时存活的解析子进程总数，
+# 多个工作线程各自调用 run() 时也不会超过 (否则最多 MAX_WORKERS × EXTRACT_PROCESSES 个)
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def _process_slots(size):
+    """首次创建引擎时按其并发数建立名额，之后的引擎共用同一组名额"""
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(size)
+        return _slots
+
+
+def _child_main(conn, kind, filepath, budget, memory_limit_mb):
+    """子进程入口：限制内存后执行解析，把结果通过管道发回"""
+    if HAS_RLIMIT and memory_limit_mb:
+        limit = int(memory_limit_mb) * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+    try:
+        from ai_brain.extractors import extract
+        conn.send(("ok", extract(kind, filepath, budget)))
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _mp_context():
+    """
+    POSIX 下使用 forkserver (预加载解析库，避免在多线程进程中直接 fork)，
+    Windows 下只能使用 spawn
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" in methods:
+        ctx = multiprocessing.get_context("forkserver")
+        from ai_brain.extractors import HEAVY_MODULES
+        ctx.set_forkserver_preload(["ai_brain.extractors"] + HEAVY_MODULES)
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+class ExtractionEngine:
+    """
+    多进程附件解析引擎
+    每个附件在独立子进程中解析，受并发数、超时与内存上限约束，
+    卡死或崩溃的子进程会被强制终止并记为失败，不会拖住整条公告。
+    """
+
+    def __init__(self, processes=None, timeout=None, memory_limit_mb=None):
+        ai_cfg = config.AI_CONFIG
+        self.processes = max(1, int(processes or ai_cfg.get("EXTRACT_PROCESSES", 2)))
+        self.timeout = timeout or ai_cfg.get("EXTRACT_TIMEOUT", 60)
+        self.memory_limit_mb = memory_limit_mb or ai_cfg.get("EXTRACT_MAX_MEMORY_MB", 1024)
+        self._slots = _process_slots(self.processes)
+        self._ctx = None
+
+    def _start(self, kind, filepath, budget=None):
+        if self._ctx is None:
+            self._ctx = _mp_context()
+        parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_child_main,
+            args=(child_conn, kind, filepath, budget, self.memory_limit_mb),
+            daemon=True
+        )
+        proc.start()
+        child_conn.close()
+        return proc, parent_conn, time.monotonic()
+
+    def _kill(self, proc):
+        proc.terminate()
+        proc.join(2)
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
+
+    def run(self, jobs):
+        """
+        :param jobs: [(kind, filepath, budget), ...]，budget 为该附件的字符预算
+        :return: 与 jobs 顺序一致的结果列表，成功为 (True, (text, complete))，失败为 (False, 原因)
+        """
+        results = [None] * len(jobs)
+        pending = list(range(len(jobs)))
+        running = {}  # conn -> (index, proc, start)，每个占用一个全局名额
+
+        try:
+            while pending or running:
+                # 自己没有在跑的子进程时阻塞等名额，否则只取空闲名额，取不到就先收已有的结果
+                while pending and self._slots.acquire(blocking=not running):
+                    idx = pending.pop(0)
+                    try:
+                        proc, conn, start = self._start(*jobs[idx])
+                    except BaseException:
+                        self._slots.release()
+                        raise
+                    running[conn] = (idx, proc, start)
+
+                ready = wait(list(running), timeout=0.2)
+                for conn in ready:
+                    idx, proc, _ = running.pop(conn)
+                    try:
+                        status, payload = conn.recv()
+                        results[idx] = (status == "ok", payload)
+                    except EOFError:
+                        # 子进程未发回结果即退出 (多为超出内存上限被系统终止)
+                        proc.join(2)
+                        results[idx] = (False, f"子进程异常退出 (exitcode={proc.exitcode})")
+                    conn.close()
+                    proc.join(2)
+                    if proc.is_alive():
+                        self._kill(proc)
+                    self._slots.release()
+
+                now = time.monotonic()
+                for conn, (idx, proc, start) in list(running.items()):
+                    if now - start > self.timeout:
+                        self._kill(proc)
+                        conn.close()
+                        running.pop(conn)
+                        self._slots.release()
+                        results[idx] = (False, f"解析超时 ({self.timeout}s)，已终止")
+        finally:
+            # 异常退出时终止仍在运行的子进程并归还名额
+            for conn, (_, proc, _) in running.items():
+                self._kill(proc)
+                conn.close()
+                self._slots.release()
+
+        for (kind, filepath, _), (ok, payload) in zip(jobs, results):
+            if not ok:
+                logger.warning(f"    ⚠️ 附件解析失败 {os.path.basename(filepath)}: {payload}")
+        return results
@@ -0,0 +1,173 @@
+import os
+import sys
+from itertools import islice
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# ==========================
+# 📂 附件解析函数 (模块级，便于在子进程中执行)
+# 解析器都是生成器，按页 / 段落 / 幻灯片 / 行逐块产出文本，
+# 由 collect() 按字符预算收集，预算用尽立即停止，后面的页不再解析。
+# ==========================
+
+# 单个附件的字符上限 (未指定预算时使用，也是公平分配时单个附件的需求上限)
+DEFAULT_BUDGETS = {
+    "pdf": 5000,
+    "word": 5000,
+    "excel": 4000,
+    "ppt": 4000,
+    "image": 5000,
+}
+
+ERROR_LABELS = {
+    "pdf": "PDF",
+    "word": "Word",
+    "excel": "Excel",
+    "ppt": "PPT",
+}
+
+
+# 解析库导入很慢 (pandas 尤其明显)，在首次解析时才导入；
+# 多进程模式下由 forkserver 预加载 HEAVY_MODULES
+HEAVY_MODULES = ["fitz", "docx", "pandas", "pptx"]
+
+
+def iter_pdf(filepath):
+    import fitz  # PyMuPDF
+    max_pages = config.AI_CONFIG.get("MAX_ATTACH_PAGES", 10)
+    with fitz.open(filepath) as doc:
+        for page_no in range(min(max_pages, doc.page_count)):
+            yield doc[page_no].get_text()
+
+
+def iter_word(filepath):
+    import docx
+    doc = docx.Document(filepath)
+    for para in doc.paragraphs:
+        yield para.text + "\n"
+
+
+def _md_cell(value):
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def iter_excel(filepath):
+    import pandas as pd
+    max_rows = config.AI_CONFIG.get("MAX_ATTACH_ROWS", 100)
+    df = pd.read_excel(filepath, nrows=max_rows).fillna("")
+    if df.empty:
+        yield "[空Excel表格]"
+        return
+    # 逐行输出 Markdown 表格 (不做列宽对齐，否则必须先看完整张表)
+    yield "| " + " | ".join(_md_cell(c) for c in df.columns) + " |\n"
+    yield "|" + "---|" * len(df.columns) + "\n"
+    for row in df.itertuples(index=False):
+        yield "| " + " | ".join(_md_cell(v) for v in row) + " |\n"
+
+
+def iter_ppt(filepath):
+    from pptx import Presentation
+    max_slides = config.AI_CONFIG.get("MAX_ATTACH_SLIDES", 15)
+    prs = Presentation(filepath)
+    # Slides 不支持切片 (会返回 sldId 列表)，用 islice 截取
+    for slide in islice(prs.slides, max_slides):
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                yield shape.text + "\n"
+
+
+def collect(chunks, budget):
+    """
+    按字符预算收集生成器产出的文本
+    :return: (text, complete)，complete=False 表示预算用尽、后续内容未解析
+    """
+    parts, used = [], 0
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if used + len(chunk) > budget:
+                parts.append(chunk[:budget - used])
+                return "".join(parts), False
+            parts.append(chunk)
+            used += len(chunk)
+        return "".join(parts), True
+    finally:
+        # 提前退出时关闭生成器，释放打开的文档
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def extract(kind, filepath, budget=None):
+    """
+    在预算内解析附件
+    :return: (text, complete)；解析失败时返回错误提示且 complete=True
+    """
+    if budget is None:
+        budget = DEFAULT_BUDGETS[kind]
+    try:
+        return collect(ITERATORS[kind](filepath), budget)
+    except Exception as e:
+        return f"[{ERROR_LABELS[kind]}解析错误: {str(e)}]", True
+
+
+def extract_pdf(filepath, budget=None):
+    return extract("pdf", filepath, budget)[0]
+
+def extract_word(filepath, budget=None):
+    return extract("word", filepath, budget)[0]
+
+def extract_excel(filepath, budget=None):
+    return extract("excel", filepath, budget)[0]
+
+def extract_ppt(filepath, budget=None):
+    return extract("ppt", filepath, budget)[0]
+
+
+# 可在子进程中执行的 CPU 密集型解析器 (图片 OCR 是网络调用，留在线程内)
+ITERATORS = {
+    "pdf": iter_pdf,
+    "word": iter_word,
+    "excel": iter_excel,
+    "ppt": iter_ppt,
+}
+
+# 解析逻辑变化时递增对应版本号，使旧的缓存结果失效
+EXTRACTOR_VERSIONS = {
+    "pdf": 2,
+    "word": 2,
+    "excel": 2,
+    "ppt": 2,
+    "image": 2,
+}
+
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png'}
+
+EXT_KINDS = {
+    '.pdf': "pdf",
+    '.docx': "word",
+    '.doc': "word",
+    '.xlsx': "excel",
+    '.xls': "excel",
+    '.pptx': "ppt",
+    '.ppt': "ppt",
+}
+
+
+def split_budget(total, demands):
+    """
+    按最大最小公平原则分配字符预算
+    :param demands: 每个附件的需求上限 (单附件上限或已知的完整长度)
+    :return: 与 demands 顺序一致的分配额；需求小的附件用不完的份额均分给其余附件
+    """
+    shares = [0] * len(demands)
+    pending = sorted(range(len(demands)), key=lambda i: demands[i])
+    remaining = max(0, total)
+    while pending:
+        fair = remaining // len(pending)
+        idx = pending.pop(0)
+        shares[idx] = min(demands[idx], fair)
+        remaining -= shares[idx]
+    return shares
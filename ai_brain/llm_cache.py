@@ -0,0 +1,61 @@
+import os
+import sys
+import hashlib
+import logging
+import threading
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.disk_cache import DiskCache
+from utils.paths import data_dir
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = "llm_cache.db"
+
+
+def _sha(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    LLM 响应缓存：(角色, 模型, 提示词哈希, 截断后上下文哈希, 温度) → 回答
+    仅推送失败的重跑、换了 URL 重新发布的公告都能直接复用上次的回答。
+    """
+
+    def __init__(self, path=None):
+        ai_cfg = config.AI_CONFIG
+        path = path or data_dir(CACHE_NAME)
+        self.ttl = ai_cfg.get("LLM_CACHE_TTL", 7 * 24 * 3600)
+        self.bypass_roles = set(ai_cfg.get("LLM_CACHE_BYPASS", []))
+        self.cache = DiskCache(path, ai_cfg.get("LLM_CACHE_MAX_MB", 50) * 1024 * 1024, name="llm")
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def enabled_for(self, role):
+        return role not in self.bypass_roles
+
+    def make_key(self, role, model, system_prompt, user_content, temperature):
+        return f"{role}|{model}|{_sha(system_prompt)}|{_sha(user_content)}|{temperature}"
+
+    def get(self, role, key):
+        value, meta = self.cache.get_with_meta(key, ttl=self.ttl)
+        if value is None:
+            return None
+        saved = (meta or {}).get("latency", 0.0)
+        with self._lock:
+            self.saved_seconds += saved
+        logger.info(f"    💾 [LLM缓存] 命中 {role}，节省约 {saved:.1f}s")
+        return value
+
+    def put(self, key, value, latency):
+        if value:
+            self.cache.set(key, value, meta={"latency": round(latency, 3)})
+
+    def log_stats(self):
+        stats = self.cache.stats()
+        logger.info(f"    💾 [LLM缓存] 命中 {stats['hits']} / 未命中 {stats['misses']} "
+                    f"(命中率 {stats['hit_rate']:.0%})，累计节省 {self.saved_seconds:.1f}s")
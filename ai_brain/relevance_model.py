@@ -0,0 +1,203 @@
+"""
+本地相关性预分类器：用 history.db 中由 hunter 给出的 SUCCESS / IGNORED 历史判定训练，
+把有把握的公告直接在本地判定，只有拿不准的才交给 hunter 模型
+(本地分类器与白名单自己的判定不参与训练，避免重训时强化自身误判)
+
+特征为标题的字符 1~3 gram，哈希到固定维度；模型为多项式朴素贝叶斯 (仅依赖 NumPy)。
+历史库只保存了标题，所以训练与预测都只看标题。
+
+用法 (项目根目录)：
+    python -m ai_brain.relevance_model train            # 重新训练并保存
+    python -m ai_brain.relevance_model eval             # 离线评估：不同阈值下节省的 API 调用与误判率
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import logging
+import argparse
+
+import numpy as np
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.paths import data_dir
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "relevance_model.npz"
+
+N_FEATURES = 1 << 18
+NGRAMS = (1, 2, 3)
+
+
+def _features(text):
+    """标题 → 哈希后的 n-gram 特征下标 (含重复，重复即词频)"""
+    text = (text or "").strip().lower()
+    idx = []
+    for n in NGRAMS:
+        for i in range(len(text) - n + 1):
+            idx.append(zlib.crc32(text[i:i + n].encode("utf-8")) % N_FEATURES)
+    return np.asarray(idx, dtype=np.int64)
+
+
+def _is_holdout(title, ratio):
+    """按标题哈希稳定地切分评估集，多次运行结果一致"""
+    return zlib.crc32(title.encode("utf-8")) % 1000 < ratio * 1000
+
+
+class RelevanceModel:
+    """多项式朴素贝叶斯，类别 0 = 无关 (IGNORED)，1 = 相关 (SUCCESS)"""
+
+    def __init__(self, log_prior=None, log_prob=None, meta=None):
+        self.log_prior = log_prior
+        self.log_prob = log_prob
+        self.meta = meta or {}
+
+    @classmethod
+    def train(cls, samples, alpha=1.0):
+        """
+        :param samples: [(title, is_relevant), ...]
+        """
+        counts = np.zeros((2, N_FEATURES), dtype=np.float64)
+        docs = np.zeros(2, dtype=np.float64)
+        for title, label in samples:
+            cls_idx = 1 if label else 0
+            np.add.at(counts[cls_idx], _features(title), 1)
+            docs[cls_idx] += 1
+        if docs.min() == 0:
+            raise ValueError("训练数据必须同时包含相关与无关样本")
+
+        log_prior = np.log(docs / docs.sum())
+        smoothed = counts + alpha
+        log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+        meta = {
+            "samples": int(docs.sum()),
+            "relevant": int(docs[1]),
+            "ignored": int(docs[0]),
+            "trained_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        return cls(log_prior, log_prob, meta)
+
+    def prob_relevant(self, title):
+        feats = _features(title)
+        scores = self.log_prior + self.log_prob[:, feats].sum(axis=1)
+        scores -= scores.max()
+        probs = np.exp(scores)
+        return float(probs[1] / probs.sum())
+
+    def predict(self, title, threshold):
+        """
+        :return: True / False 表示有把握的本地判定，None 表示交给 LLM
+        """
+        p = self.prob_relevant(title)
+        if p >= threshold:
+            return True
+        if p <= 1 - threshold:
+            return False
+        return None
+
+    def save(self, path=None):
+        path = path or data_dir(MODEL_NAME)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, log_prior=self.log_prior, log_prob=self.log_prob.astype(np.float32),
+                            meta=np.array(json.dumps(self.meta, ensure_ascii=False)))
+
+    @classmethod
+    def load(cls, path=None):
+        """模型文件不存在时返回 None"""
+        path = path or data_dir(MODEL_NAME)
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        return cls(data["log_prior"], data["log_prob"].astype(np.float64), json.loads(str(data["meta"])))
+
+
+def load_for_runtime():
+    """加载模型；未训练或样本过少时返回 None (全部交给 hunter)"""
+    ai_cfg = config.AI_CONFIG
+    try:
+        model = RelevanceModel.load()
+    except Exception as e:
+        logger.warning(f"    ⚠️ 本地分类器加载失败: {e}")
+        return None
+    if model is None:
+        return None
+    min_samples = ai_cfg.get("LOCAL_CLASSIFIER_MIN_SAMPLES", 200)
+    if model.meta.get("samples", 0) < min_samples:
+        logger.info(f"    🧮 本地分类器样本不足 ({model.meta.get('samples', 0)} < {min_samples})，暂不启用")
+        return None
+    return model
+
+
+def evaluate(samples, thresholds, holdout=0.2):
+    """
+    在稳定切分的评估集上，统计每个阈值下本地判定的覆盖率 (即节省的 hunter 调用比例) 与误判
+    误放 (无关判为相关) 只多一次推送；误杀 (相关判为无关) 会漏掉通知，需重点关注
+    """
+    train = [s for s in samples if not _is_holdout(s[0], holdout)]
+    test = [s for s in samples if _is_holdout(s[0], holdout)]
+    model = RelevanceModel.train(train)
+    probs = np.array([model.prob_relevant(title) for title, _ in test])
+    labels = np.array([bool(label) for _, label in test])
+
+    rows = []
+    for threshold in thresholds:
+        yes = probs >= threshold
+        no = probs <= 1 - threshold
+        decided = yes | no
+        rows.append({
+            "threshold": threshold,
+            "coverage": float(decided.mean()) if len(test) else 0.0,
+            "accuracy": float(((yes & labels) | (no & ~labels))[decided].mean()) if decided.any() else 0.0,
+            "false_ignored": int((no & labels).sum()),
+            "false_kept": int((yes & ~labels).sum()),
+        })
+    return len(train), len(test), rows
+
+
+def _load_samples():
+    from data.db_manager import DatabaseManager
+    from ai_brain.summarizer import WHITELIST_KEYWORDS
+    db = DatabaseManager()
+    try:
+        return db.labeled_titles(exclude_keywords=WHITELIST_KEYWORDS)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地相关性预分类器")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("train", help="用 history.db 中 hunter 的历史判定重新训练并保存模型")
+    eval_parser = sub.add_parser("eval", help="离线评估不同置信度阈值下节省的 API 调用")
+    eval_parser.add_argument("--holdout", type=float, default=0.2, help="评估集比例")
+    eval_parser.add_argument("--thresholds", type=float, nargs="+",
+                             default=[0.8, 0.9, 0.95, 0.99, 0.999], help="待评估的置信度阈值")
+    args = parser.parse_args()
+
+    samples = _load_samples()
+    print(f"📚 历史样本: {len(samples)} 条 (相关 {sum(1 for _, y in samples if y)} / "
+          f"无关 {sum(1 for _, y in samples if not y)})")
+
+    if args.command == "train":
+        model = RelevanceModel.train(samples)
+        model.save()
+        print(f"💾 模型已保存: {data_dir(MODEL_NAME)}")
+        return
+
+    n_train, n_test, rows = evaluate(samples, args.thresholds, args.holdout)
+    current = config.AI_CONFIG.get("LOCAL_CLASSIFIER_THRESHOLD", 0.95)
+    print(f"🧪 训练 {n_train} 条 / 评估 {n_test} 条")
+    print(f"{'阈值':>8} {'本地判定(节省调用)':>18} {'准确率':>8} {'误杀':>6} {'误放':>6}")
+    for row in rows:
+        mark = "  ← 当前配置" if row["threshold"] == current else ""
+        print(f"{row['threshold']:>8} {row['coverage']:>18.1%} {row['accuracy']:>8.1%} "
+              f"{row['false_ignored']:>6} {row['false_kept']:>6}{mark}")
+
+
+if __name__ == "__main__":
+    main()
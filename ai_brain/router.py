@@ -0,0 +1,271 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+
+class ProviderStats:
+    """
+    单个服务商的调用统计
+    - 延迟 EWMA 与最近若干次延迟 (用于计算 p90 对冲阈值)
+    - 错误率 EWMA
+    - 熔断：连续失败达到阈值后在冷却期内跳过 (open)；冷却结束后进入半开状态，
+      只放行一个试探请求，其余请求继续跳过，试探成功才恢复 (closed)，失败则重新冷却
+    """
+
+    def __init__(self, alpha, window, failure_threshold, cooldown):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency_ewma = None
+        self.error_rate = 0.0
+        self.recent = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0     # 0 表示未熔断
+        self.probing = False      # 半开状态下的试探请求是否已发出
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record_success(self, latency):
+        with self._lock:
+            self.calls += 1
+            self.recent.append(latency)
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = self.alpha * latency + (1 - self.alpha) * self.latency_ewma
+            self.error_rate *= (1 - self.alpha)
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            self.probing = False
+
+    def record_failure(self):
+        """返回 True 表示本次失败触发了熔断"""
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+            self.consecutive_failures += 1
+            self.probing = False
+            if self.consecutive_failures >= self.failure_threshold:
+                self.open_until = time.monotonic() + self.cooldown
+                return True
+            return False
+
+    def state(self):
+        """closed / open / half-open"""
+        with self._lock:
+            if not self.open_until:
+                return "closed"
+            return "open" if time.monotonic() < self.open_until else "half-open"
+
+    def available(self):
+        """是否可以参与路由 (不占用试探名额)"""
+        with self._lock:
+            if not self.open_until:
+                return True
+            return time.monotonic() >= self.open_until and not self.probing
+
+    def acquire(self):
+        """发起请求前调用：未熔断时直接放行；半开状态下只有第一个调用者拿到试探名额"""
+        with self._lock:
+            if not self.open_until:
+                return True
+            if time.monotonic() < self.open_until or self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def p90(self, min_samples):
+        with self._lock:
+            if len(self.recent) < min_samples:
+                return None
+            ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    def score(self):
+        """延迟越低、错误率越低越靠前；没有样本的服务商排在最前，便于采集延迟"""
+        if self.latency_ewma is None:
+            return 0.0
+        return self.latency_ewma * (1 + 4 * self.error_rate)
+
+
+class ModelRouter:
+    """
+    多服务商路由
+    每个角色对应一组候选 (provider, model)，按策略排序后调用：
+    - strategy="ordered"  按配置顺序，前一个失败才换下一个
+    - strategy="latency"  按延迟 EWMA 与错误率排序
+    hedge=True 时，主请求超过其 p90 延迟仍未返回就并发发起备用请求，取先返回的有效回答；
+    请求线程全部占满时不再对冲 (对冲请求只会排队，反而拖慢其他调用)。
+    熔断中的服务商不参与路由；冷却结束后只放行一个试探请求，试探成功才重新参与。
+    """
+
+    def __init__(self, clients, routes):
+        ai_cfg = config.AI_CONFIG
+        self.clients = clients
+        self.routes = routes
+        self.hedge_default = ai_cfg.get("HEDGE_DEFAULT_DELAY", 15)
+        self.hedge_min = ai_cfg.get("HEDGE_MIN_DELAY", 2)
+        self.hedge_min_samples = ai_cfg.get("HEDGE_MIN_SAMPLES", 5)
+        self._stats_args = (
+            ai_cfg.get("ROUTER_EWMA_ALPHA", 0.3),
+            ai_cfg.get("ROUTER_LATENCY_WINDOW", 50),
+            ai_cfg.get("CIRCUIT_FAILURES", 3),
+            ai_cfg.get("CIRCUIT_COOLDOWN", 120),
+        )
+        self.stats = {}
+        self._lock = threading.Lock()
+        # 默认按 工作线程数 × 最多候选数 配置请求线程，每个工作线程的主请求与对冲请求都有线程可用
+        max_candidates = max([len(p.get("candidates", [])) for p in routes.values()] or [1])
+        self.workers = (ai_cfg.get("ROUTER_WORKERS")
+                        or config.SYSTEM.get("MAX_WORKERS", 2) * max(1, max_candidates))
+        self._inflight = 0  # 已提交但尚未结束的请求数 (含被放弃的慢请求)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ai-router")
+
+    def _stats_for(self, provider):
+        with self._lock:
+            if provider not in self.stats:
+                self.stats[provider] = ProviderStats(*self._stats_args)
+            return self.stats[provider]
+
+    def route_key(self, role):
+        """角色的候选列表描述，用作缓存键的一部分 (与实际由谁回答无关)"""
+        policy = self.routes.get(role, {})
+        return ",".join(f"{p}/{m}" for p, m in policy.get("candidates", []))
+
+    def plan(self, role):
+        """返回当前可用的候选列表 [(provider, model), ...]，已按策略排序"""
+        policy = self.routes.get(role, {})
+        available = []
+        for provider, model in policy.get("candidates", []):
+            if not self.clients.get(provider):
+                continue
+            if not self._stats_for(provider).available():
+                logger.info(f"    🔌 [路由] {provider} 熔断冷却中或正在试探，{role} 跳过")
+                continue
+            available.append((provider, model))
+        if policy.get("strategy", "ordered") == "latency":
+            available.sort(key=lambda c: self._stats_for(c[0]).score())
+        return available
+
+    def _hedge_delay(self, provider):
+        p90 = self._stats_for(provider).p90(self.hedge_min_samples)
+        if p90 is None:
+            return self.hedge_default
+        return max(self.hedge_min, p90)
+
+    def _launch_next(self, request, queue, pending):
+        """
+        依次从候选队列取出服务商发起请求，返回实际发起的 (provider, model)，队列耗尽时返回 None
+        半开状态的服务商只有拿到试探名额才会发起，拿不到的直接跳过
+        """
+        while queue:
+            provider, model = queue.pop(0)
+            if not self._stats_for(provider).acquire():
+                logger.info(f"    🔌 [路由] {provider} 已有试探请求在进行，跳过")
+                continue
+            if self._stats_for(provider).probing:
+                logger.info(f"    🔌 [路由] {provider} 冷却结束，发起试探请求")
+            self._launch(request, provider, model, pending)
+            return provider, model
+        return None
+
+    def _launch(self, request, provider, model, pending):
+        stats = self._stats_for(provider)
+
+        def _timed():
+            # 在请求线程内计时，不把在线程池里排队的时间算进服务商延迟；被放弃的慢请求返回后同样计入统计
+            start = time.monotonic()
+            answer = None
+            try:
+                answer = request(provider, model)
+                return answer
+            finally:
+                if answer:
+                    stats.record_success(time.monotonic() - start)
+                elif stats.record_failure():
+                    logger.warning(f"    🔌 [路由] {provider} 连续失败，熔断 {stats.cooldown}s")
+                with self._lock:
+                    self._inflight -= 1
+
+        with self._lock:
+            self._inflight += 1
+        future = self._executor.submit(_timed)
+        pending[future] = (provider, model)
+
+    def call(self, role, request):
+        """
+        :param request: request(provider, model) -> answer，失败时抛异常
+        :return: (answer, provider, model)，全部候选失败时 answer 为 None
+        """
+        candidates = self.plan(role)
+        if not candidates:
+            logger.warning(f"    ⚠️ {role} 没有可用的服务商 (未配置 API Key 或均在熔断中)")
+            return None, None, None
+
+        hedge = self.routes.get(role, {}).get("hedge", False)
+        queue = list(candidates)
+        pending = {}
+        launched = self._launch_next(request, queue, pending)
+        if not launched:
+            logger.warning(f"    ⚠️ {role} 没有可用的服务商 (均在熔断中)")
+            return None, None, None
+        provider, model = launched
+
+        while pending:
+            delay = self._hedge_delay(provider) if hedge and queue else None
+            done, _ = wait(list(pending), timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                with self._lock:
+                    saturated = self._inflight >= self.workers
+                if saturated:
+                    logger.info(f"    🏁 [路由] {role} 请求线程已满，暂不对冲")
+                    hedge = False
+                    continue
+                launched = self._launch_next(request, queue, pending)
+                if launched:
+                    provider, model = launched
+                    logger.info(f"    🏁 [路由] {role} 主请求超过 {delay:.1f}s 未返回，对冲请求 {provider}/{model}")
+                continue
+
+            for future in done:
+                done_provider, done_model = pending.pop(future)
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    logger.warning(f"    ⚠️ {role} [{done_model}] 调用失败: {e}")
+                    continue
+                if answer:
+                    return answer, done_provider, done_model
+                logger.warning(f"    ⚠️ {role} [{done_model}] 返回空回答")
+
+            if not pending and queue:
+                launched = self._launch_next(request, queue, pending)
+                if launched:
+                    provider, model = launched
+                    logger.warning(f"    ⚠️ {role} 切换备用服务商 {provider}/{model}...")
+
+        return None, None, None
+
+    def log_stats(self):
+        with self._lock:
+            items = sorted(self.stats.items())
+        for provider, s in items:
+            if not s.calls:
+                continue
+            latency = f"{s.latency_ewma:.1f}s" if s.latency_ewma is not None else "-"
+            state = {"closed": "正常", "open": "熔断中", "half-open": "半开"}[s.state()]
+            logger.info(f"    🧭 [路由] {provider}: {s.calls} 次调用，失败 {s.failures}，"
+                        f"延迟 EWMA {latency}，错误率 {s.error_rate:.0%}，{state}")
@@ -1,33 +1,69 @@
 import os
+import re
+import time
 import base64
-import fitz  # PyMuPDF
-import docx
-import pandas as pd
-from pptx import Presentation
-from openai import OpenAI
 import sys
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # 引用根目录配置
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from ai_brain.extractors import (EXT_KINDS, IMAGE_EXTS, DEFAULT_BUDGETS, extract, split_budget,
+                                 extract_pdf, extract_word, extract_excel, extract_ppt)
+from ai_brain.extract_engine import ExtractionEngine
+from ai_brain.extract_cache import ExtractCache
+from ai_brain.llm_cache import LLMCache
+from ai_brain.router import ModelRouter
+from ai_brain.context_packer import Section, TokenCounter, ContextPacker, total_length
+from ai_brain.batcher import MicroBatcher
+from utils import metrics
 
 # 初始化模块级日志
 logger = logging.getLogger(__name__)
 
 KEYS = config.AI_KEYS
-CLIENTS = {}
-try:
-    if KEYS["zhipu"]:
-        CLIENTS["zhipu"] = OpenAI(api_key=KEYS["zhipu"], base_url="https://open.bigmodel.cn/api/paas/v4/")
-    if KEYS["aliyun"]:
-        CLIENTS["aliyun"] = OpenAI(api_key=KEYS["aliyun"], base_url="https://dashscope.aliyuncs.com/compatible-mode/v1")
-    if KEYS["deepseek"]:
-        CLIENTS["deepseek"] = OpenAI(api_key=KEYS["deepseek"], base_url="https://api.deepseek.com")
-    if KEYS["silicon"]:
-        CLIENTS["silicon"] = OpenAI(api_key=KEYS["silicon"], base_url="https://api.siliconflow.cn/v1")
-except Exception as e:
-    logger.warning(f"⚠️ API Client 初始化警告: {e}")
+BASE_URLS = {
+    "zhipu": "https://open.bigmodel.cn/api/paas/v4/",
+    "aliyun": "https://dashscope.aliyuncs.com/compatible-mode/v1",
+    "deepseek": "https://api.deepseek.com",
+    "silicon": "https://api.siliconflow.cn/v1",
+}
+
+
+class ClientRegistry:
+    """
+    按需创建 API Client
+    openai 包导入较慢，且多数轮次扫描后没有新公告，首次真正调用模型时才导入并创建。
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider):
+        if provider in self._clients:
+            return self._clients[provider]
+        with self._lock:
+            if provider not in self._clients:
+                self._clients[provider] = self._create(provider)
+        return self._clients[provider]
+
+    def _create(self, provider):
+        # AI_CONFIG["BASE_URLS"] 可覆盖服务地址 (代理、本地替身服务)
+        base_url = config.AI_CONFIG.get("BASE_URLS", {}).get(provider) or BASE_URLS.get(provider)
+        if not KEYS.get(provider) or not base_url:
+            return None
+        try:
+            from openai import OpenAI
+            return OpenAI(api_key=KEYS[provider], base_url=base_url)
+        except Exception as e:
+            logger.warning(f"⚠️ API Client 初始化警告 ({provider}): {e}")
+            return None
+
+
+CLIENTS = ClientRegistry()
 
 MODELS = {
     "commander": ("deepseek", "deepseek-chat"),   # 主力总结
@@ -36,25 +72,108 @@ MODELS = {
     "vision": ("zhipu", "glm-4v-flash")           # 视觉识别
 }
 
+# 默认路由：主力总结失败或过慢时由备用总结接手；可在 AI_CONFIG["ROUTES"] 中按角色覆盖
+DEFAULT_ROUTES = {
+    "commander": {"candidates": [MODELS["commander"], MODELS["strategist"]], "strategy": "ordered", "hedge": True},
+    "strategist": {"candidates": [MODELS["strategist"]], "strategy": "ordered", "hedge": False},
+    "hunter": {"candidates": [MODELS["hunter"]], "strategy": "ordered", "hedge": False},
+}
+
+
+def _load_routes():
+    routes = dict(DEFAULT_ROUTES)
+    for role, policy in config.AI_CONFIG.get("ROUTES", {}).items():
+        merged = dict(routes.get(role, {}))
+        merged.update(policy)
+        merged["candidates"] = [tuple(c) for c in merged.get("candidates", [])]
+        routes[role] = merged
+    return routes
+
+FILTER_PROMPT = """
+你是一个学校通知审核员。请判断以下网页内容是否包含【实质性的通知、新闻、活动或公示信息】。
+
+🔴 判定为 NO (无价值) 的情况：
+1. 仅包含网站导航菜单、页脚、版权声明、友情链接。
+2. 页面提示“404”、“无访问权限”、“系统维护”、“测试页面”。
+3. 正文几乎为空，或仅有“附件”二字但无具体说明。
+4. 纯粹的商业广告。
+
+🟢 判定为 YES (有价值) 的情况：
+1. 包含具体的活动时间、地点、参与人员名单。
+2. 包含科研项目申报、截止日期、招标参数。
+3. 包含具体的新闻报道、会议纪要。
+"""
+
+BATCH_FILTER_FORMAT = """
+下面共有 {count} 条网页内容，以【第 N 条】分隔，请逐条独立判断。
+每条输出一行，格式为 "编号: YES" 或 "编号: NO"，例如 "1: YES"，不要输出其他内容。
+"""
+
+BATCH_VERDICT_RE = re.compile(r"(\d+)\s*[:：.、]\s*(YES|NO)", re.IGNORECASE)
+
+# 价值判定来源，随终态写入 bulletins.verdict_source；只有 hunter 的判定用于训练本地分类器
+VERDICT_LENGTH = "length"        # 内容过短
+VERDICT_WHITELIST = "whitelist"  # 标题命中白名单
+VERDICT_LOCAL = "local"          # 本地分类器
+VERDICT_HUNTER = "hunter"        # hunter 模型 (含缓存的回答)
+VERDICT_FALLBACK = "fallback"    # hunter 调用失败，按有价值处理
+
+# 标题命中即视为有价值，不经过 hunter
+WHITELIST_KEYWORDS = ["通知", "公告", "公示", "名单", "日程", "安排", "招标", "中标", "竞赛", "讲座", "大创", "补考", "申报"]
+
+
 class BulletinSummarizer:
     def __init__(self):
         self.clients = CLIENTS
         self.models = MODELS
+        self.router = ModelRouter(self.clients, _load_routes())
+        self.engine = ExtractionEngine()
+        self.extract_cache = ExtractCache() if config.AI_CONFIG.get("EXTRACT_CACHE", True) else None
+        self.llm_cache = LLMCache() if config.AI_CONFIG.get("LLM_CACHE", True) else None
+        self.relevance_model = self._load_relevance_model()
+        self.local_verdicts = 0
+        self._verdict_lock = threading.Lock()
+        self.relevance_batcher = None
+        if config.AI_CONFIG.get("RELEVANCE_BATCH_SIZE", 8) > 1:
+            self.relevance_batcher = MicroBatcher(
+                self._ask_hunter_batch,
+                max_size=config.AI_CONFIG.get("RELEVANCE_BATCH_SIZE", 8),
+                max_wait=config.AI_CONFIG.get("RELEVANCE_BATCH_WAIT", 0),
+                concurrency=(config.AI_CONFIG.get("RELEVANCE_BATCH_CONCURRENCY")
+                             or config.SYSTEM.get("MAX_WORKERS", 2)),
+                name="hunter-batch"
+            )
 
-    def _call_ai(self, role, system_prompt, user_content):
-        """通用 AI 调用函数"""
-        provider_name, model_name = self.models.get(role, ("deepseek", "deepseek-chat"))
-        client = self.clients.get(provider_name)
-
-        if not client:
-            logger.warning(f"    ⚠️ 未配置 {provider_name} 的 API Key，跳过 {role}")
+    def _load_relevance_model(self):
+        if not config.AI_CONFIG.get("LOCAL_CLASSIFIER", True):
             return None
-
-        try:
-            temp = config.AI_CONFIG.get("TEMPERATURE", 0.1)
-            timeout = config.AI_CONFIG.get("TIMEOUT", 45)
-            
-            response = client.chat.completions.create(
+        # numpy 只在启用本地分类器时导入
+        from ai_brain.relevance_model import load_for_runtime
+        return load_for_runtime()
+
+    def close(self):
+        """进程退出前调用：停止 hunter 合并线程"""
+        if self.relevance_batcher:
+            self.relevance_batcher.stop()
+
+    def log_cache_stats(self):
+        """每轮结束时输出缓存命中情况与各服务商的路由统计"""
+        if self.extract_cache:
+            self.extract_cache.log_stats()
+        if self.llm_cache:
+            self.llm_cache.log_stats()
+        if self.relevance_model:
+            logger.info(f"    🧮 [本地分类器] 本轮直接判定 {self.local_verdicts} 条，节省同等次数的 hunter 调用")
+        self.router.log_stats()
+
+    def _request(self, role, system_prompt, user_content, temp):
+        """生成交给路由器的单次请求函数"""
+        timeout = config.AI_CONFIG.get("TIMEOUT", 45)
+        # 路由器可能在其他线程中发起对冲请求，在这里取出当前公告的度量对象
+        task_metrics = metrics.current()
+
+        def request(provider_name, model_name):
+            response = self.clients.get(provider_name).chat.completions.create(
                 model=model_name,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -63,53 +182,48 @@ class BulletinSummarizer:
                 temperature=temp,
                 timeout=timeout
             )
+            usage = getattr(response, "usage", None)
+            if task_metrics and usage:
+                for kind in ("prompt_tokens", "completion_tokens"):
+                    value = getattr(usage, kind, 0) or 0
+                    task_metrics.add(kind, value)
+                    task_metrics.add(f"{kind}.{role}", value)
             return response.choices[0].message.content
-        except Exception as e:
-            logger.warning(f"    ⚠️ {role} [{model_name}] 调用失败: {e}")
-            return None
+
+        return request
+
+    def _call_ai(self, role, system_prompt, user_content):
+        """通用 AI 调用函数：按角色路由到可用的服务商 (含对冲与熔断)"""
+        temp = config.AI_CONFIG.get("TEMPERATURE", 0.1)
+        cache_key = None
+        if self.llm_cache and self.llm_cache.enabled_for(role):
+            cache_key = self.llm_cache.make_key(role, self.router.route_key(role), system_prompt, user_content, temp)
+            cached = self.llm_cache.get(role, cache_key)
+            if cached is not None:
+                return cached
+
+        start = time.monotonic()
+        with metrics.current().span(f"llm.{role}"):
+            answer, _, _ = self.router.call(role, self._request(role, system_prompt, user_content, temp))
+        if answer and cache_key:
+            self.llm_cache.put(cache_key, answer, time.monotonic() - start)
+        return answer
 
     # ==========================
     # 📂 附件解析模块
     # ==========================
 
     def _extract_pdf(self, filepath):
-        text = ""
-        try:
-            max_pages = config.AI_CONFIG.get("MAX_ATTACH_PAGES", 10)
-            with fitz.open(filepath) as doc:
-                for page in doc[:max_pages]:
-                    text += page.get_text()
-            return text[:5000]
-        except: return "[PDF解析错误]"
+        return extract_pdf(filepath)
 
     def _extract_word(self, filepath):
-        text = ""
-        try:
-            doc = docx.Document(filepath)
-            for para in doc.paragraphs: text += para.text + "\n"
-            return text[:5000]
-        except: return "[Word解析错误]"
+        return extract_word(filepath)
 
     def _extract_excel(self, filepath):
-        try:
-            df = pd.read_excel(filepath, nrows=100).fillna("")
-            if df.empty: return "[空Excel表格]"
-            return df.to_markdown(index=False)[:4000]
-        except Exception as e:
-            return f"[Excel解析错误: {str(e)}]"
+        return extract_excel(filepath)
 
     def _extract_ppt(self, filepath):
-        text = ""
-        try:
-            max_slides = config.AI_CONFIG.get("MAX_ATTACH_SLIDES", 15)
-            prs = Presentation(filepath)
-            for slide in prs.slides[:max_slides]:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text + "\n"
-            return text[:4000]
-        except Exception as e:
-            return f"[PPT解析错误: {str(e)}]"
+        return extract_ppt(filepath)
 
     def _extract_image_content(self, filepath):
         logger.info(f"    👁️ 正在识别图片内容: {os.path.basename(filepath)}...")
@@ -158,96 +272,240 @@ class BulletinSummarizer:
             '.png': self._extract_image_content
         }
 
-    def _process_single_file(self, path, extractors):
-        """原子任务：处理单个文件"""
-        if not os.path.exists(path):
+    def _format_attachment(self, path, content):
+        if not content:
             return None
+        return f"\n\n--- 附件 ({os.path.basename(path)}) ---\n{content}\n"
 
-        ext = os.path.splitext(path)[1].lower()
-        handler = extractors.get(ext)
-
-        if not handler:
+    def _cache_key(self, path):
+        """返回解析缓存键，不可缓存的文件类型返回 None"""
+        if not self.extract_cache:
             return None
-
-        content = handler(path)
-        if not content:
+        ext = os.path.splitext(path)[1].lower()
+        kind = EXT_KINDS.get(ext) or ("image" if ext in IMAGE_EXTS else None)
+        if not kind:
             return None
+        return self.extract_cache.key_for(kind, path)
 
-        return f"\n\n--- 附件 ({os.path.basename(path)}) ---\n{content}\n"
+    def _extract_budgeted(self, path, budget, extractors):
+        """在当前线程内按预算解析单个附件，返回 (text, complete)"""
+        ext = os.path.splitext(path)[1].lower()
+        kind = EXT_KINDS.get(ext)
+        if kind:
+            return extract(kind, path, budget)
+        # 图片 OCR 一次返回全文，由调用方按预算截取
+        return extractors[ext](path), True
 
-    def process_attachments(self, file_paths):
-        """处理附件列表（纯遍历逻辑，复杂度极低）"""
-        if not file_paths: return ""
+    def _extract_round(self, paths, shares, keys, seen, extractors):
+        """
+        按分配额解析一轮
+        seen 记录每个附件目前拿到的最长文本 (text, complete)，已够用的附件不再解析；
+        CPU 密集型解析交给多进程引擎，图片 OCR 留在当前线程
+        """
+        use_engine = config.AI_CONFIG.get("EXTRACT_IN_PROCESS", True)
+        jobs, job_slots = [], []
+        for idx, path in enumerate(paths):
+            share = shares[idx]
+            got = seen.get(idx)
+            if got and (got[1] or len(got[0]) >= share):
+                continue
+            if share <= 0:
+                seen[idx] = ("", False)
+                continue
+            if keys[idx]:
+                cached = self.extract_cache.get(keys[idx])
+                if cached and (cached[1] or len(cached[0]) >= share):
+                    seen[idx] = cached
+                    continue
+            kind = EXT_KINDS.get(os.path.splitext(path)[1].lower())
+            if kind and use_engine:
+                jobs.append((kind, path, share))
+                job_slots.append(idx)
+                continue
+            seen[idx] = self._extract_budgeted(path, share, extractors)
+            if keys[idx]:
+                self.extract_cache.put(keys[idx], *seen[idx])
+
+        if jobs:
+            for idx, (ok, payload) in zip(job_slots, self.engine.run(jobs)):
+                if not ok:
+                    seen[idx] = (f"[附件解析失败: {payload}]", True)
+                    continue
+                seen[idx] = payload
+                if keys[idx]:
+                    self.extract_cache.put(keys[idx], *payload)
+
+    def extract_attachments(self, file_paths, budget=None):
+        """
+        在共享的字符预算内解析附件列表，返回 [(path, text), ...]
+        第一轮每个附件拿到均分额度，解析器用尽额度即停止；
+        内容较短的附件用不完的额度在第二轮按最大最小公平原则分给被截断的附件。
+        """
+        if not file_paths: return []
 
         logger.info(f"    📎 正在预处理 {len(file_paths)} 个附件...")
         extractors = self._get_extractor_map()
-        combined_text = ""
-
-        for path in file_paths:
-            # 调用原子函数处理单个文件
-            result = self._process_single_file(path, extractors)
-            if result:
-                combined_text += result
-
-        return combined_text
+        paths = [p for p in file_paths
+                 if os.path.exists(p) and os.path.splitext(p)[1].lower() in extractors]
+        if not paths:
+            return []
+
+        if budget is None:
+            budget = config.AI_CONFIG.get("ATTACH_TEXT_BUDGET", 10000)
+        caps = []
+        for path in paths:
+            kind = EXT_KINDS.get(os.path.splitext(path)[1].lower(), "image")
+            caps.append(DEFAULT_BUDGETS[kind])
+        keys = [self._cache_key(path) for path in paths]
+        seen = {}
+
+        shares = split_budget(budget, caps)
+        self._extract_round(paths, shares, keys, seen, extractors)
+
+        # 第二轮：完整解析的附件只需要实际长度，剩余额度让给被截断的附件
+        demands = [min(len(seen[i][0]), caps[i]) if seen[i][1] else caps[i] for i in range(len(paths))]
+        shares = split_budget(budget, demands)
+        self._extract_round(paths, shares, keys, seen, extractors)
+
+        return [(path, seen[idx][0][:shares[idx]]) for idx, path in enumerate(paths)]
+
+    def process_attachments(self, file_paths, budget=None):
+        """解析附件列表并拼接成文本"""
+        results = [self._format_attachment(path, text) for path, text in self.extract_attachments(file_paths, budget)]
+        return "".join(r for r in results if r)
 
     # ==========================
     # 🧱 原子组件：业务逻辑拆分 (降维打击复杂度)
     # ==========================
 
     def _build_full_context(self, fetch_result, title):
-        """原子任务：组装正文和附件"""
+        """原子任务：把标题、正文和各附件拆成带优先级的段落，发送前再按角色的 token 预算打包"""
         web_text = fetch_result.get('text', '')
         files = fetch_result.get('files', [])
 
-        # 解析附件
-        attach_text = self.process_attachments(files)
-
         # 确定标题
         safe_title = title if title else (web_text.split('\n')[0] if web_text else "无标题")
 
-        # 组装全文
-        full_context = f"【公告标题】: {safe_title}\n\n【网页正文】:\n{web_text}\n{attach_text}"
-        return safe_title, full_context
-
-    def _check_relevance(self, safe_title, full_context):
-        """原子任务：Hunter 过滤逻辑"""
+        # 解析附件
+        attachments = [(path, text) for path, text in self.extract_attachments(files) if text]
+
+        # 标题必须完整保留；正文与附件各有保底份额，正文过长时不会把附件整段挤掉
+        ai_cfg = config.AI_CONFIG
+        sections = [
+            Section("标题", "【公告标题】: ", safe_title + "\n\n", priority=0, min_share=1.0),
+            Section("正文", "【网页正文】:\n", web_text + "\n", priority=1,
+                    min_share=ai_cfg.get("BODY_MIN_SHARE", 0.3)),
+        ]
+        attach_share = ai_cfg.get("ATTACH_MIN_SHARE", 0.4) / max(1, len(attachments))
+        for path, text in attachments:
+            sections.append(Section(f"附件 {os.path.basename(path)}",
+                                    f"\n\n--- 附件 ({os.path.basename(path)}) ---\n", text + "\n",
+                                    priority=2, min_share=attach_share))
+        return safe_title, sections
+
+    def _pack(self, role, sections, budget_key, default_budget):
+        """按角色候选模型的分词比例，把段落打包进 token 预算"""
+        providers = [p for p, _ in self.router.routes.get(role, {}).get("candidates", [])]
+        budget = config.AI_CONFIG.get(budget_key, default_budget)
+        return ContextPacker(TokenCounter(providers)).pack(sections, budget)
+
+    def _prefilter(self, safe_title, sections):
+        """不调用 LLM 的初筛：返回 (True / False, 判定来源)，拿不准时返回 (None, None)"""
         # 1. 长度初筛
-        if len(full_context) < 20:
-            return False
+        if total_length(sections) < 20:
+            return False, VERDICT_LENGTH
 
         # 2. 白名单检查
-        important_keywords = ["通知", "公告", "公示", "名单", "日程", "安排", "招标", "中标", "竞赛", "讲座", "大创", "补考", "申报"]
-        if any(k in safe_title for k in important_keywords):
+        if any(k in safe_title for k in WHITELIST_KEYWORDS):
             logger.info(f"    🛡️ 触发白名单，跳过过滤: {safe_title}")
-            return True
-
-        # 3. AI 智能判断
-        filter_prompt = """
-        你是一个学校通知审核员。请判断以下网页内容是否包含【实质性的通知、新闻、活动或公示信息】。
-        
-        🔴 判定为 NO (无价值) 的情况：
-        1. 仅包含网站导航菜单、页脚、版权声明、友情链接。
-        2. 页面提示“404”、“无访问权限”、“系统维护”、“测试页面”。
-        3. 正文几乎为空，或仅有“附件”二字但无具体说明。
-        4. 纯粹的商业广告。
-        
-        🟢 判定为 YES (有价值) 的情况：
-        1. 包含具体的活动时间、地点、参与人员名单。
-        2. 包含科研项目申报、截止日期、招标参数。
-        3. 包含具体的新闻报道、会议纪要。
-        
-        请仅回答 YES 或 NO。
+            return True, VERDICT_WHITELIST
+
+        # 3. 本地分类器：有把握的直接判定，拿不准的再问 LLM
+        if self.relevance_model:
+            threshold = config.AI_CONFIG.get("LOCAL_CLASSIFIER_THRESHOLD", 0.95)
+            verdict = self.relevance_model.predict(safe_title, threshold)
+            if verdict is not None:
+                with self._verdict_lock:
+                    self.local_verdicts += 1
+                logger.info(f"    🧮 本地分类器判定{'有' if verdict else '无'}价值，跳过 hunter: {safe_title[:15]}")
+                return verdict, VERDICT_LOCAL
+        return None, None
+
+    def _ask_hunter(self, sections):
+        """4. AI 智能判断 (单条)，返回 (是否有价值, 判定来源)，调用失败时按有价值处理"""
+        context = self._pack("hunter", sections, "FILTER_CONTEXT_TOKENS", 1500)
+        is_valuable = self._call_ai("hunter", FILTER_PROMPT + "\n请仅回答 YES 或 NO。\n", context)
+
+        if not is_valuable:
+            return True, VERDICT_FALLBACK
+        return not is_valuable.strip().upper().startswith("NO"), VERDICT_HUNTER
+
+    def _ask_hunter_batch(self, items):
         """
-        filter_len = config.AI_CONFIG.get("FILTER_CONTEXT_LEN", 2500)
-        is_valuable = self._call_ai("hunter", filter_prompt, full_context[:filter_len])
-
-        if is_valuable and is_valuable.strip().upper().startswith("NO"):
-            return False
-
-        return True
-
-    def _generate_summary_content(self, full_context):
+        4. AI 智能判断 (批量)：多条截断后的上下文合并为一次请求，按编号解析逐条结论
+        回答缺失或无法解析的条目退回单条调用
+        在合并线程中执行时，耗时与 token 通过各条目携带的度量对象记到对应公告上
+        :param items: [(safe_title, sections) 或 (safe_title, sections, task_metrics), ...]
+        :return: [(是否有价值, 判定来源), ...]
+        """
+        members = [item[2] if len(item) > 2 else metrics.current() for item in items]
+        if len(items) == 1:
+            with metrics.bind(members[0]):
+                return [self._ask_hunter(items[0][1])]
+
+        parts = []
+        for idx, item in enumerate(items, 1):
+            context = self._pack("hunter", item[1], "FILTER_BATCH_ITEM_TOKENS", 600)
+            parts.append(f"【第 {idx} 条】\n{context}\n")
+        prompt = FILTER_PROMPT + BATCH_FILTER_FORMAT.format(count=len(items))
+        with metrics.bind(metrics.SharedMetrics(members)):
+            answer = self._call_ai("hunter", prompt, "\n".join(parts)) or ""
+
+        verdicts = {}
+        for num, verdict in BATCH_VERDICT_RE.findall(answer):
+            verdicts[int(num)] = verdict.upper() == "YES"
+
+        results = [(verdicts[idx], VERDICT_HUNTER) if idx in verdicts else None
+                   for idx in range(1, len(items) + 1)]
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        if missing:
+            # 单条补判并发发出，不让整批等它们逐个往返
+            def _ask_one(idx):
+                with metrics.bind(members[idx]):
+                    return self._ask_hunter(items[idx][1])
+
+            with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="hunter-fallback") as executor:
+                for idx, result in zip(missing, executor.map(_ask_one, missing)):
+                    results[idx] = result
+        logger.info(f"    📦 [Hunter] 批量判定 {len(items)} 条，单条补判 {len(missing)} 条")
+        return results
+
+    def _check_relevance(self, safe_title, sections):
+        """原子任务：Hunter 过滤逻辑，返回 (是否有价值, 判定来源)"""
+        verdict, source = self._prefilter(safe_title, sections)
+        if verdict is not None:
+            return verdict, source
+        if self.relevance_batcher:
+            # 与其他工作线程的待判条目合并成一次请求；合并线程里取不到当前公告，度量对象随条目传入
+            return self.relevance_batcher.submit((safe_title, sections, metrics.current())).result()
+        return self._ask_hunter(sections)
+
+    def check_relevance_batch(self, items):
+        """
+        批量价值评估
+        :param items: [(safe_title, sections), ...]
+        :return: 与 items 顺序一致的 (是否有价值, 判定来源) 列表
+        """
+        results = [self._prefilter(title, sections) for title, sections in items]
+        pending = [idx for idx, (verdict, _) in enumerate(results) if verdict is None]
+        batch_size = config.AI_CONFIG.get("RELEVANCE_BATCH_SIZE", 8)
+        for start in range(0, len(pending), max(1, batch_size)):
+            chunk = pending[start:start + batch_size]
+            for idx, verdict in zip(chunk, self._ask_hunter_batch([items[i] for i in chunk])):
+                results[idx] = verdict
+        return results
+
+    def _generate_summary_content(self, sections):
         """原子任务：Commander/Strategist 总结逻辑"""
         summary_prompt = """
         你是一个专为高校师生服务的【信息提取助手】。请仔细阅读输入内容，提取关键信息，不要过度概括细节。
@@ -270,33 +528,41 @@ class BulletinSummarizer:
 
         ⏰ **截止时间**：(精确提取日期和具体时间点)
         """
-        max_ctx = config.AI_CONFIG.get("MAX_CONTEXT_LEN", 12000)
-        summary = self._call_ai("commander", summary_prompt, full_context[:max_ctx])
-
-        if not summary:
-            logger.warning("    ⚠️ Commander 失败，切换 Strategist...")
-            summary = self._call_ai("strategist", summary_prompt, full_context[:max_ctx])
-
-        return summary
+        context = self._pack("commander", sections, "MAX_CONTEXT_TOKENS", 8000)
+        # 备用模型 (Strategist) 已在 commander 的路由候选中，慢或失败时由路由器对冲 / 切换
+        return self._call_ai("commander", summary_prompt, context)
 
     # ==========================
     # 🚀 主入口 (重构后结构极简)
     # ==========================
 
+    def build_context(self, fetch_result, title=None):
+        """阶段 1：解析附件并组装上下文，返回 (safe_title, sections)"""
+        return self._build_full_context(fetch_result, title)
+
+    def check_relevance(self, safe_title, sections):
+        """阶段 2：价值评估 (Hunter)，返回 (是否有价值, 判定来源)"""
+        return self._check_relevance(safe_title, sections)
+
+    def write_summary(self, sections):
+        """阶段 3：生成摘要 (Commander)，失败时返回兜底提示"""
+        summary = self._generate_summary_content(sections)
+
+        if not summary:
+            return "⚠️ AI 总结失败，请直接查看原文。"
+
+        return summary
+
     def summarize(self, fetch_result, title=None):
         if not fetch_result: return None
 
         # 1. 准备上下文
-        safe_title, full_context = self._build_full_context(fetch_result, title)
+        safe_title, sections = self.build_context(fetch_result, title)
 
         # 2. 价值评估 (Hunter)
-        if not self._check_relevance(safe_title, full_context):
+        is_relevant, _ = self.check_relevance(safe_title, sections)
+        if not is_relevant:
             return "IGNORE"
 
         # 3. 生成摘要 (Commander)
-        summary = self._generate_summary_content(full_context)
-
-        if not summary:
-            return "⚠️ AI 总结失败，请直接查看原文。"
-
-        return summary
\ No newline at end of file
+        return self.write_summary(sections)
@@ -1,24 +1,30 @@
 import os
 import json
 import time
-import PIL.Image
+import threading
 import config
 
 # 屏蔽干扰日志
 os.environ["ORT_LOGGING_LEVEL"] = "3"
 
-# 🚑 修复 Pillow 兼容性
-if not hasattr(PIL.Image, 'ANTIALIAS'):
-    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
 
-from playwright.sync_api import sync_playwright
+def _load_ocr():
+    """
+    PIL / ddddocr (onnxruntime) / Playwright 导入很慢，Cookie 缓存有效时用不到，
+    只在真正需要登录时加载；未安装 ddddocr 时返回 None
+    """
+    import PIL.Image
 
-try:
-    import ddddocr
-    HAS_OCR = True
-except ImportError:
-    HAS_OCR = False
-    print("⚠️ 未安装 ddddocr，验证码将无法自动识别。")
+    # 🚑 修复 Pillow 兼容性
+    if not hasattr(PIL.Image, 'ANTIALIAS'):
+        PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+
+    try:
+        import ddddocr
+    except ImportError:
+        print("⚠️ 未安装 ddddocr，验证码将无法自动识别。")
+        return None
+    return ddddocr.DdddOcr()
 
 class LoginManager:
     def __init__(self, username=None, password=None):
@@ -29,10 +35,13 @@ class LoginManager:
         base_dir = os.path.dirname(os.path.dirname(current_script_path))
 
         # 📂 状态文件路径
-        self.data_dir = os.path.join(base_dir, "data")
+        self.data_dir = config.SYSTEM.get("DATA_DIR") or os.path.join(base_dir, "data")
         self.cookie_file = os.path.join(self.data_dir, "cookies.json")
         self.state_file = os.path.join(self.data_dir, "state.json") # 🟢 新增：浏览器全状态文件
 
+        # 凭证文件只由 LoginManager 写入；各处发现凭证失效都经由 relogin()，同一时间只有一个线程登录
+        self._login_lock = threading.RLock()
+
         self.login_url = config.SCHOOL["LOGIN_URL"]
         self.user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
@@ -49,19 +58,73 @@ class LoginManager:
                 pass
         return self._run_login()
 
+    def cookie_mtime(self):
+        """cookies.json 的修改时间，不存在时返回 None"""
+        try:
+            return os.path.getmtime(self.cookie_file)
+        except OSError:
+            return None
+
+    def relogin(self, seen_mtime=None):
+        """
+        凭证失效 (被重定向到登录页) 时强制重新登录，成功后原子替换凭证文件
+        :param seen_mtime: 发现失效前读到的 cookie_mtime()；等到登录锁时文件已被其他线程更新则直接复用
+        :return: 是否拿到了新凭证
+        """
+        with self._login_lock:
+            if seen_mtime is not None and self.cookie_mtime() != seen_mtime:
+                print("    🍪 凭证已由其他线程刷新，直接复用")
+                return True
+            return self._run_login() is not None
+
+    def cookie_expiry(self):
+        """缓存 Cookie 中最早的过期时间戳；无缓存或全是会话 Cookie 时返回 None"""
+        try:
+            with open(self.cookie_file, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
+        except Exception:
+            return None
+        expires = [c.get('expires', -1) for c in cookies]
+        expires = [e for e in expires if e and e > 0]
+        return min(expires) if expires else None
+
+    def refresh_if_stale(self, margin=600, max_age=None):
+        """
+        守护模式下在每轮开始前调用：Cookie 将在 margin 秒内过期，
+        或缓存已超过 max_age 秒时主动重新登录，避免扫描到一半才发现凭证失效
+        :return: 是否重新登录过
+        """
+        if os.path.exists(self.cookie_file):
+            expiry = self.cookie_expiry()
+            age = time.time() - os.path.getmtime(self.cookie_file)
+            expiring = expiry is not None and expiry - time.time() < margin
+            if expiring or (max_age and age > max_age):
+                print(f"    🔄 Cookie {'即将过期' if expiring else '缓存过久'}，主动刷新登录...")
+                # 先登录、成功后再替换凭证文件；登录失败时旧凭证原样保留，本轮照常使用
+                if self._run_login() is None:
+                    print("    ⚠️ 主动刷新登录失败，继续使用现有凭证")
+                    return False
+                return True
+        self.get_cookies()
+        return False
+
     def _save_cookies_and_return(self, context):
         """保存双重凭证"""
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
 
+        # 先写临时文件再原子替换，其他线程 / 进程读到的始终是完整的旧凭证或新凭证
         # 1. 保存 cookies.json (给 fetcher/requests 用)
         cookies = context.cookies()
-        with open(self.cookie_file, 'w', encoding='utf-8') as f:
+        with open(self.cookie_file + ".tmp", 'w', encoding='utf-8') as f:
             json.dump(cookies, f)
 
         # 2. 🟢 保存 state.json (给 UrlFinder/Playwright 用)
         # 这包含了 LocalStorage，能完美欺骗 SPA 页面
-        context.storage_state(path=self.state_file)
+        context.storage_state(path=self.state_file + ".tmp")
+
+        os.replace(self.cookie_file + ".tmp", self.cookie_file)
+        os.replace(self.state_file + ".tmp", self.state_file)
 
         print(f"    💾 凭证已保存 (Cookie: {len(cookies)} | State: ✅)")
         return self._format_cookie_str(cookies)
@@ -115,7 +178,7 @@ class LoginManager:
         page.locator("#password").fill(str(self.password))
         page.locator("body").click()
         page.wait_for_timeout(500)
-        if HAS_OCR and page.locator("#captchaImg").is_visible(): self._solve_captcha(page, ocr)
+        if ocr and page.locator("#captchaImg").is_visible(): self._solve_captcha(page, ocr)
         print("    🚀 提交登录...")
         page.locator("#login_submit").click()
 
@@ -144,10 +207,15 @@ class LoginManager:
             return False
 
     def _run_login(self):
+        with self._login_lock:
+            return self._login()
+
+    def _login(self):
         if not self.username or not self.password:
             print("❌ 未配置账号密码！")
             return None
-        ocr = ddddocr.DdddOcr() if HAS_OCR else None
+        from playwright.sync_api import sync_playwright
+        ocr = _load_ocr()
         MAX_RETRIES = 3
         with sync_playwright() as p:
             print(f"    🤖 [登录] 启动浏览器 (账号: {self.username})...")
@@ -0,0 +1,90 @@
+"""
+浏览器池基准测试：对比「每次冷启动浏览器」与「常驻浏览器池」的单条公告抓取耗时
+
+用法 (项目根目录)：
+    python benchmarks/bench_browser_pool.py --rounds 10
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import statistics
+import tempfile
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from functools import partial
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from spider import fetcher
+
+DETAIL_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>关于开展2026年大学生创新创业训练计划的通知</title></head>
+<body><div class="article"><h1>关于开展2026年大学生创新创业训练计划的通知</h1>
+<p>各学院：</p><p>为深入推进创新创业教育改革，现将有关事项通知如下。</p>
+<p>申报截止时间：2026年3月15日 17:00。</p>
+</div></body></html>
+"""
+
+
+def _start_server(root):
+    handler = partial(SimpleHTTPRequestHandler, directory=root)
+    handler.log_message = lambda *args, **kwargs: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run_rounds(url, rounds):
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fetcher.fetch_content(url)
+        latencies.append(time.perf_counter() - start)
+        if not result:
+            raise RuntimeError("抓取失败，基准结果无效")
+    return latencies
+
+
+def _report(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<10} mean={statistics.mean(latencies) * 1000:8.1f}ms  "
+          f"p50={statistics.median(latencies) * 1000:8.1f}ms  p95={p95 * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="浏览器池 vs 冷启动 抓取耗时对比")
+    parser.add_argument("--rounds", type=int, default=10, help="每种模式抓取次数")
+    parser.add_argument("--wait", type=int, default=0, help="WAIT_AFTER_GOTO (毫秒)，默认 0 以突出启动开销")
+    args = parser.parse_args()
+
+    config.SPIDER["WAIT_AFTER_GOTO"] = args.wait
+    config.SPIDER["MAX_RETRIES"] = 1
+
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, "detail.html"), "w", encoding="utf-8") as f:
+            f.write(DETAIL_PAGE)
+        server = _start_server(root)
+        url = f"http://127.0.0.1:{server.server_address[1]}/detail.html"
+
+        try:
+            config.SPIDER["BROWSER_POOL"] = False
+            cold = _run_rounds(url, args.rounds)
+
+            config.SPIDER["BROWSER_POOL"] = True
+            config.SPIDER["BROWSER_POOL_SIZE"] = 1
+            fetcher.fetch_content(url)  # 预热，不计入统计
+            pooled = _run_rounds(url, args.rounds)
+        finally:
+            fetcher.shutdown_browser_pool()
+            server.shutdown()
+
+    print(f"\n单条公告抓取耗时 ({args.rounds} 次)")
+    _report("冷启动", cold)
+    _report("浏览器池", pooled)
+    print(f"加速比: {statistics.mean(cold) / statistics.mean(pooled):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
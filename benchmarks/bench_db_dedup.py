@@ -0,0 +1,90 @@
+"""
+数据库查重基准测试：在 10 万行的 history.db 上对比逐条 API 与批量 API
+
+用法 (项目根目录)：
+    python benchmarks/bench_db_dedup.py --rows 100000 --batch 500
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.db_manager import DatabaseManager
+from data.models import Bulletin, ProcessStatus
+
+STATUSES = [ProcessStatus.SUCCESS, ProcessStatus.IGNORED, ProcessStatus.FAILED, ProcessStatus.PENDING]
+
+
+def _seed(db, rows):
+    """直接用 executemany 灌入历史数据"""
+    now = datetime.now()
+    values = [
+        {"url": f"https://bulletin.example/info/{i}.htm", "title": f"历史公告 {i}",
+         "status": random.choice(STATUSES), "retry_count": 0, "created_at": now, "updated_at": now}
+        for i in range(rows)
+    ]
+    with db.engine.begin() as conn:
+        conn.execute(Bulletin.__table__.insert(), values)
+
+
+def _timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36} {elapsed * 1000:10.1f} ms")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="逐条 vs 批量 查重/注册/状态更新")
+    parser.add_argument("--rows", type=int, default=100_000, help="历史表行数")
+    parser.add_argument("--batch", type=int, default=500, help="每轮扫描到的链接数")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as root:
+        db = DatabaseManager(f"sqlite:///{os.path.join(root, 'history.db')}")
+        _seed(db, args.rows)
+
+        # 一半是已存在的历史链接，一半是新链接
+        old_urls = [f"https://bulletin.example/info/{random.randrange(args.rows)}.htm" for _ in range(args.batch // 2)]
+        new_items = [{"url": f"https://bulletin.example/new/{i}.htm", "title": f"新公告 {i}"} for i in range(args.batch)]
+        scan_urls = old_urls + [item["url"] for item in new_items[:args.batch // 2]]
+
+        print(f"\n查重 ({len(scan_urls)} 条链接 / {args.rows} 行历史)")
+        loop_result, t_loop = _timed("is_processed 逐条", lambda: [u for u in scan_urls if not db.is_processed(u)])
+        bulk_result, t_bulk = _timed("filter_unprocessed 批量", lambda: db.filter_unprocessed(scan_urls))
+        assert set(loop_result) == set(bulk_result)
+        print(f"  加速比: {t_loop / t_bulk:.1f}x")
+
+        half = len(new_items) // 2
+        print(f"\n注册 ({half} 条新任务)")
+        _, t_loop = _timed("register_task 逐条", lambda: [db.register_task(i["url"], i["title"]) for i in new_items[:half]])
+        (id_map, inserted), t_bulk = _timed("register_tasks_bulk 批量", lambda: db.register_tasks_bulk(new_items[half:]))
+        print(f"  加速比: {t_loop / t_bulk:.1f}x")
+        # 正确性：每个新链接都拿到主键，重复注册 (含已存在的历史链接) 不新增也不改变主键
+        assert set(id_map) == inserted == {i["url"] for i in new_items[half:]}
+        again, inserted = db.register_tasks_bulk(new_items + [{"url": u, "title": "重复"} for u in old_urls])
+        assert not inserted
+        assert all(again[url] == pk for url, pk in id_map.items())
+        assert len(again) == len(new_items) + len(set(old_urls))
+
+        targets = new_items[half:]
+        print(f"\n状态更新 ({len(targets)} 条)")
+        _, t_url = _timed("update_status 按 URL", lambda: [db.update_status(i["url"], ProcessStatus.FAILED, error_msg="bench") for i in targets])
+        _, t_pk = _timed("update_status 按主键", lambda: [db.update_status(i["url"], ProcessStatus.SUCCESS, task_id=id_map[i["url"]]) for i in targets])
+        print(f"  加速比: {t_url / t_pk:.1f}x")
+
+        db.close()
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+HTML 解析后端基准测试：在录制的列表页 / 详情页上对比 html.parser 与 lxml
+先校验两种后端的输出逐字一致 (不一致时以非零状态码退出)，再分别计时
+
+用法 (项目根目录)：
+    python benchmarks/bench_html_parse.py --rounds 20
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import statistics
+from contextlib import redirect_stdout
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+sys.path.append(BASE_DIR)
+from spider.html_backend import BACKENDS
+from spider.url_finder import UrlFinder
+from spider.fetcher import _find_attachment_links
+
+LIST_FIXTURES = ["list_news.html", "list_table.html"]
+DETAIL_FIXTURES = ["detail.html"]
+BASE_URL = "https://i.nuist.edu.cn/index/xxgg.htm"
+
+
+def _read(name):
+    # newline="" 保留原始换行 (表格列表页为 CRLF)
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _parse_list(backend, html):
+    """与 UrlFinder._scan_pages 相同：一次解析取出行与分页链接"""
+    finder = UrlFinder()
+    finder.backend = backend
+    rows, links = backend.parse_list(html, finder.source["row_selectors"])
+    return finder._parse_rows(rows, BASE_URL), finder._find_next_page(links, BASE_URL)
+
+
+def _parse_detail(backend, html):
+    """与 fetcher._process_html 相同 (不含附件下载)"""
+    text, links = backend.parse_detail(html)
+    return text[:8000], _find_attachment_links(links, BASE_URL)
+
+
+def _timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="html.parser vs lxml 解析耗时")
+    parser.add_argument("--rounds", type=int, default=20, help="每个样本重复次数 (取中位数)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    backends = {}
+    for name, cls in BACKENDS.items():
+        try:
+            backends[name] = cls()
+        except ImportError:
+            print(f"⚠️ 未安装 {name}，跳过")
+    if len(backends) < 2:
+        sys.exit(1)
+
+    cases = [(name, _parse_list) for name in LIST_FIXTURES] + [(name, _parse_detail) for name in DETAIL_FIXTURES]
+    mismatched = False
+    print(f"\n{'样本':<18} {'大小':>8} " + " ".join(f"{name:>12}" for name in backends) + f" {'加速比':>8}")
+    for fixture, fn in cases:
+        html = _read(fixture)
+        # _parse_rows 的进度日志会刷屏并干扰计时
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            outputs = {name: fn(backend, html) for name, backend in backends.items()}
+            timings = {name: _timed(lambda: fn(backend, html), args.rounds) for name, backend in backends.items()}
+        for name, output in outputs.items():
+            if output != outputs["html.parser"]:
+                print(f"❌ {fixture}: {name} 的输出与 html.parser 不一致")
+                mismatched = True
+        speedup = timings["html.parser"] / timings["lxml"]
+        print(f"{fixture:<18} {len(html) // 1024:>6}KB " +
+              " ".join(f"{t * 1000:>10.1f}ms" for t in timings.values()) + f" {speedup:>7.1f}x")
+
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+启动耗时回归检查：测量「扫描后没有新公告」这条最常见路径从解释器启动到退出的耗时，
+超出预算或提前加载了重量级依赖时以非零状态码退出 (可直接放进 CI / cron 前置检查)
+
+登录与列表扫描被替换为立即返回，测到的是导入与初始化本身的开销。
+
+用法 (项目根目录)：
+    python benchmarks/bench_startup.py --budget 2.0 --rounds 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+# 没有新公告时不应被导入的模块
+HEAVY_MODULES = ["fitz", "pandas", "docx", "pptx", "openai", "markdown", "ddddocr", "PIL", "spider.fetcher", "ai_brain.summarizer"]
+
+CHILD_CODE = r"""
+import os, sys, json, time, argparse, tempfile
+sys.path.insert(0, {base_dir!r})
+import main
+from data.db_manager import DatabaseManager
+
+root = tempfile.mkdtemp()
+cookie_file = os.path.join(root, "cookies.json")
+with open(cookie_file, "w") as f:
+    f.write("[]")
+
+_init = main.LoginManager.__init__
+def _patched_init(self, *args, **kwargs):
+    _init(self, *args, **kwargs)
+    self.cookie_file = cookie_file
+main.LoginManager.__init__ = _patched_init
+main.LoginManager.get_cookies = lambda self: ""
+main.LoginManager.refresh_if_stale = lambda self, **kwargs: False
+main.SourceScanner.find_new_urls = lambda self: []
+main.DatabaseManager = lambda: DatabaseManager(f"sqlite:///{{os.path.join(root, 'history.db')}}")
+
+main.main(argparse.Namespace(pipeline=False, daemon=False, profile_startup=False))
+print(json.dumps({{"loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _run_once(workdir):
+    code = CHILD_CODE.format(base_dir=BASE_DIR, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=workdir, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip())
+    loaded = json.loads(proc.stdout.strip().splitlines()[-1])["loaded"]
+    return elapsed, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无新公告路径的启动耗时预算检查")
+    parser.add_argument("--budget", type=float, default=2.0, help="允许的耗时上限 (秒，取多轮中位数)")
+    parser.add_argument("--rounds", type=int, default=5, help="测量轮数")
+    parser.add_argument("--profile", action="store_true", help="超出预算时输出导入耗时排行")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        timings, loaded = [], []
+        for _ in range(args.rounds):
+            elapsed, loaded = _run_once(workdir)
+            timings.append(elapsed)
+
+    median = statistics.median(timings)
+    print(f"  无新公告退出耗时: 中位数 {median * 1000:.0f} ms "
+          f"(最快 {min(timings) * 1000:.0f} ms / 最慢 {max(timings) * 1000:.0f} ms，预算 {args.budget * 1000:.0f} ms)")
+
+    failed = False
+    if loaded:
+        print(f"  ❌ 提前加载了重量级模块: {', '.join(loaded)}")
+        failed = True
+    if median > args.budget:
+        print("  ❌ 超出启动耗时预算")
+        failed = True
+        if args.profile:
+            from utils.startup_profile import report
+            report("main")
+    if not failed:
+        print("  ✅ 通过")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
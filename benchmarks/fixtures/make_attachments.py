@@ -0,0 +1,104 @@
+"""
+生成基准测试用的附件样本 (PDF / DOCX / XLSX / PPTX) 与摘要样本
+内容按固定随机种子生成，体量参照门户公告常见附件：多页通知、申报书、汇总表、报告幻灯片
+
+用法 (项目根目录)：
+    python benchmarks/fixtures/make_attachments.py
+"""
+import os
+import random
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEPTS = ["教务处", "研究生院", "学生工作处", "科技处", "人事处", "后勤管理处", "图书馆", "信息化建设与管理处"]
+SENTENCES = [
+    "请各学院于规定时间前将汇总材料报送至相关部门，逾期不予受理。",
+    "申报人须为我校在职在编教师，且当年度主持同类项目不超过一项。",
+    "考试期间请考生携带学生证和身份证，提前十五分钟进入考场。",
+    "系统升级期间校园卡消费、门禁等功能将暂停使用，请师生提前做好准备。",
+    "报告会将在气象楼一楼报告厅举行，欢迎全校师生参加。",
+    "如有疑问请联系各学院教学秘书或拨打咨询电话。",
+]
+
+
+def _paragraph(rng, n=4):
+    return "".join(rng.choice(SENTENCES) for _ in range(n))
+
+
+def make_pdf(path, rng, pages=12):
+    import fitz
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page()
+        text = f"第 {page_no + 1} 页\n" + "\n".join(_paragraph(rng) for _ in range(12))
+        page.insert_textbox(fitz.Rect(50, 50, 545, 800), text, fontname="china-s", fontsize=10)
+    doc.save(path, garbage=4, deflate=True)
+    doc.close()
+
+
+def make_docx(path, rng, paragraphs=200):
+    import docx
+    doc = docx.Document()
+    doc.add_heading("2025年度科研项目申报书", level=1)
+    for idx in range(paragraphs):
+        doc.add_paragraph(f"{idx + 1}. {_paragraph(rng, 2)}")
+    table = doc.add_table(rows=11, cols=4)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = "项目名称" if r == 0 else f"{rng.choice(DEPTS)}-{r}-{c}"
+    doc.save(path)
+
+
+def make_xlsx(path, rng, rows=150):
+    import pandas as pd
+    data = {
+        "序号": list(range(1, rows + 1)),
+        "学院": [rng.choice(DEPTS) for _ in range(rows)],
+        "姓名": [f"学生{rng.randrange(10000):04d}" for _ in range(rows)],
+        "学号": [f"2024{rng.randrange(10 ** 6):06d}" for _ in range(rows)],
+        "项目名称": [rng.choice(SENTENCES)[:14] for _ in range(rows)],
+        "经费(元)": [rng.randrange(1000, 50000) for _ in range(rows)],
+        "起止时间": ["2025-01-01 至 2025-12-31"] * rows,
+        "备注": ["" if rng.random() < 0.7 else "延期" for _ in range(rows)],
+    }
+    pd.DataFrame(data).to_excel(path, index=False)
+
+
+def make_pptx(path, rng, slides=20):
+    from pptx import Presentation
+    from pptx.util import Inches
+    prs = Presentation()
+    for idx in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = f"第 {idx + 1} 部分：{rng.choice(DEPTS)}工作汇报"
+        slide.placeholders[1].text = "\n".join(rng.choice(SENTENCES) for _ in range(5))
+        box = slide.shapes.add_textbox(Inches(1), Inches(6.5), Inches(8), Inches(0.5))
+        box.text_frame.text = f"南京信息工程大学 · {idx + 1}"
+    prs.save(path)
+
+
+def make_summary(path, rng, items=8):
+    """write_summary 风格的 Markdown 摘要，用于测量邮件正文渲染"""
+    lines = ["### 📌 核心要点", ""]
+    lines += [f"- **{rng.choice(DEPTS)}**：{rng.choice(SENTENCES)}" for _ in range(items)]
+    lines += ["", "### ⏰ 时间节点", "", "| 事项 | 截止时间 |", "|---|---|"]
+    lines += [f"| {rng.choice(SENTENCES)[:10]} | 2025-0{i % 9 + 1}-15 |" for i in range(items)]
+    lines += ["", "### 📎 附件", "", "[附件1：申报书.docx](https://bulletin.nuist.edu.cn/_upload/a.docx)"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    rng = random.Random(2024)
+    targets = [
+        ("sample.pdf", make_pdf), ("sample.docx", make_docx), ("sample.xlsx", make_xlsx),
+        ("sample.pptx", make_pptx), ("summary.md", make_summary),
+    ]
+    for name, make in targets:
+        path = os.path.join(FIXTURE_DIR, name)
+        make(path, rng)
+        print(f"  ✅ {name} ({os.path.getsize(path) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+离线基准测试套件：在 benchmarks/fixtures 下录制的样本上为流水线各阶段计时
+- 列表页解析 (UrlFinder._parse_html)、详情页解析 (fetcher._process_html，不下载附件)、附件链接筛选
+- 各附件解析器 (PDF / Word / Excel / PPT)
+- 邮件正文渲染 (Notifier._generate_html_body)
+- 数据库查重 / 注册 / 状态更新 / 水位线读写 (默认 1k 与 100k 行历史)
+结果写成 JSON；指定 --baseline 时逐项对比，任一用例变慢超过阈值即以非零状态码退出 (可直接放进 CI)
+
+用法 (项目根目录)：
+    python benchmarks/run_suite.py --output bench.json
+    python benchmarks/run_suite.py --baseline baseline.json --tolerance 1.3
+    python benchmarks/run_suite.py --only db. --db-rows 1000
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+sys.path.append(BASE_DIR)
+
+BASE_URL = "https://i.nuist.edu.cn/index/xxgg.htm"
+LIST_FIXTURES = ["list_news.html", "list_table.html"]
+DETAIL_FIXTURES = ["detail.html"]
+ATTACHMENT_FIXTURES = {"pdf": "sample.pdf", "word": "sample.docx", "excel": "sample.xlsx", "ppt": "sample.pptx"}
+
+
+def _read(name):
+    # newline="" 保留原始换行 (表格列表页为 CRLF)
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+# ==========================
+# 用例组：每组是一个生成器，完成准备工作后逐个产出 (用例名, 被测函数)
+# 生成器在用例计时期间保持挂起，临时目录等资源在整组结束后才释放
+# ==========================
+
+def finder_cases(args):
+    from spider.url_finder import UrlFinder
+    finder = UrlFinder()
+    for fixture in LIST_FIXTURES:
+        html = _read(fixture)
+        yield f"finder.parse_html[{fixture}]", lambda html=html: finder._parse_html(html, BASE_URL)
+
+
+def fetcher_cases(args):
+    from spider import fetcher
+    from spider.html_backend import get_backend
+    # 只测解析与筛选，附件下载替换为立即返回
+    fetcher.download_file = lambda url, cookie_dict, suggested_name=None: None
+    for fixture in DETAIL_FIXTURES:
+        html = _read(fixture)
+        _, links = get_backend().parse_detail(html)
+        yield f"fetcher.process_html[{fixture}]", lambda html=html: fetcher._process_html(html, BASE_URL, {})
+        yield f"fetcher.attachment_links[{fixture}]", lambda links=links: fetcher._find_attachment_links(links, BASE_URL)
+
+
+def extractor_cases(args):
+    from ai_brain.extractors import extract
+    for kind, fixture in ATTACHMENT_FIXTURES.items():
+        path = os.path.join(FIXTURE_DIR, fixture)
+        yield f"extract.{kind}", lambda kind=kind, path=path: extract(kind, path)
+
+
+def notify_cases(args):
+    from notify.sender import Notifier
+    notifier = Notifier()
+    summary = _read("summary.md")
+    yield "notify.html_body", lambda: notifier._generate_html_body("关于组织申报2025年度国家自然科学基金项目的通知", summary)
+
+
+def db_cases(args):
+    from data.db_manager import DatabaseManager
+    from data.models import ProcessStatus
+    from bench_db_dedup import _seed
+
+    for rows in args.db_rows:
+        with tempfile.TemporaryDirectory() as root:
+            db = DatabaseManager(f"sqlite:///{os.path.join(root, 'history.db')}", mode="default")
+            _seed(db, rows)
+            rng = random.Random(rows)
+            # 一轮扫描：一半是已存在的历史链接，一半是新链接
+            scan = [f"https://bulletin.example/info/{rng.randrange(rows)}.htm" for _ in range(args.db_batch // 2)]
+            scan += [f"https://bulletin.example/scan/{i}.htm" for i in range(args.db_batch - len(scan))]
+            counter = iter(range(10 ** 9))
+
+            def register(batch=20):
+                base = next(counter) * batch
+                id_map, _ = db.register_tasks_bulk([{"url": f"https://bulletin.example/new/{base + i}.htm",
+                                                     "title": f"新公告 {base + i}"} for i in range(batch)])
+                return id_map
+
+            def state_roundtrip():
+                db.set_state("watermark:bench", {"date": "2024-12-01", "url": scan[0]})
+                return db.get_state("watermark:bench")
+
+            id_map = register()
+            targets = list(id_map.items())
+
+            yield f"db.is_processed[{rows}]", lambda: db.is_processed(scan[0])
+            yield f"db.filter_unprocessed[{rows}]", lambda: db.filter_unprocessed(scan)
+            yield f"db.register_tasks_bulk[{rows}]", register
+            yield f"db.update_status[{rows}]", lambda: [
+                db.update_status(url, ProcessStatus.SUCCESS, summary="bench", task_id=task_id) for url, task_id in targets]
+            yield f"db.state_roundtrip[{rows}]", state_roundtrip
+
+            db.close()
+            db.engine.dispose()
+
+
+GROUPS = [finder_cases, fetcher_cases, extractor_cases, notify_cases, db_cases]
+
+
+# ==========================
+# 计时与对比
+# ==========================
+
+def _measure(fn, rounds, warmup):
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for _ in range(warmup):
+            fn()
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(samples[0], 4),
+        "p90_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.9))], 4),
+        "rounds": rounds,
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(args):
+    results = {}
+    for group in GROUPS:
+        try:
+            for name, fn in group(args):
+                if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                    continue
+                results[name] = _measure(fn, args.rounds, args.warmup)
+                print(f"  {name:<40} {results[name]['median_ms']:10.2f} ms")
+        except ImportError as e:
+            # 缺少某个可选依赖时跳过整组，其余用例照常运行
+            print(f"  ⚠️ 跳过 {group.__name__}: {e}")
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance, min_delta_ms):
+    """
+    :return: 变慢超过阈值的用例列表
+    中位数同时超过 基线 × tolerance 与 基线 + min_delta_ms 才算变慢，避免亚毫秒级用例的抖动误报
+    """
+    regressions = []
+    print(f"\n{'用例':<40} {'基线':>10} {'当前':>10} {'比值':>7}")
+    for name, current in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:<40} {'-':>10} {current['median_ms']:>8.2f}ms {'新增':>7}")
+            continue
+        ratio = current["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        slower = ratio > tolerance and current["median_ms"] - base["median_ms"] > min_delta_ms
+        mark = "  ❌" if slower else ""
+        print(f"{name:<40} {base['median_ms']:>8.2f}ms {current['median_ms']:>8.2f}ms {ratio:>6.2f}x{mark}")
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流水线各阶段离线基准测试")
+    parser.add_argument("--rounds", type=int, default=10, help="每个用例计时轮数 (取中位数)")
+    parser.add_argument("--warmup", type=int, default=1, help="计时前的预热轮数 (含首次导入解析库)")
+    parser.add_argument("--only", nargs="+", help="只运行名称以这些前缀开头的用例，如 db. extract.")
+    parser.add_argument("--db-rows", type=int, nargs="+", default=[1000, 100_000], help="数据库用例的历史表行数")
+    parser.add_argument("--db-batch", type=int, default=500, help="每轮扫描到的链接数")
+    parser.add_argument("--output", help="结果 JSON 的保存路径")
+    parser.add_argument("--baseline", help="基线 JSON，指定后逐项对比")
+    parser.add_argument("--tolerance", type=float, default=1.3, help="允许的变慢倍数")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="低于该差值的变化不算变慢")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    random.seed(42)
+
+    print(f"\n🧪 离线基准测试 ({args.rounds} 轮取中位数)")
+    report = run(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 个用例变慢超过 {args.tolerance}x: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ 与基线相比没有明显变慢")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,8 +22,41 @@ AI_CONFIG = {
     "VISION_TIMEOUT": 30,
     "MAX_ATTACH_PAGES": 10,     # PDF 解析页数限制
     "MAX_ATTACH_SLIDES": 15,    # PPT 解析页数限制
-    "MAX_CONTEXT_LEN": 12000,   # 总结时的上下文长度限制
-    "FILTER_CONTEXT_LEN": 2500  # 过滤时的上下文长度限制
+    "MAX_ATTACH_ROWS": 100,     # Excel 解析行数限制
+    "ATTACH_TEXT_BUDGET": 10000,# 单条公告所有附件共享的字符预算，用尽即停止解析
+    "MAX_CONTEXT_TOKENS": 8000, # 总结时的上下文 token 预算 (按目标模型的分词比例估算)
+    "FILTER_CONTEXT_TOKENS": 1500, # 过滤时的上下文 token 预算
+    "BODY_MIN_SHARE": 0.3,      # 网页正文的保底预算占比
+    "ATTACH_MIN_SHARE": 0.4,    # 所有附件合计的保底预算占比 (各附件均分)
+    "EXTRACT_IN_PROCESS": True, # 附件解析放到子进程执行 (不占用 GIL，可超时终止)
+    "EXTRACT_PROCESSES": 2,     # 同时运行的解析子进程总数 (所有工作线程共用)
+    "EXTRACT_TIMEOUT": 60,      # 单个附件解析超时 (秒)
+    "EXTRACT_MAX_MEMORY_MB": 1024, # 单个解析子进程内存上限 (仅 Linux/macOS 生效)
+    "EXTRACT_CACHE": True,      # 按文件哈希缓存附件解析结果 (含图片 OCR)
+    "EXTRACT_CACHE_MAX_MB": 200,# 解析缓存容量，超出后按最近最少使用淘汰
+    "LLM_CACHE": True,          # 缓存 AI 回答，相同输入不再重复调用
+    "LLM_CACHE_TTL": 7 * 24 * 3600,  # AI 回答缓存有效期 (秒)
+    "LLM_CACHE_MAX_MB": 50,     # AI 回答缓存容量
+    "LLM_CACHE_BYPASS": [],     # 不走缓存的角色，例如 ["commander"]
+    "LOCAL_CLASSIFIER": True,   # 用本地分类器预判价值 (需先运行 python -m ai_brain.relevance_model train)
+    "LOCAL_CLASSIFIER_THRESHOLD": 0.95,  # 置信度达到该值才本地判定，否则交给 hunter
+    "LOCAL_CLASSIFIER_MIN_SAMPLES": 200, # 训练样本少于该值时不启用
+    "RELEVANCE_BATCH_SIZE": 8,  # 多条公告合并为一次 hunter 请求的上限 (1 = 不合并)
+    "RELEVANCE_BATCH_WAIT": 0,  # 队列空后的额外攒批等待 (秒)；0 = 只合并上一批请求期间到达的，不增加延迟
+    "RELEVANCE_BATCH_CONCURRENCY": None,  # 同时在途的 hunter 批次数，None 表示跟随 MAX_WORKERS
+    "FILTER_BATCH_ITEM_TOKENS": 600, # 批量判定时每条公告的 token 预算
+    "BASE_URLS": {},            # 覆盖各服务商的接口地址，例如 {"deepseek": "http://127.0.0.1:8000/v1"}
+    "ROUTES": {                 # 按角色覆盖路由策略，未列出的角色使用内置默认值
+        # "commander": {"candidates": [("deepseek", "deepseek-chat"), ("aliyun", "qwen-max")],
+        #               "strategy": "latency", "hedge": True},
+        # "hunter": {"candidates": [("zhipu", "glm-4-flash"), ("silicon", "Qwen/Qwen2.5-7B-Instruct")],
+        #            "strategy": "latency"}
+    },
+    "HEDGE_DEFAULT_DELAY": 15,  # 延迟样本不足时，主请求等待多久后发起对冲请求 (秒)
+    "HEDGE_MIN_DELAY": 2,       # 对冲等待下限 (秒)，样本足够时取该服务商的 p90 延迟
+    "CIRCUIT_FAILURES": 3,      # 服务商连续失败多少次后熔断
+    "CIRCUIT_COOLDOWN": 120,    # 熔断冷却时间 (秒)
+    "ROUTER_WORKERS": None      # 路由器并发请求线程数 (含对冲请求)，None 表示 MAX_WORKERS × 最多候选数
 }
 
 # ================= 📢 推送通道配置 =================
@@ -32,13 +65,15 @@ NOTIFY = {
         "ENABLE": False,
         "SMTP_SERVER": "smtp.qq.com",
         "SMTP_PORT": 465,
+        "SSL": True,            # False 表示明文 SMTP (本地替身服务)
         "SENDER": "",
         "PASSWORD": "",
         "RECEIVER": ""
     },
     "QMSG": {
         "ENABLE": False,
-        "KEY": ""
+        "KEY": "",
+        "API": "https://qmsg.zendee.cn/send/"
     },
     "WEBHOOK": {
         "ENABLE": False,
@@ -56,7 +91,34 @@ SPIDER = {
     "CHUNK_SIZE": 8192,
     "WAIT_AFTER_GOTO": 3000,
     "RANDOM_DELAY_MIN": 2,
-    "RANDOM_DELAY_MAX": 5
+    "RANDOM_DELAY_MAX": 5,
+    "BROWSER_POOL": True,           # 是否启用常驻浏览器池 (False=每次抓取冷启动浏览器)
+    "BROWSER_POOL_SIZE": None,      # 池内浏览器数量，None 表示跟随 MAX_WORKERS
+    "BROWSER_RECYCLE_PAGES": 50,    # 单个浏览器服务多少页面后重启
+    "BROWSER_MAX_HEAP_MB": 512,     # JS 堆内存超过该值时重启浏览器
+    "BROWSER_LEASE_TIMEOUT": 300,   # 等待空闲浏览器的最长时间 (秒)
+    "HTTP_FIRST": True,             # 详情页先尝试 HTTP 直连，失败再启动浏览器
+    "HTTP_FETCH_TIMEOUT": 15,       # HTTP 直连超时 (秒)
+    "HTTP_POOL_SIZE": 10,           # HTTP 连接池大小
+    "HTTP_MIN_TEXT_LEN": 200,       # 可见文字少于该值视为需要 JS 渲染
+    "HTTP_SKIP_AFTER_FALLBACKS": 3, # 某域名连续多少次需要浏览器后跳过 HTTP 尝试
+    "HTTP_REPROBE_EVERY": 20,       # 被跳过的域名每隔多少次重新尝试 HTTP
+    "HTML_PARSER": "auto",          # HTML 解析后端："auto" (优先 lxml) / "lxml" / "html.parser"
+    "ATTACH_STORE": True,           # 附件按内容哈希去重存储，重复下载改为条件请求
+    "ATTACH_FRESH_SECONDS": 3600,   # 新鲜期内的附件直接复用，不发请求
+    "ATTACH_WORKERS": 4,            # 单条公告的附件并发下载数
+    "ATTACH_PER_HOST": 3,           # 同一域名的并发下载上限 (全局)
+    "ATTACH_MAX_BYTES": 50 * 1024 * 1024, # 单个附件大小上限
+    "LIST_MAX_PAGES": 5,            # 列表增量扫描最多翻几页 (到达上次的水位线即停止)
+    "LIST_MAX_ITEMS": 30,           # 单轮累计扫到这么多条即停止翻页 (每个来源，未到水位线时不推进水位线)
+    "LIST_SCAN_WORKERS": 3,         # 多个来源同时扫描的并发数 (共享浏览器池)
+    "LIST_FINGERPRINT": True,       # 列表指纹：列表行未变化 (或服务器返回 304) 时整轮跳过
+    "LIST_FULL_SCAN_EVERY": 21600,  # 每隔多少秒忽略指纹做一次全量扫描 (秒)，让失败的公告得到重试
+    "LIST_SOURCES": [               # 列表来源注册表，每项只需写出与默认值不同的字段
+        {"name": "default"},        # 门户首页 → 点击「信息公告」
+        # {"name": "教务处", "entry_url": "https://jwc.example.edu.cn/tzgg.htm", "click_text": "",
+        #  "row_selectors": ["div.list li"], "date_regex": r"(\d{4})年(\d{1,2})月(\d{1,2})日"},
+    ]
 }
 
 # ================= ⚙️ 系统运行配置 =================
@@ -66,5 +128,30 @@ SYSTEM = {
     "WORKER_DELAY_MIN": 0.5,
     "WORKER_DELAY_MAX": 2.0,
     "LOG_MAX_BYTES": 5 * 1024 * 1024,
-    "LOG_BACKUP_COUNT": 5
+    "LOG_BACKUP_COUNT": 5,
+    "PIPELINE_MODE": False,         # 分阶段流水线调度 (也可用命令行 --pipeline 开启)
+    "PIPELINE_WORKERS": {           # 各阶段并发数，未配置的阶段跟随 MAX_WORKERS
+        "fetch": 2,
+        "extract": 2,
+        "relevance": 2,
+        "summarize": 2,
+        "notify": 1
+    },
+    "PIPELINE_QUEUE_SIZE": 4,       # 阶段间队列容量 (背压阈值)
+    "DB_MODE": "default",           # "wal" = WAL 日志 + 单写线程组提交 (并发数较高时推荐)
+    "DB_BUSY_TIMEOUT_MS": 5000,     # WAL 模式下等待写锁的超时时间
+    "DB_GROUP_COMMIT_SIZE": 50,     # 单次提交最多合并的写操作数
+    "DB_GROUP_COMMIT_DELAY_MS": 20, # 组提交的等待窗口
+    "POLL_MIN_INTERVAL": 300,       # 守护模式 (--daemon) 最短轮询间隔 (秒)，用于发布高峰
+    "POLL_MAX_INTERVAL": 3600,      # 守护模式最长轮询间隔 (秒)，用于夜间和周末
+    "POLL_TARGET_NEW": 0.5,         # 两次轮询之间预期的新公告数，越小轮询越密
+    "POLL_HISTORY_DAYS": 90,        # 学习发布规律时使用的历史天数
+    "COOKIE_REFRESH_MARGIN": 600,   # Cookie 剩余有效期少于该值 (秒) 时主动重新登录
+    "COOKIE_MAX_AGE": 4 * 3600,     # Cookie 缓存最长使用时间 (秒)；门户多为无过期时间的会话 Cookie，靠它主动刷新
+    "DATA_DIR": None,               # 运行数据目录 (Cookie、数据库、缓存、附件)，None 表示项目下的 data/
+    "METRICS": True,                # 记录每条公告的分阶段耗时、字节数与 token 数 (表 bulletin_metrics)
+    "METRICS_TEXTFILE": None,       # 每轮结束后导出的 Prometheus 文本文件，例如 node-exporter 的 textfile 目录下的 nuist_bot.prom
+    "PROFILE": None,                # 性能剖析：None 关闭，"cprofile" 确定性剖析，"sample" 采样剖析 (也可用命令行 --profile)
+    "PROFILE_DIR": None,            # 剖析结果目录 (每轮一个子目录)，None 表示数据目录下的 profiles/
+    "PROFILE_INTERVAL_MS": 5        # 采样剖析的采样间隔 (毫秒)
 }
@@ -1,34 +1,78 @@
 import os
+import sys
+import json
 import logging
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, or_, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker, scoped_session
-from .models import Base, Bulletin, ProcessStatus
-from datetime import datetime
+from .models import Base, Bulletin, BulletinMetrics, ProcessStatus, ScanState
+from .write_queue import WriteQueue
+from datetime import datetime, timedelta
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
 
 # 获取模块级日志
 logger = logging.getLogger(__name__)
 
+# 视为“处理完”的状态，FAILED 或 PENDING 的可以重试
+_DONE_STATUSES = [ProcessStatus.SUCCESS, ProcessStatus.IGNORED]
+
+# SQLite 单条语句的参数个数有上限，IN 查询按块拆分
+_IN_CHUNK_SIZE = 500
+
+def _chunks(seq, size=_IN_CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
 class DatabaseManager:
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, mode=None):
         """
         初始化数据库连接
         :param db_path: 数据库文件路径 (默认为当前目录下的 history_v2.db)
+        :param mode: 存储模式，"default" 或 "wal" (默认读取 SYSTEM['DB_MODE'])
         """
         if not db_path:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
+            base_dir = config.SYSTEM.get("DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
             # 使用新文件名 history_v3.db 以免破坏旧数据
             db_path = f"sqlite:///{os.path.join(base_dir, 'history.db')}"
-        
-        self.engine = create_engine(db_path, echo=False) # echo=True 可打印 SQL 用于调试
+        if mode is None:
+            mode = config.SYSTEM.get("DB_MODE", "default")
+        self.mode = mode
+
+        if self.mode == "wal":
+            busy_timeout_ms = config.SYSTEM.get("DB_BUSY_TIMEOUT_MS", 5000)
+            self.engine = create_engine(
+                db_path, echo=False,
+                connect_args={"timeout": busy_timeout_ms / 1000, "check_same_thread": False}
+            )
+            event.listen(self.engine, "connect", _wal_pragmas(busy_timeout_ms))
+        else:
+            self.engine = create_engine(db_path, echo=False) # echo=True 可打印 SQL 用于调试
         
         # 自动创建表结构
         Base.metadata.create_all(self.engine)
+        _add_missing_columns(self.engine)
         
         # 创建线程安全的 Session 工厂
-        self.session_factory = sessionmaker(bind=self.engine)
+        # expire_on_commit=False：提交后返回给调用方的对象仍可读取字段
+        self.session_factory = sessionmaker(bind=self.engine, expire_on_commit=False)
         self.Session = scoped_session(self.session_factory)
+
+        # 注册时记下标题，状态更新的日志不必为了标题再读一次行；任务结束后移除
+        self._titles = {}
+
+        # WAL 模式下所有写操作交给单写线程组提交，读操作仍在各线程并发执行
+        self._writer = None
+        if self.mode == "wal":
+            self._writer = WriteQueue(
+                self.session_factory,
+                batch_size=config.SYSTEM.get("DB_GROUP_COMMIT_SIZE", 50),
+                max_delay=config.SYSTEM.get("DB_GROUP_COMMIT_DELAY_MS", 20) / 1000
+            )
         
-        logger.info(f"💾 [DB] 数据库连接已初始化: {db_path}")
+        logger.info(f"💾 [DB] 数据库连接已初始化 ({self.mode}): {db_path}")
 
     def get_session(self):
         """获取一个新的会话"""
@@ -36,8 +80,29 @@ class DatabaseManager:
 
     def close(self):
         """关闭连接池"""
+        if self._writer:
+            self._writer.stop()
+            self._writer = None
         self.Session.remove()
 
+    def _write(self, op, *args, **kwargs):
+        """
+        写操作统一入口：op(session, ...) 只负责修改，不负责提交
+        WAL 模式交给写线程合并提交，默认模式在当前线程独立提交
+        """
+        if self._writer:
+            return self._writer.submit(op, *args, **kwargs)
+        session = self.get_session()
+        try:
+            result = op(session, *args, **kwargs)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     # ==========================
     # 业务操作 API
     # ==========================
@@ -51,52 +116,249 @@ class DatabaseManager:
                 return False
             # 只有状态为 SUCCESS 或 IGNORED 才算“处理完”
             # FAILED 或 PENDING 的可以重试
-            return record.status in [ProcessStatus.SUCCESS, ProcessStatus.IGNORED]
+            return record.status in _DONE_STATUSES
+        finally:
+            session.close()
+
+    def filter_unprocessed(self, urls):
+        """
+        批量查重：一次 IN 查询找出尚未处理完成的 URL
+        :return: 未处理的 URL 列表 (去重，保持输入顺序)
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        if not unique_urls:
+            return []
+        session = self.get_session()
+        try:
+            done = set()
+            for chunk in _chunks(unique_urls):
+                rows = session.query(Bulletin.url).filter(
+                    Bulletin.url.in_(chunk),
+                    Bulletin.status.in_(_DONE_STATUSES)
+                ).all()
+                done.update(row.url for row in rows)
+            return [url for url in unique_urls if url not in done]
+        finally:
+            session.close()
+
+    def labeled_titles(self, exclude_keywords=()):
+        """
+        导出由 hunter 判定的历史标题，用于训练本地相关性分类器
+        本地分类器、白名单等规则给出的判定不参与训练，否则分类器会不断强化自己的误判
+        记录判定来源之前的旧数据 (verdict_source 为空) 同样导出，其中标题含 exclude_keywords 的
+        是白名单直接放行的，予以剔除 (长度初筛的判定无法从库中还原，保留)
+        :param exclude_keywords: 白名单关键词
+        :return: [(title, is_relevant), ...]，SUCCESS 为相关，IGNORED 为无关
+        """
+        session = self.get_session()
+        try:
+            rows = session.query(Bulletin.title, Bulletin.status, Bulletin.verdict_source).filter(
+                Bulletin.status.in_(_DONE_STATUSES),
+                or_(Bulletin.verdict_source == "hunter", Bulletin.verdict_source.is_(None)),
+                Bulletin.title.isnot(None)
+            ).all()
+            return [
+                (row.title, row.status == ProcessStatus.SUCCESS) for row in rows
+                if row.verdict_source or not any(k in row.title for k in exclude_keywords)
+            ]
+        finally:
+            session.close()
+
+    def discovery_times(self, days=90):
+        """最近 days 天内发现的公告时间 (created_at)，用于学习发布规律"""
+        since = datetime.now() - timedelta(days=days)
+        session = self.get_session()
+        try:
+            rows = session.query(Bulletin.created_at).filter(Bulletin.created_at >= since).all()
+            return [row.created_at for row in rows if row.created_at]
         finally:
             session.close()
 
+    def get_state(self, key):
+        """读取扫描状态，不存在时返回 None"""
+        session = self.get_session()
+        try:
+            row = session.get(ScanState, key)
+            return json.loads(row.value) if row else None
+        finally:
+            session.close()
+
+    def set_state(self, key, value):
+        """写入扫描状态 (JSON 可序列化的值)"""
+        try:
+            self._write(_set_state, key, json.dumps(value, ensure_ascii=False))
+        except Exception as e:
+            logger.error(f"    ❌ [DB] 保存扫描状态失败 ({key}): {e}")
+
     def register_task(self, url, title):
         """
         注册一个新任务 (如果不存在则创建 PENDING 记录)
         :return: Bulletin 对象
         """
-        session = self.get_session()
+        self._titles[url] = title
         try:
-            record = session.query(Bulletin).filter_by(url=url).first()
-            if not record:
-                record = Bulletin(url=url, title=title, status=ProcessStatus.PENDING)
-                session.add(record)
-                session.commit()
-                logger.info(f"    💾 [DB] 新增任务: {title[:15]}...")
-            return record
+            return self._write(_register_task, url, title)
         except Exception as e:
-            session.rollback()
             logger.error(f"    ❌ [DB] 注册任务失败: {e}")
             raise e
+
+    def register_tasks_bulk(self, items):
+        """
+        批量注册任务 (upsert)：不存在的 URL 插入 PENDING 记录，已存在的保持不变
+        :param items: [{'url': ..., 'title': ...}, ...]
+        :return: ({url: id}, 本次新插入的 URL 集合)，后者不含重新提交的 FAILED / PENDING 任务
+        """
+        rows = {}
+        for item in items:
+            rows.setdefault(item['url'], item.get('title'))
+        if not rows:
+            return {}, set()
+        self._titles.update(rows)
+
+        try:
+            inserted = self._write(_insert_missing, rows)
+        except Exception as e:
+            logger.error(f"    ❌ [DB] 批量注册任务失败: {e}")
+            raise e
+
+        session = self.get_session()
+        try:
+            id_map = {}
+            for chunk in _chunks(list(rows)):
+                for row in session.query(Bulletin.id, Bulletin.url).filter(Bulletin.url.in_(chunk)):
+                    id_map[row.url] = row.id
+            logger.info(f"    💾 [DB] 批量注册任务: {len(rows)} 条 (新增 {len(inserted)})")
+            return id_map, inserted
         finally:
             session.close()
 
-    def update_status(self, url, status: ProcessStatus, summary=None, error_msg=None):
-        """更新任务状态"""
-        session = self.get_session()
+    def update_status(self, url, status: ProcessStatus, summary=None, error_msg=None, task_id=None,
+                      verdict_source=None):
+        """
+        更新任务状态
+        直接执行一条 UPDATE (有 task_id 时按主键定位)，不再先读出整行
+        :param verdict_source: 价值判定来源，只在 SUCCESS / IGNORED 时传入
+        """
+        values = {Bulletin.status: status}
+        if summary:
+            values[Bulletin.summary] = summary
+        if verdict_source:
+            values[Bulletin.verdict_source] = verdict_source
+        if error_msg:
+            values[Bulletin.error_msg] = str(error_msg)
+            # 只有失败时才增加重试计数
+            if status == ProcessStatus.FAILED:
+                values[Bulletin.retry_count] = Bulletin.retry_count + 1
+
         try:
-            record = session.query(Bulletin).filter_by(url=url).first()
-            if record:
-                record.status = status
-                if summary:
-                    record.summary = summary
-                if error_msg:
-                    record.error_msg = str(error_msg)
-                    # 只有失败时才增加重试计数
-                    if status == ProcessStatus.FAILED:
-                        record.retry_count += 1
-                
-                session.commit()
-                logger.info(f"    💾 [DB] 状态更新 -> {status.value}: {record.title[:10]}...")
+            updated = self._write(_update_status, url, task_id, values)
+            if status in (ProcessStatus.PENDING, ProcessStatus.PROCESSING):
+                title = self._titles.get(url)
+            else:
+                title = self._titles.pop(url, None)
+            if updated:
+                label = f"{title[:10]}..." if title else url
+                logger.info(f"    💾 [DB] 状态更新 -> {status.value}: {label}")
             else:
                 logger.warning(f"    ⚠️ [DB] 尝试更新不存在的记录: {url}")
         except Exception as e:
-            session.rollback()
             logger.error(f"    ❌ [DB] 更新状态失败: {e}")
-        finally:
-            session.close()
+
+    def save_metrics(self, row):
+        """
+        写入一条公告的处理度量 (bulletin_metrics)
+        度量只用于观测，写入失败不影响任务本身
+        :param row: 列名 -> 值
+        """
+        try:
+            self._write(_insert_metrics, row)
+        except Exception as e:
+            logger.warning(f"    ⚠️ [DB] 保存处理度量失败: {e}")
+
+
+# ==========================
+# 写操作 (在传入的会话中执行，由 DatabaseManager._write 负责提交)
+# ==========================
+
+def _register_task(session, url, title):
+    record = session.query(Bulletin).filter_by(url=url).first()
+    if not record:
+        record = Bulletin(url=url, title=title, status=ProcessStatus.PENDING)
+        session.add(record)
+        session.flush()
+        logger.info(f"    💾 [DB] 新增任务: {title[:15]}...")
+    return record
+
+
+def _insert_missing(session, rows):
+    """插入尚不存在的 URL，返回新插入的 URL 集合"""
+    existing = set()
+    for chunk in _chunks(list(rows)):
+        existing.update(r.url for r in session.query(Bulletin.url).filter(Bulletin.url.in_(chunk)))
+    now = datetime.now()
+    missing = [
+        {"url": url, "title": title, "status": ProcessStatus.PENDING,
+         "retry_count": 0, "created_at": now, "updated_at": now}
+        for url, title in rows.items() if url not in existing
+    ]
+    if not missing:
+        return set()
+    if session.bind.dialect.name == "sqlite":
+        # 默认模式下工作线程可能同时 register_task 同一 URL，冲突时忽略
+        # 基于 Core 表构造语句：ORM 层的 insert 在 SQLAlchemy 2.x 下返回的结果没有 rowcount
+        stmt = sqlite_insert(Bulletin.__table__).on_conflict_do_nothing(index_elements=['url'])
+        session.execute(stmt, missing)
+    else:
+        session.execute(Bulletin.__table__.insert(), missing)
+    return {v["url"] for v in missing}
+
+
+def _set_state(session, key, value):
+    row = session.get(ScanState, key)
+    if row:
+        row.value = value
+    else:
+        session.add(ScanState(key=key, value=value))
+
+
+def _insert_metrics(session, row):
+    session.add(BulletinMetrics(**row))
+
+
+def _update_status(session, url, task_id, values):
+    if task_id is not None:
+        query = session.query(Bulletin).filter(Bulletin.id == task_id)
+    else:
+        query = session.query(Bulletin).filter(Bulletin.url == url)
+    return query.update(values, synchronize_session=False)
+
+
+# create_all 不会给已有的表加列，旧库在初始化时补上：表名 -> [(列名, 列定义), ...]
+_ADDED_COLUMNS = {
+    "bulletins": [("verdict_source", "VARCHAR(20)")],
+}
+
+
+def _add_missing_columns(engine):
+    inspector = inspect(engine)
+    for table, columns in _ADDED_COLUMNS.items():
+        existing = {col["name"] for col in inspector.get_columns(table)}
+        for name, ddl in columns:
+            if name not in existing:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                logger.info(f"💾 [DB] 已为旧表 {table} 补充列: {name}")
+
+
+def _wal_pragmas(busy_timeout_ms):
+    """WAL 模式下每个新连接执行的 PRAGMA"""
+    def on_connect(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")      # WAL 下 NORMAL 已能保证崩溃一致性
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-20000")       # 约 20MB 页缓存
+        cursor.execute("PRAGMA wal_autocheckpoint=1000")
+        cursor.close()
+    return on_connect
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, Enum
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Enum
 from sqlalchemy.orm import declarative_base
 import enum
 from datetime import datetime
@@ -33,6 +33,8 @@ class Bulletin(Base):
     status = Column(Enum(ProcessStatus), default=ProcessStatus.PENDING, index=True)
     retry_count = Column(Integer, default=0)    # 重试次数
     error_msg = Column(Text, nullable=True)     # 错误日志
+    # 价值判定来源 (hunter / local / whitelist / length / fallback)，本地分类器只用 hunter 的判定训练
+    verdict_source = Column(String(20), nullable=True)
     
     # 时间戳
     created_at = Column(DateTime, default=datetime.now)            # 首次发现时间
@@ -40,3 +42,47 @@ class Bulletin(Base):
 
     def __repr__(self):
         return f"<Bulletin(id={self.id}, title='{self.title[:10]}...', status={self.status})>"
+
+
+class ScanState(Base):
+    """
+    扫描状态 (键值对，值为 JSON)
+    对应数据库表: scan_state，例如列表水位线 watermark:<来源>
+    """
+    __tablename__ = 'scan_state'
+
+    key = Column(String(200), primary_key=True)
+    value = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class BulletinMetrics(Base):
+    """
+    单条公告的处理度量 (每次处理一行，重试会产生多行)
+    对应数据库表: bulletin_metrics，各阶段耗时单位为毫秒，未经过的阶段为空
+    """
+    __tablename__ = 'bulletin_metrics'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bulletin_id = Column(Integer, index=True, nullable=True)   # 对应 bulletins.id
+    outcome = Column(String(20), index=True)                   # success / ignored / failed / error
+
+    # 各阶段耗时 (毫秒)
+    total_ms = Column(Float)        # 流水线模式下含阶段间排队时间
+    claim_ms = Column(Float)        # 查重、注册与错峰等待
+    fetch_ms = Column(Float)
+    extract_ms = Column(Float)
+    relevance_ms = Column(Float)
+    summarize_ms = Column(Float)
+    notify_ms = Column(Float)
+
+    # 字节数与 token 数
+    html_bytes = Column(Integer, default=0)
+    attachments = Column(Integer, default=0)
+    attachment_bytes = Column(Integer, default=0)
+    email_bytes = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+
+    detail = Column(Text, nullable=True)   # 子阶段耗时与其余计数 (JSON)
+    created_at = Column(DateTime, default=datetime.now, index=True)
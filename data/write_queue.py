@@ -0,0 +1,139 @@
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+# 获取模块级日志
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    单写线程 + 组提交
+    所有写操作排队交给同一个线程执行，短时间窗口内到达的写操作合并为一次 COMMIT，
+    避免多线程争抢 SQLite 写锁 (database is locked) 以及每次提交都触发 fsync。
+    """
+
+    def __init__(self, session_factory, batch_size=50, max_delay=0.02):
+        self.session_factory = session_factory
+        self.batch_size = max(1, int(batch_size))
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._commits = 0
+        self._writes = 0
+        self._current = []        # 写线程正在处理的批次
+        self._closed = None       # 写线程退出原因；设置后不再接受新的写操作
+        self._submit_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="DBWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, op, *args, **kwargs):
+        """
+        提交写操作 op(session, *args, **kwargs) 并阻塞等待其所在批次提交完成
+        对调用方而言与同步写入语义一致
+        """
+        future = Future()
+        with self._submit_lock:
+            if self._closed is not None:
+                raise self._closed
+            self._queue.put((op, args, kwargs, future))
+        return future.result()
+
+    # ==========================
+    # 🔧 写线程内部逻辑
+    # ==========================
+
+    def _collect(self):
+        """取出一批写操作：第一条阻塞等待，之后在 max_delay 窗口内尽量多取"""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        self._current = batch
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _apply(self, batch):
+        session = self.session_factory()
+        try:
+            results = [op(session, *args, **kwargs) for op, args, kwargs, _ in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(batch) == 1:
+                batch[0][3].set_exception(e)
+                return
+            # 批次中有失败的写操作：拆开逐条重试，避免连累同批次的其他写入
+            session.close()
+            for job in batch:
+                self._apply([job])
+            return
+        finally:
+            session.close()
+
+        self._commits += 1
+        self._writes += len(batch)
+        for (_, _, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _run(self):
+        """
+        写线程入口：无论正常停止还是因异常 (含 BaseException) 退出，
+        都把尚未完成的写操作以退出原因失败掉，调用方不会永远阻塞在 Future 上
+        """
+        try:
+            self._loop()
+            error = RuntimeError("写线程已停止")
+        except BaseException as e:
+            logger.error(f"    💥 [DB] 写线程异常退出: {e!r}")
+            error = e
+        with self._submit_lock:
+            self._closed = error
+        for job in self._current:
+            if not job[3].done():
+                job[3].set_exception(error)
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP and not job[3].done():
+                job[3].set_exception(error)
+
+    def _loop(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._apply(batch)
+        # 处理停止信号之后仍在排队的写操作
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP:
+                self._current = [job]
+                self._apply(self._current)
+
+    def stop(self):
+        with self._submit_lock:
+            if self._closed is None:
+                self._queue.put(_STOP)
+        self._thread.join()
+        if self._commits:
+            logger.info(f"💾 [DB] 写线程退出: {self._writes} 次写入合并为 {self._commits} 次提交")
@@ -1,8 +1,10 @@
-import time
 import urllib3
 import os
+import time
+import signal
 import logging
-import random
+import argparse
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.logger import setup_logger
 
@@ -10,14 +12,14 @@ from utils.logger import setup_logger
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 from auth.login_manager import LoginManager
-from spider.url_finder import UrlFinder
-from spider.fetcher import fetch_content
-from ai_brain.summarizer import BulletinSummarizer
-from notify.sender import Notifier
+from spider.url_finder import SourceScanner
 from data.db_manager import DatabaseManager
-from data.models import ProcessStatus
+from utils import metrics, profiling
 import config
 
+# 抓取 / 解析 / AI / 推送相关模块 (PyMuPDF、pandas、openai、markdown 等) 导入较慢，
+# 而多数轮次扫描后没有新公告，这些模块在确实有任务要处理时才导入
+
 # 获取日志记录器
 logger = logging.getLogger(__name__)
 
@@ -25,129 +27,244 @@ def process_single_task(item, db, ai, notifier):
     """
     工作线程：处理单条公告的全生命周期
     """
-    url = item['url']
-    title = item['title']
-    
-    # 1. 再次查重 (防止并发时的重复提交，虽然概率很低)
-    if db.is_processed(url):
-        logger.info(f"    ⏭️ [Worker] 跳过已处理: {title[:10]}...")
-        return
+    from scheduler import stages
 
-    # 2. 注册任务
-    db.register_task(url, title)
-    logger.info(f"⚡ [Worker] 开始处理: {title[:15]}...")
+    task = stages.new_task(item)
 
-    # 3. 随机等待 (错峰请求，防止并发触发防火墙)
-    delay_min = config.SYSTEM.get("WORKER_DELAY_MIN", 0.5)
-    delay_max = config.SYSTEM.get("WORKER_DELAY_MAX", 2.0)
-    time.sleep(random.uniform(delay_min, delay_max))
+    with profiling.section(stages.profile_label(task)):
+        try:
+            # 1. 查重 + 注册任务 + 错峰等待
+            if not stages.run_stage("claim", stages.claim, task, db, ai, notifier):
+                return
 
-    try:
-        # 4. 抓取内容
-        content = fetch_content(url)
-        if not content:
-            db.update_status(url, ProcessStatus.FAILED, error_msg="抓取内容为空")
-            return
-
-        # 5. AI 分析
-        logger.info(f"    🧠 [Worker-AI] 分析中: {title[:10]}...")
-        summary = ai.summarize(content, title=title)
-
-        if summary == "IGNORE":
-            logger.info(f"    🗑️ [Worker] 判定无价值: {title[:10]}...")
-            db.update_status(url, ProcessStatus.IGNORED)
-            return
-
-        # 6. 推送通知
-        logger.info(f"    🔔 [Worker] 准备推送: {title[:10]}...")
-        files_to_send = content.get('files', [])
-        is_success = notifier.send(title, summary, attachments=files_to_send)
-
-        if is_success:
-            db.update_status(url, ProcessStatus.SUCCESS, summary=summary)
-            logger.info(f"    ✅ [Worker] 任务完成: {title[:10]}...")
-        else:
-            logger.warning(f"    ⚠️ [Worker] 推送失败: {title[:10]}...")
-            db.update_status(url, ProcessStatus.FAILED, error_msg="推送通知失败")
+            try:
+                # 2. 抓取 → 解析 → 过滤 → 总结 → 推送 (逐阶段计时)
+                for name, handler in stages.PIPELINE:
+                    if not stages.run_stage(name, handler, task, db, ai, notifier):
+                        return
+            except Exception as e:
+                stages.fail(task, db, e)
+        finally:
+            stages.finish(task, db)
 
-    except Exception as e:
-        logger.error(f"    ❌ [Worker] 任务异常 ({title[:10]}...): {e}")
-        db.update_status(url, ProcessStatus.FAILED, error_msg=f"Worker异常: {str(e)}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="NUIST 公告推送系统")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="使用分阶段流水线调度 (等同于 SYSTEM['PIPELINE_MODE'] = True)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="常驻运行：保持会话、AI 客户端与数据库连接，按自适应间隔轮询")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="输出启动阶段的模块导入耗时排行 (python -X importtime) 后退出")
+    parser.add_argument("--target", choices=["nuist", "local"], default="nuist",
+                        help="local：启动本地替身服务 (门户、模型、SMTP / Webhook) 并让整条流水线指向它们")
+    parser.add_argument("--profile", choices=["cprofile", "sample"],
+                        help="剖析每次列表扫描与每条公告的处理 (等同于 SYSTEM['PROFILE'])，结果按轮写入 PROFILE_DIR")
+    return parser.parse_args()
 
-def main():
-    # 0. 初始化日志系统
-    setup_logger()
-    
-    logging.info("🚀 NUIST 公告推送系统启动 (V2.1 Concurrency)...")
 
-    # 1. 模块初始化 (主线程持有)
-    db = DatabaseManager()
-    login_mgr = LoginManager(username=config.SCHOOL["USERNAME"], password=config.SCHOOL["PASSWORD"])
-    finder = UrlFinder()
-    
-    # 这些对象是线程安全的或无状态的，可以共享
-    ai = BulletinSummarizer()
-    notifier = Notifier()
+class Services:
+    """AI 与推送服务：首次有任务时才创建 (导入较慢)，守护模式下跨轮复用"""
+
+    def __init__(self):
+        self.ai = None
+        self.notifier = None
+
+    def get(self):
+        if self.ai is None:
+            from ai_brain.summarizer import BulletinSummarizer
+            from notify.sender import Notifier
 
-    # 2. 登录检查
+            # 这些对象是线程安全的或无状态的，可以共享
+            self.ai = BulletinSummarizer()
+            self.notifier = Notifier()
+        return self.ai, self.notifier
+
+    def close(self):
+        if self.ai is not None:
+            self.ai.close()
+
+
+def run_cycle(db, login_mgr, finder, services):
+    """
+    执行一轮：登录检查 → 扫描 → 查重 → 处理
+    结束时把各阶段耗时的累计直方图写入 SYSTEM["METRICS_TEXTFILE"] (Prometheus 文本格式)，
+    开启剖析时写出本轮的剖析结果
+    :return: (本轮提交处理的任务数, 其中首次发现的任务数)，重新提交的失败任务只计入前者
+    """
+    collect = metrics.enabled()
+    if collect:
+        # 累计值须在工作线程开始记录之前从数据库恢复
+        metrics.REGISTRY.load(db)
+    profiling.start_run()
+    start = time.monotonic()
+    submitted = 0
+    try:
+        submitted, discovered = _run_cycle(db, login_mgr, finder, services)
+        return submitted, discovered
+    finally:
+        # 列表快照在公告注册并处理之后才保存，本轮中断或失败的公告下一轮仍会被扫描到
+        finder.commit()
+        if collect:
+            metrics.REGISTRY.end_cycle(db, time.monotonic() - start, submitted,
+                                       path=config.SYSTEM.get("METRICS_TEXTFILE"))
+        profiling.stop_run()
+
+
+def _run_cycle(db, login_mgr, finder, services):
+    # 2. 登录检查 (Cookie 即将过期时主动刷新)
     logging.info("🔐 检查登录状态...")
-    login_mgr.get_cookies()
+    if login_mgr.refresh_if_stale(margin=config.SYSTEM.get("COOKIE_REFRESH_MARGIN", 600),
+                                  max_age=config.SYSTEM.get("COOKIE_MAX_AGE", 4 * 3600)):
+        from spider.browser_pool import reload_shared_pool
+        reload_shared_pool()
 
     if not os.path.exists(login_mgr.cookie_file):
         logging.error("❌ 登录失败，退出。")
-        return
+        return 0, 0
 
     # 3. 扫描公告 (生产者)
-    logging.info(f"📡 扫描首页: {config.SCHOOL['VPN_URL']}")
-    new_links = finder.find_new_urls(config.SCHOOL['VPN_URL'])
+    logging.info(f"📡 扫描公告列表 ({len(finder.finders)} 个来源)")
+    seen_mtime = login_mgr.cookie_mtime()
+    new_links = finder.find_new_urls()
 
     if new_links is None:
         logging.warning("🔄 触发自动重连机制...")
-        login_mgr.get_cookies()
-        logging.info(f"📡 [重试] 再次扫描首页...")
-        new_links = finder.find_new_urls(config.SCHOOL['VPN_URL'])
+        if not login_mgr.relogin(seen_mtime):
+            logging.error("❌ 重新登录失败，本轮结束。")
+            return 0, 0
+        from spider.browser_pool import reload_shared_pool
+        reload_shared_pool()
+        logging.info(f"📡 [重试] 再次扫描公告列表...")
+        new_links = finder.find_new_urls()
 
     if not new_links:
         logging.info("⚠️ 未发现新公告链接。")
-        db.close()
-        return
+        return 0, 0
 
     # 4. 过滤已处理任务
-    # 只将数据库中未标记为 SUCCESS/IGNORED 的任务提交给线程池
+    # 只将数据库中未标记为 SUCCESS/IGNORED 的任务提交给线程池 (一次批量查询)
+    pending_urls = set(db.filter_unprocessed([item['url'] for item in new_links]))
     tasks_to_run = []
     for item in new_links:
-        if not db.is_processed(item['url']):
+        if item['url'] in pending_urls:
+            pending_urls.discard(item['url'])
             tasks_to_run.append(item)
         else:
             logging.info(f"    ⏭️ [已读] {item['title'][:15]}...")
 
     if not tasks_to_run:
         logging.info("✅ 所有公告均已处理。")
-        db.close()
-        return
+        return 0, 0
 
-    # 5. 启动线程池 (消费者)
-    # 读取配置中的并发数，默认为 2
-    max_workers = config.SYSTEM.get("MAX_WORKERS", 2)
-    logging.info(f"📋 待处理任务数: {len(tasks_to_run)} (并发数: {max_workers})")
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = []
-        for task in tasks_to_run:
-            # 提交任务
-            future = executor.submit(process_single_task, task, db, ai, notifier)
-            futures.append(future)
-        
-        # 等待所有任务完成
-        for future in as_completed(futures):
-            try:
-                future.result() # 这里会抛出 worker 内部未捕获的异常
-            except Exception as e:
-                logger.error(f"💥 线程池异常: {e}")
+    # 批量注册，工作线程后续按主键更新状态
+    task_ids, new_urls = db.register_tasks_bulk(tasks_to_run)
+    for item in tasks_to_run:
+        item['id'] = task_ids.get(item['url'])
+
+    # 5. 启动消费者 (到这里才导入抓取、解析与 AI 相关模块)
+    ai, notifier = services.get()
+
+    if config.SYSTEM.get("PIPELINE_MODE", False):
+        logging.info(f"📋 待处理任务数: {len(tasks_to_run)} (分阶段流水线)")
+        from scheduler.pipeline import StagedPipeline
+        StagedPipeline(db, ai, notifier).run(tasks_to_run)
+    else:
+        # 线程池模式：读取配置中的并发数，默认为 2
+        max_workers = config.SYSTEM.get("MAX_WORKERS", 2)
+        logging.info(f"📋 待处理任务数: {len(tasks_to_run)} (并发数: {max_workers})")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for task in tasks_to_run:
+                # 提交任务
+                future = executor.submit(process_single_task, task, db, ai, notifier)
+                futures.append(future)
+            
+            # 等待所有任务完成
+            for future in as_completed(futures):
+                try:
+                    future.result() # 这里会抛出 worker 内部未捕获的异常
+                except Exception as e:
+                    logger.error(f"💥 线程池异常: {e}")
 
     logging.info("✅ 所有并发任务执行完毕！")
-    db.close()
+    ai.log_cache_stats()
+    return len(tasks_to_run), len(new_urls)
+
+
+def run_daemon(db, login_mgr, finder, services):
+    """常驻循环：收到 SIGINT / SIGTERM 后跑完当前一轮再退出 (再次发送信号则立即退出)"""
+    from scheduler.polling import AdaptivePoller
+
+    stop = threading.Event()
+
+    def _handle_signal(signum, frame):
+        logging.info("🛑 收到退出信号，当前一轮结束后退出 (再次发送将强制退出)...")
+        stop.set()
+        signal.signal(signum, signal.SIG_DFL)
+
+    signal.signal(signal.SIGINT, _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+
+    poller = AdaptivePoller(db)
+    while not stop.is_set():
+        found = 0
+        try:
+            # 只按首次发现的公告调整间隔，反复失败重试的旧公告不会把轮询一直钉在最短间隔
+            _, found = run_cycle(db, login_mgr, finder, services)
+        except Exception as e:
+            logger.error(f"💥 本轮执行异常: {e}")
+        if stop.is_set():
+            break
+        interval = poller.next_interval(found_new=found)
+        logging.info(f"💤 下一轮将在 {interval / 60:.1f} 分钟后开始")
+        stop.wait(interval)
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
+    if getattr(args, "profile_startup", False):
+        from utils.startup_profile import report
+        report("main")
+        return
+    if args.pipeline:
+        config.SYSTEM["PIPELINE_MODE"] = True
+    if getattr(args, "profile", None):
+        config.SYSTEM["PROFILE"] = args.profile
+
+    # 0. 初始化日志系统
+    setup_logger()
+    
+    logging.info("🚀 NUIST 公告推送系统启动 (V2.1 Concurrency)...")
+
+    # 本地替身服务须在各模块读取配置之前启动并生效
+    stack = None
+    if getattr(args, "target", "nuist") == "local":
+        from sandbox.stack import LocalStack
+        stack = LocalStack().start().apply()
+
+    # 1. 模块初始化 (主线程持有)
+    db = DatabaseManager()
+    login_mgr = LoginManager(username=config.SCHOOL["USERNAME"], password=config.SCHOOL["PASSWORD"])
+    finder = SourceScanner(db=db, use_pool=getattr(args, "daemon", False))
+    services = Services()
+
+    try:
+        if getattr(args, "daemon", False):
+            logging.info("🔁 守护模式：保持会话常驻，按自适应间隔轮询")
+            run_daemon(db, login_mgr, finder, services)
+        else:
+            run_cycle(db, login_mgr, finder, services)
+    finally:
+        from spider.browser_pool import shutdown_shared_pool
+        services.close()
+        shutdown_shared_pool()
+        db.close()
+        if stack:
+            stack.log_summary()
+            stack.stop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
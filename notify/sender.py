@@ -11,11 +11,11 @@ from email.header import Header
 from email.utils import formataddr
 import logging
 import sys
-import markdown
 import re
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from utils import metrics
 
 # 初始化模块级日志
 logger = logging.getLogger(__name__)
@@ -31,6 +31,7 @@ class Notifier:
         self.smtp_port = cfg["EMAIL"]["SMTP_PORT"]
         self.sender_email = cfg["EMAIL"]["SENDER"]
         self.email_password = cfg["EMAIL"]["PASSWORD"]
+        self.smtp_ssl = cfg["EMAIL"].get("SSL", True)
 
         # 智能处理多收件人
         raw_receiver = cfg["EMAIL"]["RECEIVER"]
@@ -42,6 +43,7 @@ class Notifier:
         # 2. Qmsg
         self.enable_qmsg = cfg["QMSG"]["ENABLE"]
         self.qmsg_key = cfg["QMSG"]["KEY"]
+        self.qmsg_api = cfg["QMSG"].get("API", "https://qmsg.zendee.cn/send/")
 
         # 3. Webhook
         self.enable_webhook = cfg["WEBHOOK"]["ENABLE"]
@@ -56,6 +58,7 @@ class Notifier:
         if not text: return ""
         
         # 扩展支持: extra (表格/脚注等), nl2br (换行转<br>)
+        import markdown  # 仅在真正推送邮件时导入
         html = markdown.markdown(text, extensions=['extra', 'nl2br'])
         
         # --- 🎨 样式注入 (Mail Client Compatible) ---
@@ -144,9 +147,14 @@ class Notifier:
     def _send_via_smtp(self, message, title):
         """原子任务：执行 SMTP 发送"""
         try:
-            server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port)
+            raw = message.as_string()
+            task_metrics = metrics.current()
+            if task_metrics:
+                task_metrics.add("email_bytes", len(raw.encode("utf-8")))
+            smtp_cls = smtplib.SMTP_SSL if self.smtp_ssl else smtplib.SMTP
+            server = smtp_cls(self.smtp_server, self.smtp_port)
             server.login(self.sender_email, self.email_password)
-            server.sendmail(self.sender_email, self.receiver_emails, message.as_string())
+            server.sendmail(self.sender_email, self.receiver_emails, raw)
             server.quit()
             logger.info(f"    📧 [邮件] 群发成功 ({len(self.receiver_emails)}人): {title[:10]}...")
         except Exception as e:
@@ -171,9 +179,10 @@ class Notifier:
         try:
             txt_content = content.replace("**", "").replace("##", "").replace("📌", "[!]").replace("⏰", "[截止]")
             msg_text = f"【校内新公告】\n{title}\n\n{txt_content}\n\n(详细内容请查看邮件)"
-            url = f"https://qmsg.zendee.cn/send/{self.qmsg_key}"
+            url = f"{self.qmsg_api}{self.qmsg_key}"
             data = {"msg": msg_text}
-            requests.post(url, data=data, timeout=10)
+            with metrics.current().span("notify.qmsg"):
+                requests.post(url, data=data, timeout=10)
             logger.info("    🐧 [Qmsg] QQ消息推送成功！")
         except Exception as e:
             logger.warning(f"    ⚠️ [Qmsg] 发送失败: {e}")
@@ -188,7 +197,8 @@ class Notifier:
                     "text": f"### {title}\n\n{content}\n\n> 🤖 NUIST Bot"
                 }
             }
-            requests.post(self.webhook_url, json=data)
+            with metrics.current().span("notify.webhook"):
+                requests.post(self.webhook_url, json=data)
             logger.info("    🤖 [Webhook] 推送成功！")
         except Exception as e:
             logger.warning(f"    ⚠️ [Webhook] 发送失败: {e}")
@@ -197,7 +207,8 @@ class Notifier:
         core_success = True
         if self.enable_email:
             try:
-                self.send_email(title, summary, attachments)
+                with metrics.current().span("notify.email"):
+                    self.send_email(title, summary, attachments)
             except Exception:
                 core_success = False
         self.send_qmsg(title, summary)
@@ -0,0 +1,166 @@
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+# 与 ai_brain.summarizer 中的提示词对应
+BATCH_COUNT_RE = re.compile(r"下面共有\s*(\d+)\s*条")
+BATCH_ITEM_RE = re.compile(r"【第\s*(\d+)\s*条】")
+
+DEFAULT_PROFILE = {
+    "latency": 0.8,        # 中位延迟 (秒)
+    "jitter": 0.3,         # 对数正态分布的 sigma，0 表示固定延迟
+    "error_rate": 0.0,     # 返回 HTTP 500 的比例
+    "slow_rate": 0.0,      # 长尾请求的比例
+    "slow_latency": 10.0,  # 长尾请求的延迟 (秒)
+}
+
+
+class MockLLM:
+    """
+    OpenAI 兼容接口替身：POST /{provider}/v1/chat/completions
+    每个服务商 (deepseek / aliyun / zhipu / silicon) 可单独配置延迟分布与错误注入，
+    用来观察路由器的对冲、熔断与切换在慢服务商 / 故障服务商下的表现。
+    回答按提示词类型生成：hunter 单条 / 批量判定返回 YES / NO，其余返回 Markdown 摘要
+    """
+
+    def __init__(self, profiles=None, relevant_ratio=1.0, host="127.0.0.1", port=0, seed=0):
+        """
+        :param profiles: {provider: {...}}，未列出的字段取 DEFAULT_PROFILE；键 "*" 作用于所有服务商
+        :param relevant_ratio: hunter 判定为有价值的比例 (按内容哈希决定，同一内容结论稳定)
+        """
+        self.profiles = profiles or {}
+        self.relevant_ratio = relevant_ratio
+        self.rng = random.Random(seed)
+        self.stats = {}           # provider -> {"calls", "errors", "slow"}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_url(self, provider):
+        """填入 AI_CONFIG["BASE_URLS"] 的地址"""
+        return f"{self.url}/{provider}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sandbox-llm", daemon=True)
+        self._thread.start()
+        logger.info(f"🧠 [替身] 模型服务已启动: {self.url}")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ==========================
+    # 延迟与错误注入
+    # ==========================
+
+    def profile(self, provider):
+        return {**DEFAULT_PROFILE, **self.profiles.get("*", {}), **self.profiles.get(provider, {})}
+
+    def _plan(self, provider):
+        """决定本次请求的延迟与是否失败：(延迟秒数, 是否失败)"""
+        profile = self.profile(provider)
+        with self._lock:
+            stat = self.stats.setdefault(provider, {"calls": 0, "errors": 0, "slow": 0})
+            stat["calls"] += 1
+            if self.rng.random() < profile["error_rate"]:
+                stat["errors"] += 1
+                return self.rng.uniform(0, profile["latency"]), True
+            if self.rng.random() < profile["slow_rate"]:
+                stat["slow"] += 1
+                return profile["slow_latency"], False
+            delay = profile["latency"]
+            if profile["jitter"]:
+                delay *= self.rng.lognormvariate(0, profile["jitter"])
+            return delay, False
+
+    # ==========================
+    # 回答生成
+    # ==========================
+
+    def _relevant(self, text):
+        digest = hashlib.md5(text.encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2 ** 32 < self.relevant_ratio
+
+    def answer(self, system_prompt, user_content):
+        match = BATCH_COUNT_RE.search(system_prompt)
+        if match:
+            parts = BATCH_ITEM_RE.split(user_content)
+            # split 结果：[前缀, 编号, 内容, 编号, 内容, ...]
+            items = dict(zip(parts[1::2], parts[2::2]))
+            return "\n".join(f"{idx}: {'YES' if self._relevant(items.get(str(idx), '')) else 'NO'}"
+                             for idx in range(1, int(match.group(1)) + 1))
+        if "YES 或 NO" in system_prompt:
+            return "YES" if self._relevant(user_content) else "NO"
+        first_line = next((line.strip() for line in user_content.splitlines() if line.strip()), "公告")
+        return (f"📌 **标题**：{first_line[:40]}\n\n"
+                f"🎯 **核心划重点**：\n- 本地替身服务生成的摘要，共读取 {len(user_content)} 字\n\n"
+                f"📞 **联系方式**：\n- 无\n\n📎 **附件/链接**：\n- 无\n\n⏰ **截止时间**：无")
+
+    # ==========================
+    # 请求处理
+    # ==========================
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):
+                logger.debug(f"    [替身模型] {fmt % args}")
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                parts = self.path.strip("/").split("/")
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if len(parts) < 2 or parts[-2:] != ["chat", "completions"]:
+                    return self._send_json(404, {"error": {"message": "not found"}})
+                provider = parts[0]
+
+                delay, failed = mock._plan(provider)
+                time.sleep(delay)
+                if failed:
+                    return self._send_json(500, {"error": {"message": "injected failure", "type": "server_error"}})
+
+                messages = request.get("messages", [])
+                system_prompt = next((m["content"] for m in messages if m.get("role") == "system"), "")
+                user_content = next((m["content"] for m in messages if m.get("role") == "user"), "")
+                if not isinstance(user_content, str):
+                    # 视觉请求的 content 是图文列表，只取文字部分
+                    user_content = " ".join(p.get("text", "") for p in user_content if isinstance(p, dict))
+                content = mock.answer(system_prompt, user_content)
+                self._send_json(200, {
+                    "id": f"chatcmpl-sandbox-{time.monotonic_ns()}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "sandbox"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": (len(system_prompt) + len(user_content)) // 2,
+                              "completion_tokens": len(content) // 2,
+                              "total_tokens": (len(system_prompt) + len(user_content) + len(content)) // 2},
+                })
+
+        return Handler
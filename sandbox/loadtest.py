@@ -0,0 +1,170 @@
+"""
+本地压测：在替身服务上跑完整流水线 (登录 → 扫描 → 抓取 → 解析附件 → AI 判定与总结 → 推送)，
+逐个并发数测量吞吐 (条/分钟) 与单条公告的端到端延迟分位数
+
+每个并发数一轮：门户发布 N 条新公告 → main.run_cycle → 统计本轮推送
+- 等待延迟：本轮开始 → 该公告最后一个推送渠道收到消息 (含排队时间，即用户感知的延迟)
+- 处理延迟：门户首次返回该公告详情页 → 最后一个推送渠道收到消息
+所有轮次共用同一套替身服务与运行数据目录 (模型客户端按服务商缓存了接口地址)，
+正式计时前先跑一轮预热 (首次登录、导入解析库、建立模型连接)
+
+用法 (项目根目录，需要已安装 Playwright 的 Chromium)：
+    python -m sandbox.loadtest --bulletins 40 --workers 1 2 4 8
+    python -m sandbox.loadtest --llm-latency 2 --llm-error-rate 0.1 --pipeline --output load.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import platform
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from sandbox.stack import LocalStack
+
+
+def _percentile(samples, pct):
+    """最近秩法分位数，无样本时返回 None"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return round(ordered[rank - 1], 3)
+
+
+def _latency_stats(samples):
+    stats = {f"p{pct}": _percentile(samples, pct) for pct in (50, 90, 99)}
+    stats["max"] = round(max(samples), 3) if samples else None
+    return stats
+
+
+def configure(args, stack):
+    """压测专用配置：去掉错峰等待，放开单轮扫描上限，使 N 条新公告一轮内全部处理"""
+    stack.apply()
+    config.SYSTEM["WORKER_DELAY_MIN"] = args.worker_delay
+    config.SYSTEM["WORKER_DELAY_MAX"] = args.worker_delay
+    config.SYSTEM["PIPELINE_MODE"] = args.pipeline
+    config.SPIDER["LIST_MAX_ITEMS"] = args.bulletins + args.page_size
+    config.SPIDER["LIST_MAX_PAGES"] = args.bulletins // args.page_size + 2
+    # 每轮都是全新公告，缓存只会增加变量
+    config.AI_CONFIG["LLM_CACHE"] = False
+
+
+def run_round(stack, cycle, count):
+    """发布 count 条新公告并执行一轮，返回本轮统计"""
+    published = stack.portal.publish(count)
+    titles = {b["title"]: b["id"] for b in published}
+    start = time.monotonic()
+    submitted = cycle()
+    elapsed = time.monotonic() - start
+
+    arrivals = stack.deliveries.arrivals()
+    waits, services = [], []
+    for title, bulletin_id in titles.items():
+        if title not in arrivals:
+            continue
+        waits.append(arrivals[title] - start)
+        fetched = stack.portal.first_fetch.get(bulletin_id)
+        if fetched is not None:
+            services.append(arrivals[title] - fetched)
+    return {
+        "published": count,
+        "submitted": submitted,
+        "delivered": len(waits),
+        "elapsed_s": round(elapsed, 3),
+        "bulletins_per_min": round(submitted / elapsed * 60, 2) if elapsed else None,
+        "delivered_per_min": round(len(waits) / elapsed * 60, 2) if elapsed else None,
+        "wait_latency_s": _latency_stats(waits),
+        "service_latency_s": _latency_stats(services),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在本地替身服务上测量吞吐与尾延迟")
+    parser.add_argument("--bulletins", type=int, default=40, help="每轮新发布的公告数")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="依次测量的 MAX_WORKERS")
+    parser.add_argument("--page-size", type=int, default=20, help="门户列表每页条数")
+    parser.add_argument("--attachments", type=int, default=1, help="每条公告的附件数 (0~4)")
+    parser.add_argument("--portal-latency", type=float, default=0.05, help="门户每个请求的额外延迟 (秒)")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="模型中位延迟 (秒)")
+    parser.add_argument("--llm-jitter", type=float, default=0.3, help="模型延迟的对数正态 sigma")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="模型返回 500 的比例")
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="模型长尾请求的比例")
+    parser.add_argument("--llm-slow-latency", type=float, default=10.0, help="模型长尾请求的延迟 (秒)")
+    parser.add_argument("--relevant-ratio", type=float, default=1.0, help="hunter 判定为有价值的比例")
+    parser.add_argument("--worker-delay", type=float, default=0.0, help="工作线程错峰等待 (秒)")
+    parser.add_argument("--pipeline", action="store_true", help="使用分阶段流水线调度")
+    parser.add_argument("--verbose", action="store_true", help="输出流水线日志")
+    parser.add_argument("--output", help="结果 JSON 的保存路径")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    profile = {"latency": args.llm_latency, "jitter": args.llm_jitter, "error_rate": args.llm_error_rate,
+               "slow_rate": args.llm_slow_rate, "slow_latency": args.llm_slow_latency}
+    stack = LocalStack(bulletins=args.page_size, page_size=args.page_size, attachments=args.attachments,
+                       portal_latency=args.portal_latency, llm_profiles={"*": profile},
+                       relevant_ratio=args.relevant_ratio).start()
+    try:
+        configure(args, stack)
+        # 各模块在创建时读取配置，须在 apply 之后导入与创建
+        import main as app
+        from auth.login_manager import LoginManager
+        from spider.url_finder import SourceScanner
+        from data.db_manager import DatabaseManager
+        from spider.browser_pool import shutdown_shared_pool
+
+        db = DatabaseManager()
+        login_mgr = LoginManager(username=config.SCHOOL["USERNAME"], password=config.SCHOOL["PASSWORD"])
+        finder = SourceScanner(db=db)
+        services = app.Services()
+
+        def cycle():
+            submitted, _ = app.run_cycle(db, login_mgr, finder, services)
+            return submitted
+
+        print(f"\n🔥 预热：首次登录并处理门户首页的 {args.page_size} 条公告...")
+        config.SYSTEM["MAX_WORKERS"] = max(args.workers)
+        cycle()
+
+        mode = "流水线" if args.pipeline else "线程池"
+        print(f"\n🧪 每轮 {args.bulletins} 条新公告 ({mode}，模型中位延迟 {args.llm_latency}s)")
+        print(f"{'并发':>4} {'条/分钟':>9} {'送达':>6} {'耗时':>8} {'等待 p50':>9} {'p90':>8} {'p99':>8} {'处理 p99':>9}")
+        rounds = {}
+        for workers in args.workers:
+            config.SYSTEM["MAX_WORKERS"] = workers
+            result = run_round(stack, cycle, args.bulletins)
+            rounds[str(workers)] = result
+            wait, service = result["wait_latency_s"], result["service_latency_s"]
+            print(f"{workers:>4} {result['bulletins_per_min'] or 0:>9.1f} {result['delivered']:>6} "
+                  f"{result['elapsed_s']:>7.1f}s {wait['p50'] or 0:>8.2f}s {wait['p90'] or 0:>7.2f}s "
+                  f"{wait['p99'] or 0:>7.2f}s {service['p99'] or 0:>8.2f}s")
+
+        services.close()
+        shutdown_shared_pool()
+        db.close()
+        report = {
+            "meta": {
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+            },
+            "rounds": rounds,
+            "services": stack.summary(),
+        }
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"\n💾 结果已保存: {args.output}")
+    finally:
+        stack.stop()
+
+
+if __name__ == "__main__":
+    main()
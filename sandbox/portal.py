@@ -0,0 +1,269 @@
+import os
+import time
+import html
+import random
+import logging
+import secrets
+import threading
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote, unquote
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+
+SESSION_COOKIE = "SANDBOX_SESSION"
+
+# 附件：(展示的文件名, 样本文件, Content-Type)
+ATTACHMENTS = [
+    ("通知全文.pdf", "sample.pdf", "application/pdf"),
+    ("申报书.docx", "sample.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    ("汇总表.xlsx", "sample.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    ("工作汇报.pptx", "sample.pptx", "application/vnd.openxmlformats-officedocument.presentationml.presentation"),
+]
+
+DEPTS = ["教务处", "研究生院", "学生工作处", "科技处", "人事处", "后勤管理处", "图书馆", "信息化建设与管理处"]
+TOPICS = [
+    "关于做好期末考试工作的通知", "关于开展大学生创新创业训练计划中期检查的通知", "关于寒假期间校园网服务安排的通知",
+    "关于组织申报国家自然科学基金项目的通知", "关于图书馆开放时间调整的通知", "关于举办气象与人工智能学术报告会的通知",
+    "关于教职工体检安排的通知", "关于校园一卡通系统升级维护的公告", "关于评选优秀学生干部的通知",
+]
+SENTENCES = [
+    "请各学院于规定时间前将汇总材料报送至相关部门，逾期不予受理。",
+    "申报人须为我校在职在编教师，且当年度主持同类项目不超过一项。",
+    "考试期间请考生携带学生证和身份证，提前十五分钟进入考场。",
+    "系统升级期间校园卡消费、门禁等功能将暂停使用，请师生提前做好准备。",
+    "报告会将在气象楼一楼报告厅举行，欢迎全校师生参加。",
+    "如有疑问请联系各学院教学秘书或拨打咨询电话。",
+]
+
+
+class PortalSite:
+    """
+    门户替身：统一身份认证登录页 → VPN 首页 → 信息公告列表 (分页) → 公告详情页与附件
+    页面结构与真实门户一致，LoginManager / UrlFinder / fetcher 无需任何改动即可走完整流程。
+    未登录的请求一律重定向到登录页 (标题含「登录」)，与真实门户的凭证失效表现相同。
+    """
+
+    def __init__(self, bulletins=30, page_size=20, attachments=1, latency=0.0, cookie_ttl=7200,
+                 host="127.0.0.1", port=0, seed=0):
+        """
+        :param bulletins: 启动时已有的公告数
+        :param page_size: 列表每页条数
+        :param attachments: 每条公告的附件数 (0~4)
+        :param latency: 每个页面请求的额外延迟 (秒)，模拟 VPN 网关
+        :param cookie_ttl: 登录 Cookie 的有效期 (秒)
+        """
+        self.page_size = page_size
+        self.attachments = max(0, min(attachments, len(ATTACHMENTS)))
+        self.latency = latency
+        self.cookie_ttl = cookie_ttl
+        self.rng = random.Random(seed)
+        self.bulletins = []       # 最新的在前
+        self.by_id = {}
+        self.first_fetch = {}     # 公告 id -> 详情页首次被抓取的时间 (time.monotonic)
+        self.requests = 0
+        self._sessions = set()
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+        self.publish(bulletins, spread_days=True)
+
+    # ==========================
+    # 服务生命周期
+    # ==========================
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def home_url(self):
+        return f"{self.url}/enlink/index"
+
+    @property
+    def login_url(self):
+        # 登录地址中不能出现 "index"，否则 LoginManager 会直接判定为已登录
+        return f"{self.url}/authserver/login?service={quote(self.url + '/enlink/cas')}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sandbox-portal", daemon=True)
+        self._thread.start()
+        logger.info(f"🏫 [替身] 门户已启动: {self.url} ({len(self.bulletins)} 条公告)")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ==========================
+    # 公告数据
+    # ==========================
+
+    def publish(self, count, spread_days=False):
+        """
+        发布 count 条新公告 (排在列表最前)
+        :param spread_days: True 时日期往前铺开 (启动时的历史公告)，否则都是今天
+        :return: 新公告列表
+        """
+        today = date.today()
+        new = []
+        with self._lock:
+            for idx in range(count):
+                bulletin_id = self._next_id
+                self._next_id += 1
+                offset = (count - idx) // 5 if spread_days else 0
+                new.append({
+                    "id": bulletin_id,
+                    "title": f"{self.rng.choice(TOPICS)}（{bulletin_id}号）",
+                    "dept": self.rng.choice(DEPTS),
+                    "date": (today - timedelta(days=offset)).isoformat(),
+                    "paragraphs": [self.rng.choice(SENTENCES) * 2 for _ in range(8)],
+                })
+            new.reverse()
+            self.bulletins[:0] = new
+            self.by_id.update((b["id"], b) for b in new)
+        return new
+
+    def _page(self, page_no):
+        with self._lock:
+            start = (page_no - 1) * self.page_size
+            return self.bulletins[start:start + self.page_size], len(self.bulletins)
+
+    # ==========================
+    # 页面
+    # ==========================
+
+    def _layout(self, title, body):
+        return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title></head>"
+                f"<body>{body}</body></html>")
+
+    def render_login(self, error=""):
+        tip = f'<div id="formErrorTip">{html.escape(error)}</div>' if error else ""
+        return self._layout("统一身份认证 - 用户登录", f"""
+<form id="casLoginForm" method="post">
+  {tip}
+  <input id="username" name="username" type="text">
+  <input id="password" name="password" type="password">
+  <button id="login_submit" type="submit">登录</button>
+</form>""")
+
+    def render_home(self):
+        return self._layout("应用访问统一入口", """
+<div class="apps"><h2>应用访问统一入口</h2>
+<a href="/xxgg/list1.htm" target="_blank">信息公告</a> | <a href="/enlink/apps">常用应用</a></div>""")
+
+    def render_list(self, page_no):
+        # 详情页编号补零：URL 的字典序与发布顺序一致，同一天的公告也能推进水位线
+        items, total = self._page(page_no)
+        rows = "\n".join(
+            f'<li class="news clearfix"><span class="news_title"><a href="/info/{b["id"]:06d}.htm" target="_blank" '
+            f'title="{html.escape(b["title"])}">{html.escape(b["title"])}</a></span>'
+            f'<span class="news_dept">[{b["dept"]}]</span><span class="news_meta">{b["date"]}</span></li>'
+            for b in items
+        )
+        pager = ""
+        if page_no * self.page_size < total:
+            pager = f'<div class="wp_paging"><a class="next" href="/xxgg/list{page_no + 1}.htm">下一页</a></div>'
+        return self._layout("信息公告", f'<h2>信息公告</h2><ul class="news_list">{rows}</ul>{pager}')
+
+    def render_detail(self, bulletin):
+        paragraphs = "\n".join(f"<p>{html.escape(p)}</p>" for p in bulletin["paragraphs"])
+        files = "\n".join(
+            f'<li><a href="/files/{bulletin["id"]}/{quote(name)}">附件{idx + 1}：{html.escape(name)}</a></li>'
+            for idx, (name, _, _) in enumerate(ATTACHMENTS[:self.attachments])
+        )
+        return self._layout(bulletin["title"], f"""
+<div class="article"><h1 class="arti_title">{html.escape(bulletin["title"])}</h1>
+<p class="arti_metas">发布部门：{bulletin["dept"]} 发布时间：{bulletin["date"]}</p>
+<div class="wp_articlecontent">{paragraphs}<ul class="attachments">{files}</ul></div></div>""")
+
+    # ==========================
+    # 请求处理
+    # ==========================
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):
+                logger.debug(f"    [替身门户] {fmt % args}")
+
+            def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _redirect(self, location, headers=None):
+                self._send(302, b"", headers={"Location": location, **(headers or {})})
+
+            def _logged_in(self):
+                for part in self.headers.get("Cookie", "").split(";"):
+                    name, _, value = part.strip().partition("=")
+                    if name == SESSION_COOKIE and value in site._sessions:
+                        return True
+                return False
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                if path != "/authserver/login":
+                    return self._send(405, "Method Not Allowed", "text/plain")
+                if not form.get("username") or not form.get("password"):
+                    return self._send(200, site.render_login("账号或密码不能为空"))
+                token = secrets.token_hex(16)
+                site._sessions.add(token)
+                cookie = f"{SESSION_COOKIE}={token}; Path=/; Max-Age={site.cookie_ttl}"
+                self._redirect("/enlink/index", {"Set-Cookie": cookie})
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                path = unquote(urlparse(self.path).path)
+                if path == "/authserver/login":
+                    return self._send(200, site.render_login())
+                if not self._logged_in():
+                    return self._redirect(site.login_url)
+                if site.latency:
+                    time.sleep(site.latency)
+
+                if path in ("/", "/enlink/index", "/enlink/cas"):
+                    return self._send(200, site.render_home())
+                if path.startswith("/xxgg/list") and path.endswith(".htm"):
+                    page_no = path[len("/xxgg/list"):-len(".htm")]
+                    return self._send(200, site.render_list(int(page_no) if page_no.isdigit() else 1))
+                if path.startswith("/info/") and path.endswith(".htm"):
+                    bulletin_id = path[len("/info/"):-len(".htm")]
+                    bulletin = site.by_id.get(int(bulletin_id)) if bulletin_id.isdigit() else None
+                    if bulletin:
+                        with site._lock:
+                            site.first_fetch.setdefault(bulletin["id"], time.monotonic())
+                        return self._send(200, site.render_detail(bulletin))
+                if path.startswith("/files/"):
+                    name = path.rsplit("/", 1)[-1]
+                    for display, fixture, content_type in ATTACHMENTS:
+                        if display == name:
+                            with open(os.path.join(FIXTURE_DIR, fixture), "rb") as f:
+                                data = f.read()
+                            return self._send(200, data, content_type, {
+                                "Content-Disposition": f"attachment; filename*=utf-8''{quote(display)}"})
+                self._send(404, "Not Found", "text/plain")
+
+            do_HEAD = do_GET
+
+        return Handler
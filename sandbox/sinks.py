@@ -0,0 +1,200 @@
+import json
+import time
+import email
+import logging
+import threading
+import socketserver
+from email.header import decode_header, make_header
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+
+class Deliveries:
+    """各推送渠道收到的消息：(渠道, 公告标题, 到达时间 time.monotonic)"""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, channel, title):
+        with self._lock:
+            self.records.append((channel, title, time.monotonic()))
+
+    def count(self, channel=None):
+        with self._lock:
+            return sum(1 for record in self.records if channel in (None, record[0]))
+
+    def arrivals(self):
+        """标题 -> 最后一个渠道送达的时间 (一条公告的推送全部完成)"""
+        latest = {}
+        with self._lock:
+            for _, title, at in self.records:
+                latest[title] = max(at, latest.get(title, at))
+        return latest
+
+
+def _strip_subject(subject):
+    # Notifier 的邮件标题格式为 "🔔 {title}"
+    return subject[2:] if subject.startswith("🔔 ") else subject
+
+
+class SmtpSink:
+    """
+    最小 SMTP 服务：接受任意账号登录 (AUTH PLAIN / LOGIN)，收下邮件后只记录标题
+    只实现 Notifier 用到的命令，不支持 STARTTLS (本地替身配置为 SSL = False)
+    """
+
+    def __init__(self, deliveries, host="127.0.0.1", port=0):
+        self.deliveries = deliveries
+        self.messages = 0
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sandbox-smtp", daemon=True)
+        self._thread.start()
+        host, port = self.address
+        logger.info(f"📮 [替身] SMTP 服务已启动: {host}:{port}")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _received(self, raw):
+        message = email.message_from_bytes(raw)
+        subject = str(make_header(decode_header(message.get("Subject", ""))))
+        self.messages += 1
+        self.deliveries.add("email", _strip_subject(subject))
+
+    def _handler_class(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+            def read_data(self):
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    # 去掉透明传输的点填充
+                    lines.append(line[1:] if line.startswith(b"..") else line)
+                return b"".join(lines)
+
+            def handle(self):
+                self.reply("220 sandbox ESMTP")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode("utf-8", "replace").strip()
+                    verb = command.split(" ", 1)[0].upper()
+                    if verb == "EHLO":
+                        self.wfile.write(b"250-sandbox\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                    elif verb == "HELO":
+                        self.reply("250 sandbox")
+                    elif verb == "AUTH":
+                        if command.upper().startswith("AUTH LOGIN"):
+                            # 用户名与密码各一行 (base64)，不校验
+                            self.reply("334 VXNlcm5hbWU6")
+                            self.rfile.readline()
+                            self.reply("334 UGFzc3dvcmQ6")
+                            self.rfile.readline()
+                        elif len(command.split()) < 3:
+                            self.reply("334 ")
+                            self.rfile.readline()
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        sink._received(self.read_data())
+                        self.reply("250 OK queued")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        return Handler
+
+
+class WebhookSink:
+    """
+    HTTP 推送接收端：
+    - POST /webhook      Notifier.send_webhook 的 JSON (markdown.title)
+    - POST /qmsg/{key}   Notifier.send_qmsg 的表单 (msg 第二行为标题)
+    """
+
+    def __init__(self, deliveries, host="127.0.0.1", port=0):
+        self.deliveries = deliveries
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def webhook_url(self):
+        return f"{self.url}/webhook"
+
+    @property
+    def qmsg_api(self):
+        """填入 NOTIFY["QMSG"]["API"]，Notifier 会在后面拼上 KEY"""
+        return f"{self.url}/qmsg/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sandbox-webhook", daemon=True)
+        self._thread.start()
+        logger.info(f"🪝 [替身] Webhook / Qmsg 接收端已启动: {self.url}")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):
+                logger.debug(f"    [替身推送] {fmt % args}")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8")
+                try:
+                    if self.path.startswith("/webhook"):
+                        sink.deliveries.add("webhook", json.loads(body)["markdown"]["title"])
+                    elif self.path.startswith("/qmsg/"):
+                        lines = parse_qs(body).get("msg", [""])[0].splitlines()
+                        sink.deliveries.add("qmsg", lines[1] if len(lines) > 1 else "")
+                    else:
+                        self.send_response(404)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"    ⚠️ [替身推送] 无法解析的推送内容: {e}")
+                payload = b'{"code":0,"success":true}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
@@ -0,0 +1,93 @@
+import os
+import sys
+import shutil
+import logging
+import tempfile
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+from sandbox.portal import PortalSite
+from sandbox.llm_mock import MockLLM
+from sandbox.sinks import Deliveries, SmtpSink, WebhookSink
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ["deepseek", "aliyun", "zhipu", "silicon"]
+
+
+class LocalStack:
+    """
+    本地替身服务全家桶：门户 (登录 + 公告列表 + 详情 + 附件)、OpenAI 兼容模型服务、SMTP 与 Webhook / Qmsg 接收端
+    apply() 把运行时配置改为指向这些服务，并把运行数据 (Cookie、数据库、缓存、附件) 放进临时目录，
+    不会读写真实的 data/ 目录，也不会向外发出任何请求。
+    须在创建 DatabaseManager / LoginManager 以及导入 spider.fetcher 之前调用。
+    """
+
+    def __init__(self, bulletins=30, page_size=20, attachments=1, portal_latency=0.0,
+                 llm_profiles=None, relevant_ratio=1.0, data_dir=None, seed=0):
+        self.portal = PortalSite(bulletins=bulletins, page_size=page_size, attachments=attachments,
+                                 latency=portal_latency, seed=seed)
+        self.llm = MockLLM(profiles=llm_profiles, relevant_ratio=relevant_ratio, seed=seed)
+        self.deliveries = Deliveries()
+        self.smtp = SmtpSink(self.deliveries)
+        self.webhook = WebhookSink(self.deliveries)
+        self._own_data_dir = data_dir is None
+        self.data_dir = data_dir or tempfile.mkdtemp(prefix="nuist-sandbox-")
+
+    def start(self):
+        for service in (self.portal, self.llm, self.smtp, self.webhook):
+            service.start()
+        return self
+
+    def stop(self):
+        for service in (self.portal, self.llm, self.smtp, self.webhook):
+            try:
+                service.stop()
+            except Exception as e:
+                logger.warning(f"⚠️ [替身] 服务关闭异常: {e}")
+        if self._own_data_dir:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def apply(self):
+        """改写运行时配置 (只改内存中的 config 模块，不写回 config.py)"""
+        config.SCHOOL.update({
+            "USERNAME": "sandbox",
+            "PASSWORD": "sandbox",
+            "VPN_URL": self.portal.home_url,
+            "LOGIN_URL": self.portal.login_url,
+        })
+        config.AI_KEYS.update({provider: "sk-sandbox" for provider in PROVIDERS})
+        config.AI_CONFIG["BASE_URLS"] = {provider: self.llm.base_url(provider) for provider in PROVIDERS}
+
+        smtp_host, smtp_port = self.smtp.address
+        config.NOTIFY["EMAIL"].update({
+            "ENABLE": True, "SMTP_SERVER": smtp_host, "SMTP_PORT": smtp_port, "SSL": False,
+            "SENDER": "bot@sandbox.local", "PASSWORD": "sandbox", "RECEIVER": "student@sandbox.local",
+        })
+        config.NOTIFY["QMSG"].update({"ENABLE": True, "KEY": "sandbox", "API": self.webhook.qmsg_api})
+        config.NOTIFY["WEBHOOK"].update({"ENABLE": True, "URL": self.webhook.webhook_url})
+
+        # 只扫描替身门户的「信息公告」，不沿用真实配置中的其他列表来源
+        config.SPIDER["LIST_SOURCES"] = [{"name": "local"}]
+        config.SYSTEM["DATA_DIR"] = self.data_dir
+        logger.info(f"🧪 [替身] 已切换到本地服务，运行数据目录: {self.data_dir}")
+        return self
+
+    def summary(self):
+        return {
+            "portal_requests": self.portal.requests,
+            "bulletins": len(self.portal.bulletins),
+            "detail_fetched": len(self.portal.first_fetch),
+            "llm": {provider: dict(stat) for provider, stat in self.llm.stats.items()},
+            "delivered": {channel: self.deliveries.count(channel) for channel in ("email", "qmsg", "webhook")},
+        }
+
+    def log_summary(self):
+        stats = self.summary()
+        llm = ", ".join(f"{p} {s['calls']} 次 (失败 {s['errors']})" for p, s in stats["llm"].items()) or "无调用"
+        delivered = ", ".join(f"{channel} {count}" for channel, count in stats["delivered"].items())
+        logger.info(f"🧪 [替身] 门户请求 {stats['portal_requests']} 次，抓取详情 {stats['detail_fetched']} 条 | "
+                    f"模型: {llm} | 推送: {delivered}")
@@ -0,0 +1,127 @@
+import os
+import sys
+import queue
+import logging
+import threading
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from scheduler import stages
+from utils import profiling
+
+# 获取日志记录器
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_STOP = object()
+
+
+class _Stage:
+    """流水线中的一个阶段：独立的有界输入队列 + 固定数量的工作线程"""
+
+    def __init__(self, name, handler, workers, queue_size):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.inbox = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.next_stage = None
+        self._alive = self.workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self, runner):
+        for i in range(self.workers):
+            t = threading.Thread(target=runner, args=(self,), name=f"{self.name}-{i + 1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def worker_exited(self):
+        """最后一个退出的线程负责把结束信号传给下游阶段"""
+        with self._lock:
+            self._alive -= 1
+            is_last = self._alive == 0
+        if is_last and self.next_stage:
+            for _ in range(self.next_stage.workers):
+                self.next_stage.inbox.put(_STOP)
+
+    def join(self):
+        for t in self._threads:
+            t.join()
+
+
+class StagedPipeline:
+    """
+    分阶段流水线调度器
+    fetch → extract → relevance → summarize → notify
+    每个阶段拥有独立的并发数与有界队列，下游拥塞时上游 put() 阻塞形成背压，
+    慢速的 LLM 调用不会再占住浏览器槽位，浏览器也不会卡住 SMTP。
+    """
+
+    def __init__(self, db, ai, notifier, workers=None, queue_size=None):
+        self.db = db
+        self.ai = ai
+        self.notifier = notifier
+
+        default_workers = config.SYSTEM.get("MAX_WORKERS", 2)
+        stage_workers = dict(config.SYSTEM.get("PIPELINE_WORKERS", {}))
+        stage_workers.update(workers or {})
+        if queue_size is None:
+            queue_size = config.SYSTEM.get("PIPELINE_QUEUE_SIZE", 4)
+
+        self.stages = [
+            _Stage(name, handler, stage_workers.get(name, default_workers), queue_size)
+            for name, handler in stages.PIPELINE
+        ]
+        for upstream, downstream in zip(self.stages, self.stages[1:]):
+            upstream.next_stage = downstream
+
+    def _handle(self, stage, task):
+        """执行单个阶段，返回任务是否需要进入下一阶段 (同一公告各阶段的剖析结果合并为一个文件)"""
+        with profiling.section(stages.profile_label(task)):
+            return self._handle_stage(stage, task)
+
+    def _handle_stage(self, stage, task):
+        try:
+            # claim 与原线程池模式一致，在抓取线程中完成
+            if stage.name == "fetch" and not stages.run_stage("claim", stages.claim, task,
+                                                              self.db, self.ai, self.notifier):
+                return False
+        except Exception as e:
+            logger.error(f"💥 [Pipeline-{stage.name}] 注册任务异常: {e}")
+            return False
+
+        try:
+            return stages.run_stage(stage.name, stage.handler, task, self.db, self.ai, self.notifier)
+        except Exception as e:
+            stages.fail(task, self.db, e)
+            return False
+
+    def _run_stage(self, stage):
+        while True:
+            task = stage.inbox.get()
+            if task is _STOP:
+                break
+            if self._handle(stage, task) and stage.next_stage:
+                stage.next_stage.inbox.put(task)
+            else:
+                stages.finish(task, self.db)
+        stage.worker_exited()
+
+    def run(self, items):
+        """提交全部任务并阻塞直到流水线排空"""
+        layout = ", ".join(f"{s.name}={s.workers}" for s in self.stages)
+        logger.info(f"🏭 [Pipeline] 启动分阶段流水线 ({layout})")
+
+        for stage in self.stages:
+            stage.start(self._run_stage)
+
+        head = self.stages[0]
+        for item in items:
+            head.inbox.put(stages.new_task(item))
+        for _ in range(head.workers):
+            head.inbox.put(_STOP)
+
+        for stage in self.stages:
+            stage.join()
+        logger.info("🏭 [Pipeline] 流水线已排空")
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import logging
+from datetime import datetime
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# 获取日志记录器
+logger = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 7 * 24
+
+
+class AdaptivePoller:
+    """
+    守护模式的自适应轮询间隔
+    按 history.db 中公告的发现时间统计「星期 × 小时」的平均发布量 λ (条/小时)，
+    让两次轮询之间的预期新增约为 POLL_TARGET_NEW 条：
+    工作时间 λ 高、间隔短，夜间与周末 λ 低、间隔长。刚发现新公告时保持最短间隔 (应对集中发布)。
+    """
+
+    def __init__(self, db):
+        cfg = config.SYSTEM
+        self.db = db
+        self.min_interval = cfg.get("POLL_MIN_INTERVAL", 300)
+        self.max_interval = cfg.get("POLL_MAX_INTERVAL", 3600)
+        self.target_new = cfg.get("POLL_TARGET_NEW", 0.5)
+        self.history_days = cfg.get("POLL_HISTORY_DAYS", 90)
+        self.relearn_every = cfg.get("POLL_RELEARN_HOURS", 24) * 3600
+        self.rates = None
+        self._learned_at = 0.0
+
+    @staticmethod
+    def _bucket(moment):
+        return moment.weekday() * 24 + moment.hour
+
+    def learn(self):
+        times = self.db.discovery_times(self.history_days)
+        self._learned_at = time.monotonic()
+        if not times:
+            self.rates = None
+            logger.info("    📈 [轮询] 暂无历史数据，按工作时间规则轮询")
+            return
+
+        counts = [0.0] * HOURS_PER_WEEK
+        for moment in times:
+            counts[self._bucket(moment)] += 1
+        weeks = max(1.0, (max(times) - min(times)).days / 7)
+        # 与相邻小时加权平滑，避免个别空档造成间隔剧烈跳变
+        self.rates = [
+            (counts[i - 1] + 2 * counts[i] + counts[(i + 1) % HOURS_PER_WEEK]) / 4 / weeks
+            for i in range(HOURS_PER_WEEK)
+        ]
+        peak = max(range(HOURS_PER_WEEK), key=lambda i: self.rates[i])
+        logger.info(f"    📈 [轮询] 已从 {len(times)} 条历史学习发布规律，"
+                    f"高峰: 周{'一二三四五六日'[peak // 24]} {peak % 24}:00 ({self.rates[peak]:.2f} 条/小时)")
+
+    def _default_interval(self, now):
+        """无历史数据时：工作日 8~18 点密集轮询，其余时间稀疏"""
+        if now.weekday() < 5 and 8 <= now.hour < 18:
+            return self.min_interval
+        return self.max_interval
+
+    def next_interval(self, found_new=0, now=None):
+        """
+        :param found_new: 本轮发现的新任务数
+        :return: 距离下一轮的秒数
+        """
+        if found_new:
+            return self.min_interval
+        if not self._learned_at or time.monotonic() - self._learned_at > self.relearn_every:
+            self.learn()
+
+        now = now or datetime.now()
+        if self.rates is None:
+            return self._default_interval(now)
+        rate = self.rates[self._bucket(now)]
+        if rate <= 0:
+            return self.max_interval
+        return max(self.min_interval, min(self.max_interval, self.target_new / rate * 3600))
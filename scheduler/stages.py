@@ -0,0 +1,146 @@
+import time
+import random
+import logging
+import os
+import sys
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from spider.fetcher import fetch_content
+from data.models import ProcessStatus
+from utils import metrics
+
+# 获取日志记录器
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# 🧱 公告处理的各个阶段
+# 线程池模式按顺序串行调用，流水线模式由各阶段的独立工作线程调用。
+# 每个阶段返回 True 表示继续下一阶段，False 表示任务已在本阶段结束。
+# 结束时在 task['outcome'] 记下结果 (success / ignored / failed / error)，供度量使用。
+# ==========================================
+
+def new_task(item):
+    """创建在各阶段之间传递的任务状态"""
+    return {"url": item['url'], "title": item['title'], "id": item.get('id'),
+            "outcome": None, "metrics": metrics.new_task_metrics()}
+
+
+def profile_label(task):
+    """剖析结果按公告归类的标签 (流水线模式下 claim 之前可能还没有主键)"""
+    return f"bulletin-{task['id'] or task['url']}"
+
+
+def run_stage(name, handler, task, db, ai, notifier):
+    """执行一个阶段并计时；阶段内的深层代码通过 metrics.current() 记录到这条公告上"""
+    task_metrics = task['metrics']
+    if not task_metrics:
+        return handler(task, db, ai, notifier)
+    with metrics.bind(task_metrics), task_metrics.span(name):
+        return handler(task, db, ai, notifier)
+
+
+def finish(task, db):
+    """任务结束 (无论在哪个阶段)：保存处理度量并计入聚合直方图；在 claim 阶段被跳过的任务不记录"""
+    task_metrics = task['metrics']
+    if not task_metrics or task['outcome'] is None:
+        return
+    try:
+        db.save_metrics(metrics.to_row(task_metrics, task['id'], task['outcome']))
+        metrics.REGISTRY.record(task_metrics, task['outcome'])
+    except Exception as e:
+        logger.warning(f"    ⚠️ [Metrics] 记录处理度量失败: {e}")
+
+
+def claim(task, db, ai, notifier):
+    """查重 + 注册任务 + 错峰等待"""
+    url = task['url']
+    title = task['title']
+
+    # 主线程已批量查重并注册的任务直接使用主键，无需再查库
+    if task['id'] is None:
+        # 再次查重 (防止并发时的重复提交，虽然概率很低)
+        if db.is_processed(url):
+            logger.info(f"    ⏭️ [Worker] 跳过已处理: {title[:10]}...")
+            return False
+        task['id'] = db.register_task(url, title).id
+
+    logger.info(f"⚡ [Worker] 开始处理: {title[:15]}...")
+
+    # 随机等待 (错峰请求，防止并发触发防火墙)
+    delay_min = config.SYSTEM.get("WORKER_DELAY_MIN", 0.5)
+    delay_max = config.SYSTEM.get("WORKER_DELAY_MAX", 2.0)
+    time.sleep(random.uniform(delay_min, delay_max))
+    return True
+
+
+def fetch(task, db, ai, notifier):
+    """抓取正文与附件"""
+    content = fetch_content(task['url'])
+    if not content:
+        task['outcome'] = "failed"
+        db.update_status(task['url'], ProcessStatus.FAILED, error_msg="抓取内容为空", task_id=task['id'])
+        return False
+    task['content'] = content
+    return True
+
+
+def extract(task, db, ai, notifier):
+    """解析附件并组装上下文"""
+    logger.info(f"    🧠 [Worker-AI] 分析中: {task['title'][:10]}...")
+    task['safe_title'], task['context'] = ai.build_context(task['content'], title=task['title'])
+    return True
+
+
+def relevance(task, db, ai, notifier):
+    """Hunter 价值评估 (判定来源随终态落库，供本地分类器筛选训练样本)"""
+    is_relevant, task['verdict_source'] = ai.check_relevance(task['safe_title'], task['context'])
+    if not is_relevant:
+        logger.info(f"    🗑️ [Worker] 判定无价值: {task['title'][:10]}...")
+        task['outcome'] = "ignored"
+        db.update_status(task['url'], ProcessStatus.IGNORED, task_id=task['id'],
+                         verdict_source=task['verdict_source'])
+        return False
+    return True
+
+
+def summarize(task, db, ai, notifier):
+    """Commander 生成摘要"""
+    task['summary'] = ai.write_summary(task['context'])
+    return True
+
+
+def notify(task, db, ai, notifier):
+    """推送通知并落库终态"""
+    title = task['title']
+    logger.info(f"    🔔 [Worker] 准备推送: {title[:10]}...")
+    files_to_send = task['content'].get('files', [])
+    is_success = notifier.send(title, task['summary'], attachments=files_to_send)
+    task['outcome'] = "success" if is_success else "failed"
+
+    if is_success:
+        db.update_status(task['url'], ProcessStatus.SUCCESS, summary=task['summary'], task_id=task['id'],
+                         verdict_source=task.get('verdict_source'))
+        logger.info(f"    ✅ [Worker] 任务完成: {title[:10]}...")
+    else:
+        logger.warning(f"    ⚠️ [Worker] 推送失败: {title[:10]}...")
+        db.update_status(task['url'], ProcessStatus.FAILED, error_msg="推送通知失败", task_id=task['id'])
+    return False
+
+
+def fail(task, db, error):
+    """任意阶段抛出异常时统一标记失败"""
+    logger.error(f"    ❌ [Worker] 任务异常 ({task['title'][:10]}...): {error}")
+    task['outcome'] = "error"
+    db.update_status(task['url'], ProcessStatus.FAILED, error_msg=f"Worker异常: {str(error)}", task_id=task['id'])
+
+
+# 阶段顺序 (claim 之后执行)
+PIPELINE = [
+    ("fetch", fetch),
+    ("extract", extract),
+    ("relevance", relevance),
+    ("summarize", summarize),
+    ("notify", notify),
+]
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import sys
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.paths import data_dir
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+STORE_NAME = "attachments"
+TEMP_NAME = "temp_files"
+
+
+class AttachmentStore:
+    """
+    内容寻址的附件仓库
+    - objects/<sha256 前两位>/<sha256>：每份内容只存一次
+    - index.json：URL → {sha256, etag, last_modified, filename, fetched_at}
+    - temp_files/<sha256 前 12 位>/<文件名>：给 AI 解析与邮件附件使用的具名硬链接
+    """
+
+    def __init__(self, root=None, temp_dir=None):
+        root = root or data_dir(STORE_NAME)
+        self.root = root
+        self.temp_dir = temp_dir or data_dir(TEMP_NAME)
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_file = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._index = {}
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except Exception as e:
+                logger.warning(f"    ⚠️ [附件库] 索引损坏，已重建: {e}")
+
+    # ==========================
+    # 🔍 索引
+    # ==========================
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def _save_index(self):
+        tmp_path = self.index_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_file)
+
+    def lookup(self, url):
+        """返回 URL 的索引记录 (仅当对应内容仍在仓库中)"""
+        with self._lock:
+            entry = self._index.get(url)
+        if entry and os.path.exists(self._blob_path(entry["sha256"])):
+            return dict(entry)
+        return None
+
+    def is_fresh(self, entry):
+        """在新鲜期内的附件直接复用，不发任何请求"""
+        fresh_seconds = config.SPIDER.get("ATTACH_FRESH_SECONDS", 3600)
+        return time.time() - entry.get("fetched_at", 0) < fresh_seconds
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url, sha256, filename, etag=None, last_modified=None):
+        with self._lock:
+            self._index[url] = {
+                "sha256": sha256,
+                "filename": filename,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": time.time(),
+            }
+            self._save_index()
+
+    def touch(self, url):
+        """服务器返回 304 后刷新新鲜期"""
+        with self._lock:
+            if url in self._index:
+                self._index[url]["fetched_at"] = time.time()
+                self._save_index()
+
+    # ==========================
+    # 📦 内容
+    # ==========================
+
+    def ingest(self, chunks):
+        """边下载边计算 SHA-256，相同内容只保留一份，返回 sha256"""
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    if chunk:
+                        digest.update(chunk)
+                        f.write(chunk)
+            sha256 = digest.hexdigest()
+            blob_path = self._blob_path(sha256)
+            if os.path.exists(blob_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(tmp_path, blob_path)
+            return sha256
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def materialize(self, sha256, filename):
+        """在 temp_files 下生成具名文件 (硬链接，不支持时复制)，同名同内容不会重复生成"""
+        target_dir = os.path.join(self.temp_dir, sha256[:12])
+        target = os.path.join(target_dir, filename)
+        if os.path.exists(target):
+            return target
+        os.makedirs(target_dir, exist_ok=True)
+        blob_path = self._blob_path(sha256)
+        try:
+            os.link(blob_path, target)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(blob_path, target)
+        return target
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_attachment_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AttachmentStore()
+    return _store
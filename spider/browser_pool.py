@@ -0,0 +1,302 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+import sys
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.paths import data_dir
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+# 读取 JS 堆内存占用 (Chromium 专有的 performance.memory)
+_HEAP_PROBE_JS = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+_STEALTH_JS = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+class BrowserSlot:
+    """
+    一个常驻浏览器槽位
+    Playwright 同步 API 的对象只能在创建它的线程里使用，
+    因此每个槽位独占一个线程，外部线程通过 run() 把任务投递进来执行。
+    """
+
+    def __init__(self, index, state_file, headless, user_agent, recycle_pages, max_heap_mb):
+        self.index = index
+        self.state_file = state_file
+        self.headless = headless
+        self.user_agent = user_agent
+        self.recycle_pages = recycle_pages
+        self.max_heap_bytes = max_heap_mb * 1024 * 1024
+
+        self._jobs = queue.Queue()
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._state_mtime = None
+        self._pages_served = 0
+        self._reload_requested = False
+        self._recycle_reason = None  # 上一个任务触发的回收原因，交付结果后处理
+
+        self._thread = threading.Thread(target=self._loop, name=f"BrowserSlot-{index}", daemon=True)
+        self._thread.start()
+
+    # ==========================
+    # 🔧 槽位线程内部逻辑
+    # ==========================
+
+    def _current_state_mtime(self):
+        if not os.path.exists(self.state_file):
+            return None
+        return os.path.getmtime(self.state_file)
+
+    def _open_context(self):
+        self._state_mtime = self._current_state_mtime()
+        if self._state_mtime is not None:
+            self._context = self._browser.new_context(storage_state=self.state_file, user_agent=self.user_agent)
+        else:
+            self._context = self._browser.new_context(user_agent=self.user_agent)
+        self._context.add_init_script(_STEALTH_JS)
+
+    def _launch(self):
+        from playwright.sync_api import sync_playwright
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(
+            headless=self.headless,
+            args=['--disable-blink-features=AutomationControlled']
+        )
+        self._open_context()
+        self._pages_served = 0
+        logger.info(f"    🌐 [Pool-{self.index}] 浏览器已预热")
+
+    def _close_browser(self):
+        try:
+            if self._browser:
+                self._browser.close()
+        except Exception:
+            pass
+        self._browser = None
+        self._context = None
+
+    def _recycle(self, reason):
+        logger.info(f"    ♻️ [Pool-{self.index}] 回收浏览器: {reason}")
+        self._close_browser()
+        try:
+            self._launch()
+        except Exception as e:
+            # 启动失败时保持空槽，下一次任务前由健康检查重试
+            logger.error(f"    ❌ [Pool-{self.index}] 浏览器重启失败: {e}")
+
+    def _ensure_healthy(self):
+        """健康检查：断连重启、凭证更新后重载 storage_state"""
+        if self._browser is None or not self._browser.is_connected():
+            if self._browser is not None:
+                logger.warning(f"    ⚠️ [Pool-{self.index}] 浏览器已断开，重新启动...")
+            self._close_browser()
+            self._launch()
+            return
+
+        if self._reload_requested or self._current_state_mtime() != self._state_mtime:
+            self._reload_requested = False
+            logger.info(f"    🔄 [Pool-{self.index}] 检测到凭证更新，重载 storage_state")
+            try:
+                self._context.close()
+            except Exception:
+                pass
+            self._open_context()
+
+    def _probe_heap(self, page):
+        try:
+            return page.evaluate(_HEAP_PROBE_JS) or 0
+        except Exception:
+            return 0
+
+    def _execute(self, fn):
+        """执行任务；达到回收条件时只记下原因，由 _loop 在交付结果之后再回收"""
+        self._ensure_healthy()
+        page = self._context.new_page()
+        heap = 0
+        try:
+            return fn(page, self._context)
+        finally:
+            heap = self._probe_heap(page)
+            try:
+                page.close()
+            except Exception:
+                pass
+            self._pages_served += 1
+            if self._pages_served >= self.recycle_pages:
+                self._recycle_reason = f"已服务 {self._pages_served} 个页面"
+            elif heap > self.max_heap_bytes:
+                self._recycle_reason = f"JS 堆内存 {heap // (1024 * 1024)}MB 超限"
+
+    def _loop(self):
+        try:
+            self._launch()
+        except Exception as e:
+            logger.error(f"    ❌ [Pool-{self.index}] 浏览器预热失败: {e}")
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            fn, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._execute(fn))
+            except BaseException as e:
+                # 任务异常后浏览器可能已处于异常状态，下次执行前由健康检查兜底
+                future.set_exception(e)
+            # 结果已交给调用方，再回收浏览器，调用方不必等待 Chromium 重启
+            if self._recycle_reason:
+                reason, self._recycle_reason = self._recycle_reason, None
+                self._recycle(reason)
+
+        self._close_browser()
+        if self._playwright:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+
+    # ==========================
+    # 🚪 对外接口 (任意线程调用)
+    # ==========================
+
+    def run(self, fn):
+        """
+        在槽位线程中执行 fn(page, context) 并阻塞等待结果
+        page 由槽位创建并在任务结束后关闭
+        """
+        future = Future()
+        self._jobs.put((fn, future))
+        return future.result()
+
+    def request_reload(self):
+        self._reload_requested = True
+
+    def stop(self):
+        self._jobs.put(None)
+        self._thread.join(timeout=30)
+
+
+class BrowserPool:
+    """
+    常驻 Chromium 浏览器池
+    固定数量的预热槽位，工作线程按需租借，用完归还
+    """
+
+    def __init__(self, size=None, state_file=None):
+        spider_cfg = config.SPIDER
+        if size is None:
+            size = spider_cfg.get("BROWSER_POOL_SIZE") or self._default_size()
+        if state_file is None:
+            state_file = data_dir("state.json")
+
+        self.size = max(1, int(size))
+        self.lease_timeout = spider_cfg.get("BROWSER_LEASE_TIMEOUT", 300)
+        self._idle = queue.Queue()
+        self._slots = []
+        self._closed = False
+
+        for i in range(self.size):
+            slot = BrowserSlot(
+                index=i + 1,
+                state_file=state_file,
+                headless=spider_cfg.get("HEADLESS", True),
+                user_agent=spider_cfg.get("USER_AGENT", "Mozilla/5.0..."),
+                recycle_pages=spider_cfg.get("BROWSER_RECYCLE_PAGES", 50),
+                max_heap_mb=spider_cfg.get("BROWSER_MAX_HEAP_MB", 512),
+            )
+            self._slots.append(slot)
+            self._idle.put(slot)
+
+        logger.info(f"    🌐 [Pool] 浏览器池已创建 (槽位数: {self.size})")
+
+    @staticmethod
+    def _default_size():
+        """未显式配置时，槽位数与实际抓取并发数保持一致"""
+        workers = config.SYSTEM.get("MAX_WORKERS", 2)
+        if config.SYSTEM.get("PIPELINE_MODE", False):
+            return config.SYSTEM.get("PIPELINE_WORKERS", {}).get("fetch", workers)
+        return workers
+
+    @contextmanager
+    def lease(self):
+        """租借一个槽位，with 语句结束后自动归还"""
+        if self._closed:
+            raise RuntimeError("浏览器池已关闭")
+        start = time.monotonic()
+        try:
+            slot = self._idle.get(timeout=self.lease_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"等待浏览器槽位超时 ({self.lease_timeout}s)")
+        waited = time.monotonic() - start
+        if waited > 1:
+            logger.info(f"    ⏳ [Pool] 等待空闲槽位 {waited:.1f}s")
+        try:
+            yield slot
+        finally:
+            self._idle.put(slot)
+
+    def run(self, fn):
+        """租借槽位并执行 fn(page, context)"""
+        with self.lease() as slot:
+            return slot.run(fn)
+
+    def reload_state(self):
+        """凭证刷新后调用：所有槽位在下一次任务前重载 storage_state"""
+        for slot in self._slots:
+            slot.request_reload()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for slot in self._slots:
+            slot.stop()
+        logger.info("    🌐 [Pool] 浏览器池已关闭")
+
+
+# ==========================================
+# 🌐 进程级共享浏览器池 (详情页抓取与多来源列表扫描共用)
+# ==========================================
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool(state_file=None):
+    """懒加载全局浏览器池 (首次使用时创建)"""
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                _shared_pool = BrowserPool(state_file=state_file)
+    return _shared_pool
+
+
+def reload_shared_pool():
+    """LoginManager 刷新凭证后调用，让池内上下文重新加载 state.json"""
+    if _shared_pool is not None:
+        _shared_pool.reload_state()
+
+
+def shutdown_shared_pool():
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is not None:
+            _shared_pool.close()
+            _shared_pool = None
+
+
+atexit.register(shutdown_shared_pool)
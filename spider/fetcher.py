@@ -6,16 +6,22 @@ import time
 import random
 import re
 from datetime import datetime
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, unquote
+from urllib.parse import urljoin, unquote, urlparse
 import urllib3
 from playwright.sync_api import sync_playwright, Error as PlaywrightError
 import logging
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # 引用根目录配置
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from spider.http_session import get_session, HostStats
+from spider.attachment_store import get_attachment_store
+from spider.html_backend import get_backend
+from utils import metrics
+from utils.paths import data_dir
 
 # 禁用 SSL 警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -23,12 +29,9 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 # 初始化模块级日志
 logger = logging.getLogger(__name__)
 
-# 路径配置
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-COOKIE_FILE = os.path.join(DATA_DIR, "cookies.json")
-STATE_FILE = os.path.join(DATA_DIR, "state.json")
-TEMP_DIR = os.path.join(DATA_DIR, "temp_files")
+# 数据目录下的文件名 (目录在使用时按 DATA_DIR 解析)
+STATE_NAME = "state.json"
+TEMP_NAME = "temp_files"
 
 # 🟢 读取配置
 HEADLESS = config.SPIDER.get("HEADLESS", True)
@@ -69,81 +72,176 @@ def get_filename_from_cd(cd):
         except: return name
     return None
 
+def _resolve_filename(res, suggested_name):
+    """根据响应头与链接文字确定附件文件名"""
+    final_filename = "unknown.dat"
+    server_filename = get_filename_from_cd(res.headers.get('Content-Disposition'))
+    if server_filename:
+        final_filename = server_filename
+    elif suggested_name:
+        base_name = suggested_name
+        if '.' not in base_name:
+            ct = res.headers.get('Content-Type', '').split(';')[0]
+            ext = mimetypes.guess_extension(ct)
+            if ext: base_name += ext
+        final_filename = base_name
+    final_filename = sanitize_filename(final_filename)
+    if not final_filename:
+        final_filename = f"attach_{int(time.time())}.dat"
+    return final_filename
+
+def _limited_chunks(res, chunk_size):
+    """流式读取响应，超过单文件大小上限时中止"""
+    max_bytes = config.SPIDER.get("ATTACH_MAX_BYTES", 50 * 1024 * 1024)
+    declared = res.headers.get('Content-Length')
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise ValueError(f"附件过大 ({int(declared) // 1024}KB)，跳过")
+    received = 0
+    for chunk in res.iter_content(chunk_size=chunk_size):
+        received += len(chunk)
+        if received > max_bytes:
+            raise ValueError(f"附件超过 {max_bytes // 1024}KB 上限，已中止")
+        yield chunk
+
+def _download_to_store(session, url, cookie_dict, suggested_name, req_timeout, chunk_size):
+    """内容寻址下载：新鲜期内直接复用，否则发条件请求，304 时不再传输内容"""
+    store = get_attachment_store()
+    entry = store.lookup(url)
+    headers = {}
+    if entry:
+        if store.is_fresh(entry):
+            logger.info(f"    ♻️ 附件命中缓存: {entry['filename']}")
+            return store.materialize(entry["sha256"], entry["filename"])
+        headers = store.conditional_headers(entry)
+
+    with session.get(url, stream=True, verify=False, timeout=req_timeout,
+                     headers=headers, cookies=cookie_dict) as res:
+        if res.status_code == 304 and entry:
+            store.touch(url)
+            logger.info(f"    ♻️ 附件未变化 (304): {entry['filename']}")
+            return store.materialize(entry["sha256"], entry["filename"])
+        res.raise_for_status()
+
+        final_filename = _resolve_filename(res, suggested_name)
+        sha256 = store.ingest(_limited_chunks(res, chunk_size))
+        store.record(url, sha256, final_filename,
+                     etag=res.headers.get('ETag'), last_modified=res.headers.get('Last-Modified'))
+    logger.info(f"    ✅ 附件下载成功: {final_filename}")
+    return store.materialize(sha256, final_filename)
+
+# 每个域名的并发下载上限 (VPN 网关对单 IP 并发敏感)
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+def _host_slot(url):
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(config.SPIDER.get("ATTACH_PER_HOST", 3))
+        return _host_slots[host]
+
 def download_file(url, cookie_dict, suggested_name=None):
-    if not os.path.exists(TEMP_DIR):
-        os.makedirs(TEMP_DIR)
+    temp_dir = data_dir(TEMP_NAME)
+    if not os.path.exists(temp_dir):
+        os.makedirs(temp_dir)
     try:
         logger.info(f"    ⬇️ 正在请求附件链接...")
-        session = requests.Session()
-        session.headers.update({"User-Agent": DEFAULT_USER_AGENT})
-        session.cookies.update(cookie_dict)
+        # 复用全局 keep-alive 连接池，页面 Cookie 按请求附带
+        session = get_session()
         
         req_timeout = config.SPIDER.get("REQUEST_TIMEOUT", 60)
-        res = session.get(url, stream=True, verify=False, timeout=req_timeout)
-        
-        final_filename = "unknown.dat"
-        server_filename = get_filename_from_cd(res.headers.get('Content-Disposition'))
-        if server_filename:
-            final_filename = server_filename
-        elif suggested_name:
-            base_name = suggested_name
-            if '.' not in base_name:
-                ct = res.headers.get('Content-Type', '').split(';')[0]
-                ext = mimetypes.guess_extension(ct)
-                if ext: base_name += ext
-            final_filename = base_name
-        final_filename = sanitize_filename(final_filename)
-        if not final_filename:
-            final_filename = f"attach_{int(time.time())}.dat"
-        save_path = os.path.join(TEMP_DIR, final_filename)
-        if os.path.exists(save_path):
-            name, ext = os.path.splitext(final_filename)
-            final_filename = f"{name}_{int(time.time())}{ext}"
-            save_path = os.path.join(TEMP_DIR, final_filename)
-            
         chunk_size = config.SPIDER.get("CHUNK_SIZE", 8192)
-        with open(save_path, "wb") as f:
-            for chunk in res.iter_content(chunk_size=chunk_size):
-                f.write(chunk)
+        with _host_slot(url):
+            if config.SPIDER.get("ATTACH_STORE", True):
+                return _download_to_store(session, url, cookie_dict, suggested_name, req_timeout, chunk_size)
+
+            with session.get(url, stream=True, verify=False, timeout=req_timeout, cookies=cookie_dict) as res:
+                final_filename = _resolve_filename(res, suggested_name)
+                save_path = os.path.join(temp_dir, final_filename)
+                if os.path.exists(save_path):
+                    name, ext = os.path.splitext(final_filename)
+                    final_filename = f"{name}_{int(time.time())}{ext}"
+                    save_path = os.path.join(temp_dir, final_filename)
+
+                try:
+                    with open(save_path, "wb") as f:
+                        for chunk in _limited_chunks(res, chunk_size):
+                            f.write(chunk)
+                except Exception:
+                    if os.path.exists(save_path): os.remove(save_path)
+                    raise
         logger.info(f"    ✅ 附件下载成功: {final_filename}")
         return save_path
     except Exception as e:
         logger.warning(f"    ⚠️ 下载失败: {e}")
         return None
 
-def _extract_attachments(soup, base_url, cookie_dict):
-    files = []
-    for a in soup.find_all('a', href=True):
-        href = a['href']
-        text = a.get_text(strip=True)
+def _find_attachment_links(page_links, base_url):
+    """
+    筛选附件链接并按完整 URL 去重 (保留首次出现的链接文字)
+    :param page_links: 解析后端给出的 [(href, 链接文字), ...]
+    """
+    links = {}
+    valid_exts = ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar']
+    for href, text in page_links:
         full_link = urljoin(base_url, href)
-        valid_exts = ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar']
         is_static = any(x in full_link.lower() for x in valid_exts)
         is_dynamic = 'download.jsp' in full_link or 'downloadattachurl' in full_link or 'wbfileid' in full_link
         if is_static or is_dynamic:
             if 'mailto:' in full_link.lower() or 'javascript:' in full_link.lower(): continue
             clean_text = re.sub(r'^附件[：:]\s*', '', text).strip()
-            f_path = download_file(full_link, cookie_dict, suggested_name=clean_text)
-            if f_path: files.append(f_path)
-    return files
+            if full_link not in links or not links[full_link]:
+                links[full_link] = clean_text
+    return list(links.items())
+
+def _extract_attachments(page_links, base_url, cookie_dict):
+    links = _find_attachment_links(page_links, base_url)
+    if not links:
+        return []
+    workers = min(config.SPIDER.get("ATTACH_WORKERS", 4), len(links))
+    task_metrics = metrics.current()
+    with task_metrics.span("fetch.download"), ThreadPoolExecutor(max_workers=workers) as executor:
+        paths = executor.map(lambda link: download_file(link[0], cookie_dict, suggested_name=link[1]), links)
+        # map 按提交顺序返回，附件顺序与页面一致
+        paths = [p for p in paths if p]
+    if task_metrics:
+        task_metrics.add("attachments", len(paths))
+        task_metrics.add("attachment_bytes", sum(os.path.getsize(p) for p in paths if os.path.exists(p)))
+    return paths
 
 def _process_html(html_content, base_url, cookie_dict):
-    soup = BeautifulSoup(html_content, 'html.parser')
-    text = soup.get_text(separator='\n', strip=True)
-    files = _extract_attachments(soup, base_url, cookie_dict)
+    task_metrics = metrics.current()
+    if task_metrics:
+        task_metrics.add("html_bytes", len(html_content.encode("utf-8")))
+    # 一次解析同时取出正文与全部链接
+    with task_metrics.span("fetch.parse"):
+        text, page_links = get_backend().parse_detail(html_content)
+    files = _extract_attachments(page_links, base_url, cookie_dict)
     return {"type": "compound", "text": text[:8000], "files": files}
 
 def _init_browser_context(p):
     # 🟢 使用配置中的 HEADLESS
     browser = p.chromium.launch(headless=HEADLESS, args=['--disable-blink-features=AutomationControlled'])
-    if os.path.exists(STATE_FILE):
-        context = browser.new_context(storage_state=STATE_FILE, user_agent=DEFAULT_USER_AGENT)
+    state_file = data_dir(STATE_NAME)
+    if os.path.exists(state_file):
+        context = browser.new_context(storage_state=state_file, user_agent=DEFAULT_USER_AGENT)
     else:
         context = browser.new_context(user_agent=DEFAULT_USER_AGENT)
     context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     return browser, context
 
-def _navigate_and_fetch(page, url, context):
+def _check_page(title, html, final_url):
+    """HTTP 直连与浏览器共用的页面有效性检查，无效时返回 ABORT"""
+    if "404" in title or "抱歉" in html:
+        logger.error("    ❌ 页面 404")
+        return "ABORT"
+    if "login" in final_url:
+        logger.error("    ❌ Cookie/State 已失效")
+        return "ABORT"
+    return None
+
+def _navigate(page, url, context):
+    """浏览器阶段：只负责打开页面并取回 HTML 与最新 Cookie"""
     try:
         # 🟢 使用配置中的 TIMEOUT
         page.goto(url, timeout=TIMEOUT, wait_until="domcontentloaded")
@@ -156,17 +254,48 @@ def _navigate_and_fetch(page, url, context):
     wait_time = config.SPIDER.get("WAIT_AFTER_GOTO", 3000)
     page.wait_for_timeout(wait_time)
     
-    if "404" in page.title() or "抱歉" in page.content():
-        logger.error("    ❌ 页面 404")
-        return "ABORT"
-    if "login" in page.url:
-        logger.error("    ❌ Cookie/State 已失效")
-        return "ABORT"
     html = page.content()
-    fresh_cookies = _get_playwright_cookies(context)
+    verdict = _check_page(page.title(), html, page.url)
+    if verdict:
+        return verdict
+    return html, _get_playwright_cookies(context)
+
+def _navigate_and_fetch(page, url, context):
+    result = _navigate(page, url, context)
+    if isinstance(result, str):
+        return result
+    html, fresh_cookies = result
+    return _process_html(html, url, fresh_cookies)
+
+# ==========================================
+# 🌐 常驻浏览器池
+# ==========================================
+
+def get_browser_pool():
+    """懒加载全局浏览器池 (首次抓取时创建)"""
+    from spider.browser_pool import get_shared_pool
+    return get_shared_pool(state_file=data_dir(STATE_NAME))
+
+def reload_browser_state():
+    """LoginManager 刷新凭证后调用，让池内上下文重新加载 state.json"""
+    from spider.browser_pool import reload_shared_pool
+    reload_shared_pool()
+
+def shutdown_browser_pool():
+    from spider.browser_pool import shutdown_shared_pool
+    shutdown_shared_pool()
+
+def _perform_pooled_attempt(url):
+    # 浏览器槽位只负责导航，附件下载在调用线程完成，避免长时间占用槽位
+    result = get_browser_pool().run(lambda page, context: _navigate(page, url, context))
+    if isinstance(result, str):
+        return result
+    html, fresh_cookies = result
     return _process_html(html, url, fresh_cookies)
 
 def _perform_single_attempt(url):
+    if config.SPIDER.get("BROWSER_POOL", True):
+        return _perform_pooled_attempt(url)
     with sync_playwright() as p:
         browser, context = _init_browser_context(p)
         page = context.new_page()
@@ -176,7 +305,90 @@ def _perform_single_attempt(url):
         finally:
             browser.close()
 
+# ==========================================
+# ⚡ HTTP 直连快速通道
+# ==========================================
+
+_host_stats = None
+# 匹配前会去掉空格并转为小写
+_JS_SHELL_MARKERS = ("enablejavascript", "开启javascript", "启用javascript", "location.replace(", 'http-equiv="refresh"')
+
+_host_stats_lock = threading.Lock()
+
+def _get_host_stats():
+    global _host_stats
+    with _host_stats_lock:
+        if _host_stats is None:
+            _host_stats = HostStats()
+    return _host_stats
+
+def _extract_title(html):
+    match = re.search(r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+def _looks_like_js_shell(html):
+    """页面正文需要 JS 渲染 (可见文字过少或带有跳转脚本) 时返回 True"""
+    lowered = html.lower().replace(" ", "")
+    if any(marker in lowered for marker in _JS_SHELL_MARKERS):
+        return True
+    visible = re.sub(r"<(script|style|noscript)[^>]*>.*?</\1>", "", html, flags=re.IGNORECASE | re.DOTALL)
+    visible = re.sub(r"<[^>]+>", "", visible)
+    visible = re.sub(r"\s+", "", visible)
+    return len(visible) < config.SPIDER.get("HTTP_MIN_TEXT_LEN", 200)
+
+def _try_http_fetch(url):
+    """
+    先用普通 GET 抓取详情页
+    :return: 抓取结果 / "ABORT" (确认 404) / None (需要交给浏览器)
+    """
+    if not config.SPIDER.get("HTTP_FIRST", True):
+        return None
+    host = urlparse(url).netloc
+    stats = _get_host_stats()
+    if not stats.should_try_http(host):
+        return None
+
+    try:
+        session = get_session()
+        req_timeout = config.SPIDER.get("HTTP_FETCH_TIMEOUT", 15)
+        res = session.get(url, timeout=req_timeout)
+        if not res.encoding or res.encoding.lower() == 'iso-8859-1':
+            res.encoding = res.apparent_encoding
+        html = res.text
+    except Exception as e:
+        logger.info(f"    ↪️ [HTTP] 直连失败，切换浏览器: {e}")
+        stats.record(host, "http_fallback")
+        return None
+
+    if "login" in res.url:
+        # 纯 Cookie 不足以通过认证 (可能依赖 LocalStorage)，交给带 state 的浏览器
+        logger.info("    ↪️ [HTTP] 被重定向至登录页，切换浏览器")
+        stats.record(host, "http_fallback")
+        return None
+    if res.status_code == 404:
+        logger.error("    ❌ 页面 404")
+        stats.record(host, "http_ok")
+        return "ABORT"
+    if res.status_code != 200 or _looks_like_js_shell(html):
+        logger.info(f"    ↪️ [HTTP] 页面需要浏览器渲染 (状态码 {res.status_code})，切换浏览器")
+        stats.record(host, "http_fallback")
+        return None
+
+    verdict = _check_page(_extract_title(html), html, res.url)
+    stats.record(host, "http_ok")
+    if verdict:
+        return verdict
+    logger.info("    ⚡ [HTTP] 直连抓取成功")
+    return _process_html(html, url, session.cookies.get_dict())
+
 def fetch_content(url):
+    task_metrics = metrics.current()
+    # 0. 快速通道：静态页面无需启动浏览器 (子阶段计时包含其中的附件下载)
+    with task_metrics.span("fetch.http"):
+        fast_result = _try_http_fetch(url)
+    if fast_result == "ABORT": return None
+    if fast_result: return fast_result
+
     max_retries = config.SPIDER.get("MAX_RETRIES", 3)
     for attempt in range(1, max_retries + 1):
         try:
@@ -186,10 +398,13 @@ def fetch_content(url):
                 wait_time = random.uniform(delay_min, delay_max) * attempt
                 logger.info(f"    ⏳ 网络波动，等待 {wait_time:.1f}s...")
                 time.sleep(wait_time)
-            result = _perform_single_attempt(url)
+            with task_metrics.span("fetch.browser"):
+                result = _perform_single_attempt(url)
             if result == "ABORT": return None
             if result == "RETRY": continue
-            if result: return result
+            if result:
+                _get_host_stats().record(urlparse(url).netloc, "browser_ok")
+                return result
         except Exception as e:
             logger.error(f"    ❌ 第 {attempt} 次抓取失败: {e}")
             if attempt == max_retries: return None
@@ -0,0 +1,201 @@
+import os
+import sys
+import logging
+import threading
+from bs4 import BeautifulSoup
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# 🧩 HTML 解析后端
+# 列表页与详情页只解析一次，一次遍历同时取出正文文字、候选行与全部链接：
+#   parse_detail(html)            -> (正文文字, [(href, 链接文字), ...])
+#   parse_list(html, selectors)   -> ([(行文字, [(href, 链接文字), ...]), ...], 全部链接)
+# 输出与 BeautifulSoup 的 get_text(strip=True) / find_all('a', href=True) 逐字一致
+# ==========================================
+
+# BeautifulSoup 的 get_text 默认不输出这些标签内的文字
+SKIP_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+# libxml2 会把 \r\n 规范化为 \n，解析前先替换为私用区字符，取文字时再还原
+CR_MARK = "\ue000"
+
+
+class SoupBackend:
+    """纯 Python 的 html.parser，作为兜底，不依赖任何可选组件"""
+
+    name = "html.parser"
+
+    def _soup(self, html):
+        return BeautifulSoup(html, 'html.parser')
+
+    @staticmethod
+    def _links(node):
+        return [(a['href'], a.get_text(strip=True)) for a in node.find_all('a', href=True)]
+
+    def _select_rows(self, soup, selectors):
+        if selectors:
+            for selector in selectors:
+                items = soup.select(selector)
+                if items:
+                    return items
+            return []
+        items = soup.select("ul.news_list li")
+        if not items: items = soup.find_all("li", class_=lambda x: x and 'news' in x)
+        if not items: items = soup.select("tr")
+        return items
+
+    def parse_detail(self, html):
+        soup = self._soup(html)
+        return soup.get_text(separator='\n', strip=True), self._links(soup)
+
+    def parse_list(self, html, selectors=None):
+        soup = self._soup(html)
+        rows = [(row.get_text(" ", strip=True), self._links(row)) for row in self._select_rows(soup, selectors)]
+        return rows, self._links(soup)
+
+
+class LxmlBackend(SoupBackend):
+    """
+    libxml2 解析 + 单次遍历，速度约为 html.parser 的数倍
+    自定义的行选择器需要 cssselect 才能翻译成 XPath，缺少时这一来源退回 html.parser；
+    解析失败 (空文档、编码异常等) 同样退回 html.parser
+    标签嵌套错乱 (未闭合的 <li>、<a> 套 <a>) 时 libxml2 按浏览器规则修正，结果可能与 html.parser 不同，
+    需要旧行为时设置 SPIDER["HTML_PARSER"] = "html.parser"
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml import etree
+        self._html = lxml.html
+        self._etree = etree
+        self._parser = lxml.html.HTMLParser(encoding="utf-8")
+        self._xpaths = {}
+        self._xpath_lock = threading.Lock()
+        self._builtin = [
+            etree.XPath("//ul[contains(concat(' ', normalize-space(@class), ' '), ' news_list ')]//li"),
+            etree.XPath("//li[contains(@class, 'news')]"),
+            etree.XPath("//tr"),
+        ]
+
+    def _root(self, html):
+        if isinstance(html, bytes):
+            html = html.decode("utf-8")
+        if "\r" in html:
+            html = html.replace("\r", CR_MARK)
+        return self._html.document_fromstring(html.encode("utf-8"), parser=self._parser)
+
+    def _compile(self, selector):
+        """CSS → XPath，按选择器缓存；缺少 cssselect 时返回 None"""
+        with self._xpath_lock:
+            if selector not in self._xpaths:
+                try:
+                    from lxml.cssselect import CSSSelector
+                    self._xpaths[selector] = CSSSelector(selector, translator="html")
+                except ImportError:
+                    self._xpaths[selector] = None
+            return self._xpaths[selector]
+
+    def _select_nodes(self, root, selectors):
+        rules = [self._compile(s) for s in selectors] if selectors else self._builtin
+        if any(rule is None for rule in rules):
+            return None
+        for rule in rules:
+            items = rule(root)
+            if items:
+                return items
+        return []
+
+    def _walk(self, node, link_sep):
+        """
+        一次遍历取出节点内的文字片段与链接
+        注释、script / style 等标签内的文字不计入，但它们之后的尾随文字照常计入
+        :return: (文字片段列表, [(href, 链接文字), ...])
+        """
+        texts, links = [], []
+        open_links = []   # 尚未闭合的 <a>：(元素, 文字片段列表)
+        skip_depth = 0
+
+        def emit(piece):
+            if not piece or skip_depth:
+                return
+            piece = piece.replace(CR_MARK, "\r").strip()
+            if not piece:
+                return
+            texts.append(piece)
+            for _, pieces in open_links:
+                pieces.append(piece)
+
+        for event, el in self._etree.iterwalk(node, events=("start", "end", "comment", "pi")):
+            if event == "start":
+                if el.tag in SKIP_TEXT_TAGS:
+                    skip_depth += 1
+                elif el.tag == "a" and el is not node and el.get("href") is not None:
+                    pieces = []
+                    links.append((el.get("href").replace(CR_MARK, "\r"), pieces))
+                    open_links.append((el, pieces))
+                emit(el.text)
+                continue
+            if event == "end":
+                if el.tag in SKIP_TEXT_TAGS:
+                    skip_depth -= 1
+                elif open_links and open_links[-1][0] is el:
+                    open_links.pop()
+            if el is not node:
+                emit(el.tail)
+        return texts, [(href, link_sep.join(pieces)) for href, pieces in links]
+
+    def parse_detail(self, html):
+        try:
+            root = self._root(html)
+        except Exception as e:
+            logger.debug(f"    ↪️ [HTML] lxml 解析失败，改用 html.parser: {e}")
+            return super().parse_detail(html)
+        texts, links = self._walk(root, "")
+        return "\n".join(texts), links
+
+    def parse_list(self, html, selectors=None):
+        try:
+            root = self._root(html)
+        except Exception as e:
+            logger.debug(f"    ↪️ [HTML] lxml 解析失败，改用 html.parser: {e}")
+            return super().parse_list(html, selectors)
+        items = self._select_nodes(root, selectors)
+        if items is None:
+            return super().parse_list(html, selectors)
+        rows = []
+        for row in items:
+            texts, links = self._walk(row, "")
+            rows.append((" ".join(texts), links))
+        return rows, self._walk(root, "")[1]
+
+
+BACKENDS = {"html.parser": SoupBackend, "lxml": LxmlBackend}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    """
+    按 SPIDER["HTML_PARSER"] 获取解析后端 (进程内单例)
+    "auto" 优先使用 lxml，未安装时退回 html.parser
+    """
+    name = name or config.SPIDER.get("HTML_PARSER", "auto")
+    with _backends_lock:
+        if name not in _backends:
+            candidates = ["lxml", "html.parser"] if name == "auto" else [name, "html.parser"]
+            for candidate in candidates:
+                try:
+                    _backends[name] = BACKENDS[candidate]()
+                    break
+                except ImportError:
+                    logger.info(f"    ↪️ [HTML] 未安装 {candidate}，改用 html.parser")
+        return _backends[name]
@@ -0,0 +1,137 @@
+import os
+import json
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import sys
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.paths import data_dir
+
+# 初始化模块级日志
+logger = logging.getLogger(__name__)
+
+COOKIE_NAME = "cookies.json"
+HOST_STATS_NAME = "host_stats.json"
+
+# ==========================================
+# 🔌 共享 HTTP 会话 (连接池 + LoginManager 保存的 Cookie)
+# ==========================================
+
+_session = None
+_session_cookie_mtime = None
+_session_lock = threading.Lock()
+
+
+def _load_cookie_file():
+    """
+    把 cookies.json (Playwright 格式) 读成一个新的 CookieJar
+    :return: (jar, 文件修改时间)，文件不存在时修改时间为 None；读取失败时 jar 为 None
+    """
+    jar = requests.cookies.RequestsCookieJar()
+    cookie_file = data_dir(COOKIE_NAME)
+    if not os.path.exists(cookie_file):
+        return jar, None
+    mtime = os.path.getmtime(cookie_file)
+    try:
+        with open(cookie_file, 'r', encoding='utf-8') as f:
+            cookies = json.load(f)
+        for c in cookies:
+            jar.set(c['name'], c['value'], domain=c.get('domain', ''), path=c.get('path', '/'))
+    except Exception as e:
+        logger.warning(f"    ⚠️ [HTTP] 读取 Cookie 失败: {e}")
+        return None, mtime
+    return jar, mtime
+
+
+def get_session():
+    """获取全局共享的 requests.Session，Cookie 文件更新后自动重新加载"""
+    global _session, _session_cookie_mtime
+    with _session_lock:
+        if _session is None:
+            pool_size = config.SPIDER.get("HTTP_POOL_SIZE", 10)
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _session.headers.update({"User-Agent": config.SPIDER.get("USER_AGENT", "Mozilla/5.0...")})
+            _session.verify = False
+
+        cookie_file = data_dir(COOKIE_NAME)
+        current_mtime = os.path.getmtime(cookie_file) if os.path.exists(cookie_file) else None
+        if current_mtime != _session_cookie_mtime:
+            # 在新的 CookieJar 里装好再整体替换：其他线程正在发出的请求用的仍是完整的旧 Cookie，
+            # 不会因为原地清空而不带 Cookie 被重定向到登录页；读取失败时保留旧 Cookie
+            jar, _session_cookie_mtime = _load_cookie_file()
+            if jar is not None:
+                _session.cookies = jar
+        return _session
+
+
+# ==========================================
+# 📊 按域名统计抓取路径
+# ==========================================
+
+class HostStats:
+    """
+    记录每个域名 HTTP 直连 / 浏览器兜底 的成功情况
+    连续多次需要浏览器兜底的域名会跳过 HTTP 尝试，并定期重新探测一次
+    """
+
+    def __init__(self, path=None):
+        path = path or data_dir(HOST_STATS_NAME)
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._stats = json.load(f)
+            except Exception:
+                self._stats = {}
+
+    def _entry(self, host):
+        return self._stats.setdefault(host, {
+            "http_ok": 0, "http_fallback": 0, "browser_ok": 0, "fallback_streak": 0, "skipped": 0
+        })
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._stats, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"    ⚠️ [HTTP] 域名统计保存失败: {e}")
+
+    def should_try_http(self, host):
+        skip_after = config.SPIDER.get("HTTP_SKIP_AFTER_FALLBACKS", 3)
+        probe_every = config.SPIDER.get("HTTP_REPROBE_EVERY", 20)
+        with self._lock:
+            entry = self._entry(host)
+            if entry["fallback_streak"] < skip_after:
+                return True
+            entry["skipped"] += 1
+            # 定期给 HTTP 一次机会，站点改版后可以自动恢复
+            if entry["skipped"] % probe_every == 0:
+                return True
+            return False
+
+    def record(self, host, path):
+        """path: http_ok / http_fallback / browser_ok"""
+        with self._lock:
+            entry = self._entry(host)
+            entry[path] += 1
+            if path == "http_ok":
+                entry["fallback_streak"] = 0
+            elif path == "http_fallback":
+                entry["fallback_streak"] += 1
+            self._save()
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self._stats))
@@ -1,20 +1,56 @@
 import os
 import json
 import re
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import sys
 
 # 引用根目录配置
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from spider.html_backend import get_backend
+from utils import profiling
+
+# 分页链接的常见文字
+NEXT_PAGE_TEXTS = {"下一页", "下页", "后页", "next", ">", "›", "»"}
+
+# 行内找不到日期时的占位日期 (排序时沉底，不参与水位线比较)
+UNDATED = "1970-01-01"
+
+# 列表来源的默认配置，SPIDER["LIST_SOURCES"] 中每项只需写出与默认值不同的字段
+DEFAULT_SOURCE = {
+    "name": "default",
+    "entry_url": None,          # 入口页，None 表示 SCHOOL["VPN_URL"]
+    "click_text": "信息公告",    # 在入口页点击进入列表的文字，为空表示入口页就是列表页
+    "row_selectors": None,      # 列表行的 CSS 选择器 (依次尝试)，None 表示内置的逐级回退规则
+    "date_regex": r"(\d{4}-\d{2}-\d{2})",  # 一个分组 (YYYY-MM-DD) 或年、月、日三个分组
+}
+
+
+def load_sources():
+    """读取列表来源注册表，未配置时只有门户的「信息公告」"""
+    configured = config.SPIDER.get("LIST_SOURCES") or [{}]
+    return [{**DEFAULT_SOURCE, **source} for source in configured]
+
 
 class UrlFinder:
-    def __init__(self):
-        self.target_text = "信息公告"
+    def __init__(self, db=None, source=None):
+        """
+        :param db: DatabaseManager，用于读写列表水位线；为 None 时只扫描第一页
+        :param source: 列表来源配置 (见 DEFAULT_SOURCE)
+        """
+        self.source = {**DEFAULT_SOURCE, **(source or {})}
+        self.name = self.source["name"]
+        self.target_text = self.source["click_text"]
+        self.date_re = re.compile(self.source["date_regex"])
+        self.db = db
+        self.pool = None  # 设置后改用共享浏览器池，可与其他来源并发扫描
+        self.backend = get_backend()
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.data_dir = os.path.join(base_dir, "data")
+        self.data_dir = config.SYSTEM.get("DATA_DIR") or os.path.join(base_dir, "data")
         self.cookie_file = os.path.join(self.data_dir, "cookies.json")
         self.state_file = os.path.join(self.data_dir, "state.json")
         
@@ -22,32 +58,201 @@ class UrlFinder:
         self.headless = config.SPIDER.get("HEADLESS", True)
         self.timeout = config.SPIDER.get("TIMEOUT", 60000)
         self.user_agent = config.SPIDER.get("USER_AGENT", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        self.max_pages = config.SPIDER.get("LIST_MAX_PAGES", 5)
+        self.max_items = config.SPIDER.get("LIST_MAX_ITEMS", 30)
+        self.use_fingerprint = config.SPIDER.get("LIST_FINGERPRINT", True)
+        self.full_scan_every = config.SPIDER.get("LIST_FULL_SCAN_EVERY", 21600)
+        # 单次扫描的中间状态 (同一来源不会并发扫描)
+        self._known_digest = None
+        self._scan_digest = None
+        self._validators = {}
+        self._reached = False             # 本轮扫描是否到达了水位线 (首次运行只看第一页，也算到达)
+        # 本轮的水位线与列表快照，处理结束后由 commit() 保存
+        self._pending_watermark = None
+        self._pending_fingerprint = None
 
-    def find_new_urls(self, start_url):
+    def find_new_urls(self, start_url=None):
         """主入口"""
-        print(f"    🕷️ [Finder] 启动... 目标首页: {start_url}")
+        start_url = start_url or self.source["entry_url"] or config.SCHOOL["VPN_URL"]
+        print(f"    🕷️ [Finder:{self.name}] 启动... 目标首页: {start_url}")
 
-        result = self._fetch_page_source(start_url)
-        if result is None:
-            return None
+        watermark = self._load_watermark()
+        fingerprint = self._load_fingerprint()
+        full_scan = self._full_scan_due(fingerprint)
+        if not full_scan and self._not_modified(start_url, fingerprint):
+            print(f"    🟰 [Finder:{self.name}] 服务器返回 304，列表未变化，跳过本轮")
+            return []
 
-        html_content, final_url = result
-        print(f"    📍 列表页真实地址: {final_url}")
-        items = self._parse_html(html_content, final_url)
+        self._known_digest = None if full_scan else fingerprint.get("hash")
+        self._scan_digest = None
+        self._validators = {}
+        self._reached = False
+        self._pending_watermark = None
+        self._pending_fingerprint = None
+        items = self._fetch_page_source(start_url, watermark)
+        if items is None:
+            return None
+        if self._known_digest and self._scan_digest == self._known_digest:
+            print(f"    🟰 [Finder:{self.name}] 列表指纹未变化，跳过本轮")
+            return []
 
         if items:
             items.sort(key=lambda x: x['date'], reverse=True)
-            print("    📉 [列表版] 排序后的前 5 条公告:")
+            print(f"    📉 [列表版] 共 {len(items)} 条，排序后的前 5 条公告:")
             for idx, item in enumerate(items[:5]):
                 print(f"       [{idx+1}] {item['date']} | {item['title'][:20]}...")
-            return items[:5]
-        return []
+            if self._reached:
+                self._pending_watermark = items[0]
+            else:
+                # 受条数 / 页数上限截断，水位线之前还有没扫到的公告：保留旧水位线，下一轮重新翻页
+                print(f"    ⏸️ [Finder:{self.name}] 未翻到水位线 ({watermark['date']})，本轮不推进水位线")
+        self._pending_fingerprint = self._make_fingerprint(fingerprint, items, full_scan)
+
+        if not full_scan and fingerprint:
+            # 指纹变化：与上次的快照比对即可得到新增行，无需逐条查库
+            known = set(fingerprint.get("urls", []))
+            items = [item for item in items if item['url'] not in known]
+            print(f"    🆕 [Finder:{self.name}] 列表有变化，新增 {len(items)} 条")
+        return items
+
+    # ==========================
+    # 水位线：上次扫描到的最新公告 (日期 + URL)，增量扫描翻页到这里即停止
+    # ==========================
+
+    def _watermark_key(self):
+        return f"watermark:{self.name}"
+
+    def _load_watermark(self):
+        if not self.db:
+            return None
+        return self.db.get_state(self._watermark_key())
+
+    def _save_watermark(self, newest):
+        if not self.db or newest['date'] == UNDATED:
+            return
+        old = self._load_watermark()
+        if old and (old['date'], old['url']) >= (newest['date'], newest['url']):
+            return
+        self.db.set_state(self._watermark_key(), {"date": newest['date'], "url": newest['url']})
+
+    def _reached_watermark(self, rows, watermark):
+        """
+        本页已包含水位线公告，或本页最旧的一条早于水位线日期，即无需再翻页
+        (取最旧的一条而不是任意一条，避免置顶的旧公告提前终止扫描；
+         没有日期的行不参与比较，本页全无日期时继续翻页，由页数 / 条数上限兜底)
+        """
+        if not rows:
+            return True
+        if any(row['url'] == watermark['url'] for row in rows):
+            return True
+        dates = [row['date'] for row in rows if row['date'] != UNDATED]
+        if not dates:
+            return False
+        return min(dates) < watermark['date']
+
+    # ==========================
+    # 列表指纹：列表没变时整轮跳过
+    # ==========================
+
+    def _fingerprint_key(self):
+        return f"fingerprint:{self.name}"
+
+    def _load_fingerprint(self):
+        if not self.db or not self.use_fingerprint:
+            return None
+        return self.db.get_state(self._fingerprint_key())
+
+    def _full_scan_due(self, fingerprint):
+        """
+        没有指纹或距上次全量扫描超过 LIST_FULL_SCAN_EVERY 秒时做一次全量扫描，
+        让上一轮失败的公告有机会被主流程重试
+        """
+        if not fingerprint:
+            return True
+        return time.time() - fingerprint.get("full_scan_at", 0) >= self.full_scan_every
+
+    def _make_fingerprint(self, old, items, full_scan):
+        """未翻到水位线时不记哈希与校验头：首页没变也不能整轮跳过，下一轮要重新翻页"""
+        if not self.db or not self.use_fingerprint or not self._scan_digest:
+            return None
+        urls = [item['url'] for item in items]
+        if old and not full_scan:
+            current = set(urls)
+            urls += [u for u in old.get("urls", []) if u not in current]
+        return {
+            "hash": self._scan_digest if self._reached else None,
+            "urls": urls[:300],
+            "etag": self._validators.get("etag") if self._reached else None,
+            "last_modified": self._validators.get("last-modified") if self._reached else None,
+            "full_scan_at": time.time() if full_scan else old.get("full_scan_at", 0),
+        }
+
+    def commit(self):
+        """
+        本轮的公告注册并处理完之后保存水位线与列表快照
+        尚未处理完成 (未入库、FAILED、PENDING) 的 URL 不记入快照，同时不保存哈希与校验头，
+        下一轮不会整轮跳过，这些公告会作为新增行再次交给主流程
+        """
+        newest, self._pending_watermark = self._pending_watermark, None
+        if newest:
+            self._save_watermark(newest)
+        snapshot, self._pending_fingerprint = self._pending_fingerprint, None
+        if not snapshot:
+            return
+        unfinished = set(self.db.filter_unprocessed(snapshot["urls"]))
+        if unfinished:
+            snapshot["urls"] = [u for u in snapshot["urls"] if u not in unfinished]
+            snapshot.update(hash=None, etag=None, last_modified=None)
+        self.db.set_state(self._fingerprint_key(), snapshot)
+
+    def _row_digest(self, rows):
+        """列表行的归一化哈希：只取行文字与链接，忽略空白与页面其余部分 (时间戳、访问计数等)"""
+        h = hashlib.sha256()
+        for text, links in rows:
+            h.update(" ".join(text.split()).encode("utf-8"))
+            for href, _ in links:
+                h.update(b"\x1f" + href.strip().encode("utf-8"))
+            h.update(b"\x1e")
+        return h.hexdigest()
+
+    def _not_modified(self, url, fingerprint):
+        """
+        入口页就是列表页且服务器给过 ETag / Last-Modified 时，先发条件请求；
+        304 表示列表未变化，连浏览器都不用打开
+        """
+        if self.target_text or not fingerprint:
+            return False
+        headers = {}
+        if fingerprint.get("etag"):
+            headers["If-None-Match"] = fingerprint["etag"]
+        if fingerprint.get("last_modified"):
+            headers["If-Modified-Since"] = fingerprint["last_modified"]
+        if not headers:
+            return False
+        try:
+            from spider.http_session import get_session
+            res = get_session().get(url, headers=headers, allow_redirects=False,
+                                    timeout=config.SPIDER.get("HTTP_FETCH_TIMEOUT", 15))
+        except Exception as e:
+            print(f"    ⚠️ 条件请求失败，改用浏览器: {e}")
+            return False
+        return res.status_code == 304
+
+    def _find_next_page(self, links, base_url):
+        for href, text in links:
+            text = text.lower()
+            href = href.strip()
+            if text in NEXT_PAGE_TEXTS and href and href != '#' and 'javascript' not in href.lower():
+                return urljoin(base_url, href)
+        return None
 
     def _is_valid_link(self, href, text):
         if not href or href == '#' or 'javascript' in href.lower(): return False
         if text.startswith('[') and text.endswith(']'): return False
-        ignore_words = {"更多", "详细", "置顶", "new", "HOT", "首页", "尾页"}
+        ignore_words = {"更多", "详细", "置顶", "new", "HOT", "首页", "尾页", "上一页", "上页"}
         if text in ignore_words: return False
+        # 分页链接不是公告
+        if text.strip().lower() in NEXT_PAGE_TEXTS: return False
         return True
 
     def _pick_best_link(self, candidates):
@@ -58,8 +263,13 @@ class UrlFinder:
         return candidates[0]['link']
 
     def _extract_date(self, text):
-        match = re.search(r"(\d{4}-\d{2}-\d{2})", text)
-        return match.group(1) if match else "1970-01-01"
+        match = self.date_re.search(text)
+        if not match:
+            return UNDATED
+        if (match.lastindex or 0) >= 3:
+            year, month, day = (int(g) for g in match.group(1, 2, 3))
+            return f"{year:04d}-{month:02d}-{day:02d}"
+        return match.group(1) if match.lastindex else match.group(0)
 
     def _inject_cookies_fallback(self, context):
         if not os.path.exists(self.cookie_file): return
@@ -70,10 +280,9 @@ class UrlFinder:
                 context.add_cookies(safe)
         except: pass
 
-    def _navigate_and_get_content(self, page, context):
-        final_content = ""
-        final_url = page.url
-        if self.target_text in page.content():
+    def _open_list_page(self, page, context):
+        """从门户首页点击进入列表页，返回列表所在的页面对象"""
+        if self.target_text and self.target_text in page.content():
             try:
                 with context.expect_page(timeout=15000) as new_info:
                     page.get_by_text(self.target_text).first.click()
@@ -81,18 +290,82 @@ class UrlFinder:
                 list_page.wait_for_load_state("domcontentloaded")
                 try: list_page.wait_for_selector("ul.news_list, tr", timeout=5000)
                 except: pass
-                final_content = list_page.content()
-                final_url = list_page.url
+                return list_page
             except:
-                final_content = page.content()
-                final_url = page.url
-        else:
-            final_content = page.content()
-            final_url = page.url
-        return final_content, final_url
+                pass
+        return page
+
+    def _scan_pages(self, list_page, watermark):
+        """
+        逐页解析列表，直到遇到水位线、达到条数 / 页数上限或没有下一页
+        没有水位线时 (首次运行) 只看第一页，不回溯全部历史
+        """
+        found = {}
+        for page_no in range(1, self.max_pages + 1):
+            page_url = list_page.url
+            raw_rows, page_links = self.backend.parse_list(list_page.content(), self.source["row_selectors"])
+            if page_no == 1:
+                print(f"    📍 列表页真实地址: {page_url}")
+                self._scan_digest = self._row_digest(raw_rows)
+                if self._scan_digest == self._known_digest:
+                    # 与上次相同：不再挑选链接、排序与查库
+                    return []
+            rows = self._parse_rows(raw_rows, page_url)
+            for row in rows:
+                found.setdefault(row['url'], row)
+
+            if not watermark:
+                self._reached = True
+                break
+            if self._reached_watermark(rows, watermark):
+                self._reached = True
+                print(f"    🏁 第 {page_no} 页到达水位线 ({watermark['date']})，停止翻页")
+                break
+            if len(found) >= self.max_items:
+                break
+            next_url = self._find_next_page(page_links, page_url)
+            if not next_url or page_no == self.max_pages:
+                break
+            print(f"    📄 翻页: 第 {page_no + 1} 页")
+            try:
+                list_page.goto(next_url, timeout=self.timeout)
+            except Exception as e:
+                # 翻页失败不影响已扫描到的结果
+                print(f"    ⚠️ 翻页失败: {e}")
+                break
+            try: list_page.wait_for_selector("ul.news_list, tr", timeout=5000)
+            except: pass
+        return list(found.values())
+
+    def _scan_from(self, page, context, url, watermark):
+        """在给定页面中打开入口、进入列表并增量扫描，凭证失效时返回 None"""
+        print(f"    🔗 正在访问首页...")
+        response = page.goto(url, timeout=self.timeout)
+        if not self.target_text and response is not None:
+            # 入口页即列表页：记下校验头，下一轮可以先发条件请求
+            headers = response.headers
+            self._validators = {k: headers[k] for k in ("etag", "last-modified") if headers.get(k)}
+        if any(x in page.title() for x in ["登录", "Login", "用户登录"]):
+            # 凭证文件由多个来源与抓取线程共用，不在这里删除；由主流程统一交给 LoginManager 重新登录
+            print("    ❌ 凭证已失效 (Redirected to Login)")
+            return None
+        list_page = self._open_list_page(page, context)
+        try:
+            return self._scan_pages(list_page, watermark)
+        finally:
+            if list_page is not page:
+                try: list_page.close()
+                except: pass
+
+    def _fetch_page_source(self, url, watermark=None):
+        """浏览器主流程：进入列表页并增量翻页扫描，凭证失效时返回 None"""
+        if self.pool:
+            try:
+                return self.pool.run(lambda page, context: self._scan_from(page, context, url, watermark))
+            except Exception as e:
+                print(f"    ⚠️ 浏览器异常: {e}")
+                return None
 
-    def _fetch_page_source(self, url):
-        """浏览器主流程"""
         result = None
         with sync_playwright() as p:
             browser = p.chromium.launch(
@@ -109,14 +382,7 @@ class UrlFinder:
             context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             page = context.new_page()
             try:
-                print(f"    🔗 正在访问首页...")
-                page.goto(url, timeout=self.timeout)
-                if any(x in page.title() for x in ["登录", "Login", "用户登录"]):
-                    print("    ❌ 凭证已失效 (Redirected to Login)")
-                    if os.path.exists(self.cookie_file): os.remove(self.cookie_file)
-                    if os.path.exists(self.state_file): os.remove(self.state_file)
-                    return None
-                result = self._navigate_and_get_content(page, context)
+                result = self._scan_from(page, context, url, watermark)
             except Exception as e:
                 print(f"    ⚠️ 浏览器异常: {e}")
             finally:
@@ -124,28 +390,27 @@ class UrlFinder:
         return result
 
     def _extract_link_from_row(self, row):
-        all_links = row.find_all('a', href=True)
+        """row: 解析后端给出的 (行文字, [(href, 链接文字), ...])"""
+        row_text, all_links = row
         if not all_links: return None
         valid_candidates = []
-        for link in all_links:
-            href = link['href'].strip()
-            text = link.get_text(strip=True)
-            if self._is_valid_link(href, text):
-                valid_candidates.append({'link': link, 'len': len(text)})
+        for href, text in all_links:
+            if self._is_valid_link(href.strip(), text):
+                valid_candidates.append({'link': (href, text), 'len': len(text)})
         best_link = self._pick_best_link(valid_candidates)
         if not best_link: return None
         return {
-            'url': best_link['href'],
-            'title': best_link.get_text(strip=True),
-            'date': self._extract_date(row.get_text(" ", strip=True))
+            'url': best_link[0],
+            'title': best_link[1],
+            'date': self._extract_date(row_text)
         }
 
     def _parse_html(self, html, base_url):
-        soup = BeautifulSoup(html, 'html.parser')
+        rows, _ = self.backend.parse_list(html, self.source["row_selectors"])
+        return self._parse_rows(rows, base_url)
+
+    def _parse_rows(self, items, base_url):
         candidates = []
-        items = soup.select("ul.news_list li")
-        if not items: items = soup.find_all("li", class_=lambda x: x and 'news' in x)
-        if not items: items = soup.select("tr")
         print(f"    👀 扫描到 {len(items)} 个潜在行...")
         for item in items:
             data = self._extract_link_from_row(item)
@@ -153,3 +418,69 @@ class UrlFinder:
                 data['url'] = urljoin(base_url, data['url'])
                 candidates.append(data)
         return candidates
+
+
+class SourceScanner:
+    """
+    多来源列表扫描
+    各来源 (门户信息公告、部门 / 学院通知列表等) 通过共享浏览器池并发扫描，
+    结果按 URL 去重后合并为一个任务流交给 main。
+    """
+
+    def __init__(self, db=None, sources=None, use_pool=False):
+        """
+        :param use_pool: 单一来源时也使用共享浏览器池 (守护模式下浏览器跨轮常驻)
+        """
+        self.finders = [UrlFinder(db=db, source=source) for source in (sources or load_sources())]
+        self.workers = config.SPIDER.get("LIST_SCAN_WORKERS", 3)
+        self.use_pool = use_pool
+
+    def _scan_one(self, finder):
+        start = time.monotonic()
+        try:
+            with profiling.section(f"scan-{finder.name}"):
+                items = finder.find_new_urls()
+        except Exception as e:
+            print(f"    ⚠️ [Finder:{finder.name}] 扫描异常: {e}")
+            items = []
+        elapsed = time.monotonic() - start
+        count = "凭证失效" if items is None else f"{len(items)} 条"
+        print(f"    📊 [Finder:{finder.name}] 耗时 {elapsed:.1f}s，产出 {count}")
+        return items
+
+    def find_new_urls(self):
+        """
+        :return: 合并去重后的公告列表 (按日期倒序，每项带 source 字段)；任一来源凭证失效时返回 None
+        """
+        if len(self.finders) == 1 and not self.use_pool:
+            results = [self._scan_one(self.finders[0])]
+        else:
+            # 多个来源共用一个浏览器池，每个来源占用一个槽位
+            from spider.browser_pool import get_shared_pool
+            pool = get_shared_pool()
+            for finder in self.finders:
+                finder.pool = pool
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(self.finders)))) as executor:
+                results = list(executor.map(self._scan_one, self.finders))
+
+        if any(items is None for items in results):
+            return None
+
+        merged = {}
+        for finder, items in zip(self.finders, results):
+            for item in items:
+                item['source'] = finder.name
+                merged.setdefault(item['url'], item)
+        items = sorted(merged.values(), key=lambda x: x['date'], reverse=True)
+        if len(self.finders) > 1:
+            total = sum(len(r) for r in results)
+            print(f"    🧩 [Finder] {len(self.finders)} 个来源共 {total} 条，去重后 {len(items)} 条")
+        return items
+
+    def commit(self):
+        """本轮处理结束后调用：保存各来源的水位线与列表快照 (见 UrlFinder.commit)"""
+        for finder in self.finders:
+            try:
+                finder.commit()
+            except Exception as e:
+                print(f"    ⚠️ [Finder:{finder.name}] 保存水位线 / 列表指纹失败: {e}")
@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+# 获取模块级日志
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    基于 SQLite 的持久化键值缓存
+    - 按总字节数做 LRU 淘汰 (最久未访问的先删)
+    - 可选 TTL，过期条目在读取时删除
+    - 记录命中 / 未命中次数
+    """
+
+    def __init__(self, path, max_bytes, name="cache"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                meta TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get_with_meta(self, key, ttl=None):
+        """返回 (value, meta)，未命中或已过期时返回 (None, None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, meta, size, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row and ttl is not None and now - row[3] > ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total -= row[2]
+                row = None
+            if not row:
+                self.misses += 1
+                return None, None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return row[0], (json.loads(row[1]) if row[1] else None)
+
+    def get(self, key, ttl=None):
+        return self.get_with_meta(key, ttl=ttl)[0]
+
+    def set(self, key, value, meta=None):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        meta_json = json.dumps(meta, ensure_ascii=False) if meta is not None else None
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, meta, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, meta_json, size, now, now)
+            )
+            self._total += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """超出容量时按最近访问时间淘汰 (调用方持有锁)"""
+        while self._total > self.max_bytes:
+            victims = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at ASC LIMIT 50"
+            ).fetchall()
+            if not victims:
+                self._total = 0
+                break
+            for key, size in victims:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total -= size
+                if self._total <= self.max_bytes:
+                    break
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": self._total,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# 获取模块级日志
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# 📏 单条公告的分阶段计时
+# 工作线程处理某条公告时通过 bind() 把它的 TaskMetrics 设为当前线程的度量对象，
+# 抓取、下载、模型调用、SMTP 等深层代码用 current() 记录，无需逐层传参。
+# 未开启 SYSTEM["METRICS"] 时 current() 返回空实现，记录调用几乎没有开销。
+# ==========================================
+
+# 直方图分桶 (秒)：覆盖从毫秒级的列表解析到分钟级的浏览器重试
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+# 落入 bulletin_metrics 独立列的阶段 (列名为 <阶段>_ms)，子阶段 (fetch.http 等) 只保存在 detail JSON 中
+STAGE_COLUMNS = ("claim", "fetch", "extract", "relevance", "summarize", "notify")
+
+# 落入 bulletin_metrics 独立列的计数项，其余只保存在 detail JSON 中
+COLUMN_COUNTS = ("html_bytes", "attachments", "attachment_bytes", "email_bytes",
+                 "prompt_tokens", "completion_tokens")
+
+# 导出为 Prometheus 计数器的计数项：计数名 -> (指标名, 标签名, 标签值)
+_EXPORTED_COUNTS = {
+    "html_bytes": ("nuist_bytes_total", "kind", "html"),
+    "attachment_bytes": ("nuist_bytes_total", "kind", "attachment"),
+    "email_bytes": ("nuist_bytes_total", "kind", "email"),
+    "attachments": ("nuist_attachments_total", None, None),
+}
+
+_local = threading.local()
+
+
+def enabled():
+    return config.SYSTEM.get("METRICS", True)
+
+
+class TaskMetrics:
+    """
+    一条公告的计时与计数
+    spans: 阶段名 -> 累计秒数 (同名阶段多次进入时累加，例如浏览器重试)
+    counts: 计数名 -> 累计值 (字节数、token 数)
+    附件下载、对冲请求等会在其他线程中记录，读写均加锁
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.spans = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return True
+
+    @contextmanager
+    def span(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.monotonic() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def add(self, name, value=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+
+class _NoopMetrics:
+    """未开启度量或当前线程没有绑定公告时使用，所有记录调用直接返回"""
+
+    def __bool__(self):
+        return False
+
+    @contextmanager
+    def span(self, name):
+        yield
+
+    def add_time(self, name, seconds):
+        pass
+
+    def add(self, name, value=1):
+        pass
+
+
+NOOP = _NoopMetrics()
+
+
+class SharedMetrics:
+    """
+    多条公告共用的一次操作 (合并的 hunter 请求)，在批处理线程中 bind() 后由深层代码照常记录：
+    耗时按整段记到每条公告上 (每条都等了这么久)，计数 (token 等) 按条数均分
+    """
+
+    def __init__(self, members):
+        self.members = [m for m in members if m]
+
+    def __bool__(self):
+        return bool(self.members)
+
+    @contextmanager
+    def span(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.monotonic() - start)
+
+    def add_time(self, name, seconds):
+        for member in self.members:
+            member.add_time(name, seconds)
+
+    def add(self, name, value=1):
+        if not self.members:
+            return
+        # 整数计数均分后余数依次补给前几条，合计与原值一致
+        share, rest = divmod(value, len(self.members))
+        for idx, member in enumerate(self.members):
+            member.add(name, share + (1 if idx < rest else 0))
+
+
+def new_task_metrics():
+    return TaskMetrics() if enabled() else NOOP
+
+
+def to_row(metrics, bulletin_id, outcome):
+    """转换为 bulletin_metrics 的一行"""
+    row = {"bulletin_id": bulletin_id, "outcome": outcome, "total_ms": round(metrics.elapsed() * 1000, 1)}
+    with metrics._lock:
+        spans, counts = dict(metrics.spans), dict(metrics.counts)
+    for stage in STAGE_COLUMNS:
+        if stage in spans:
+            row[f"{stage}_ms"] = round(spans[stage] * 1000, 1)
+    for name in COLUMN_COUNTS:
+        row[name] = int(counts.get(name, 0))
+    row["detail"] = json.dumps({
+        "spans_ms": {k: round(v * 1000, 1) for k, v in spans.items() if k not in STAGE_COLUMNS},
+        "counts": {k: v for k, v in counts.items() if k not in COLUMN_COUNTS},
+    }, ensure_ascii=False)
+    return row
+
+
+def current():
+    """当前线程正在处理的公告的度量对象 (没有时返回 NOOP)"""
+    return getattr(_local, "metrics", NOOP)
+
+
+@contextmanager
+def bind(metrics):
+    """在 with 块内把 metrics 设为当前线程的度量对象 (流水线模式下每个阶段在不同线程中执行)"""
+    previous = getattr(_local, "metrics", NOOP)
+    _local.metrics = metrics
+    try:
+        yield metrics
+    finally:
+        _local.metrics = previous
+
+
+# ==========================================
+# 📈 聚合直方图与 Prometheus 文本文件导出
+# 累计值保存在 scan_state 中，单次运行 (cron) 与守护模式下计数器都单调递增，
+# 可以直接用 histogram_quantile(0.95, rate(...)) 做 p95 告警。
+# ==========================================
+
+STATE_KEY = "metrics:prometheus"
+
+
+def _series(name, **labels):
+    """序列键，即 Prometheus 文本格式中的 name{k="v",...}"""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _labeled(name, *labels):
+    """拼接直方图的 _bucket / _sum / _count 序列 (labels 为已格式化的 k="v" 片段)"""
+    labels = [label for label in labels if label]
+    return f"{name}{{{','.join(labels)}}}" if labels else name
+
+
+class MetricsRegistry:
+    """进程内的累计直方图与计数器，每轮结束时写回数据库并导出文本文件"""
+
+    HELP = {
+        "nuist_stage_duration_seconds": ("histogram", "单条公告在各阶段 (含子阶段) 的耗时"),
+        "nuist_bulletin_duration_seconds": ("histogram", "单条公告从开始处理到结束的总耗时"),
+        "nuist_bulletins_total": ("counter", "处理完成的公告数 (按结果)"),
+        "nuist_bytes_total": ("counter", "下载 / 发送的字节数"),
+        "nuist_attachments_total": ("counter", "下载的附件数"),
+        "nuist_llm_tokens_total": ("counter", "模型调用消耗的 token 数"),
+        "nuist_cycle_duration_seconds": ("gauge", "最近一轮的耗时"),
+        "nuist_cycle_bulletins": ("gauge", "最近一轮提交处理的公告数"),
+        "nuist_cycle_last_run_timestamp_seconds": ("gauge", "最近一轮结束的时间戳"),
+    }
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms = {}   # 序列键 -> {"buckets": [...], "sum": float, "count": int}
+        self.counters = {}     # 序列键 -> 累计值
+        self.gauges = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, db):
+        """首次使用时从数据库恢复累计值 (分桶变化后丢弃旧的直方图)"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            state = db.get_state(STATE_KEY) if db else None
+            if not state:
+                return
+            if tuple(state.get("buckets", ())) == self.buckets:
+                self.histograms = state.get("histograms", {})
+            self.counters = state.get("counters", {})
+
+    def observe(self, series, value):
+        hist = self.histograms.setdefault(series, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                hist["buckets"][idx] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+    def inc(self, series, value=1):
+        self.counters[series] = self.counters.get(series, 0) + value
+
+    def record(self, metrics, outcome):
+        """汇总一条已结束公告的度量"""
+        # 被放弃的对冲请求、下载线程仍可能在写入，先在度量对象的锁内复制一份
+        with metrics._lock:
+            spans, counts = dict(metrics.spans), dict(metrics.counts)
+        with self._lock:
+            self.inc(_series("nuist_bulletins_total", outcome=outcome))
+            self.observe(_series("nuist_bulletin_duration_seconds", outcome=outcome), metrics.elapsed())
+            for stage, seconds in spans.items():
+                self.observe(_series("nuist_stage_duration_seconds", stage=stage), seconds)
+            for name, value in counts.items():
+                if name in _EXPORTED_COUNTS:
+                    metric, label, label_value = _EXPORTED_COUNTS[name]
+                    self.inc(_series(metric, **({label: label_value} if label else {})), value)
+                elif name.startswith(("prompt_tokens.", "completion_tokens.")):
+                    kind, role = name.split(".", 1)
+                    self.inc(_series("nuist_llm_tokens_total", kind=kind.split("_")[0], role=role), value)
+
+    def end_cycle(self, db, duration, bulletins, path=None):
+        """一轮结束：更新本轮指标，写回数据库并导出文本文件"""
+        with self._lock:
+            self.gauges = {
+                "nuist_cycle_duration_seconds": duration,
+                "nuist_cycle_bulletins": bulletins,
+                "nuist_cycle_last_run_timestamp_seconds": time.time(),
+            }
+            state = {"buckets": list(self.buckets), "histograms": self.histograms, "counters": self.counters}
+            text = self.render()
+        if db:
+            db.set_state(STATE_KEY, state)
+        if path:
+            write_textfile(path, text)
+
+    def render(self):
+        """Prometheus 文本格式 (node-exporter textfile collector)"""
+        families = {}
+        for series, hist in self.histograms.items():
+            base, _, labels = series.partition("{")
+            labels = labels.rstrip("}")
+            lines = families.setdefault(base, [])
+            bounds = [*self.buckets, "+Inf"]
+            counts = [*hist["buckets"], hist["count"]]
+            for bound, count in zip(bounds, counts):
+                le = f'le="{bound}"'
+                lines.append(f"{_labeled(base + '_bucket', labels, le)} {count}")
+            lines.append(f"{_labeled(base + '_sum', labels)} {hist['sum']:.6f}")
+            lines.append(f"{_labeled(base + '_count', labels)} {hist['count']}")
+        for series, value in list(self.counters.items()) + list(self.gauges.items()):
+            families.setdefault(series.split("{", 1)[0], []).append(f"{series} {value}")
+
+        out = []
+        for name in sorted(families):
+            kind, text = self.HELP.get(name, ("untyped", name))
+            out.append(f"# HELP {name} {text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(families[name])
+        return "\n".join(out) + "\n"
+
+
+def write_textfile(path, text):
+    """先写临时文件再原子替换，node-exporter 不会读到写了一半的文件"""
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"    ⚠️ [Metrics] 写入指标文件失败 ({path}): {e}")
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,17 @@
+import os
+import sys
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def data_dir(*parts):
+    """
+    运行数据目录 (SYSTEM.DATA_DIR，未配置时为项目下的 data/)
+    每次调用时读取配置，导入模块之后再修改 DATA_DIR (如沙箱环境) 同样生效
+    :param parts: 目录下的相对路径片段
+    """
+    return os.path.join(config.SYSTEM.get("DATA_DIR") or os.path.join(BASE_DIR, "data"), *parts)
@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# 引用根目录配置
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.paths import data_dir
+
+# 获取模块级日志
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ==========================================
+# 🔬 按需性能剖析
+# SYSTEM["PROFILE"] (或命令行 --profile) 开启后，每轮的列表扫描与每条公告的处理过程被分段剖析：
+#   "cprofile"  确定性剖析，每条公告一个 .prof (pstats)，整轮合并为 run.prof + run.txt
+#               run.prof 可直接用 snakeviz / flameprof 查看
+#   "sample"    采样剖析 (墙钟时间，含 I/O 等待)，每条公告一个 speedscope JSON，
+#               整轮合并为 run.folded (折叠栈，flamegraph.pl / speedscope 可直接打开) 与 run.speedscope.json
+# 关闭时 section() 只做一次全局变量判断，直接返回空的上下文管理器
+# ==========================================
+
+_NULL = nullcontext()
+_active = None
+_active_lock = threading.Lock()
+
+
+def _frame_name(code):
+    path = code.co_filename
+    # 项目内的文件保留相对路径，标准库与第三方包只保留文件名，火焰图更易读
+    path = os.path.relpath(path, BASE_DIR) if path.startswith(BASE_DIR) else os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _safe_label(label):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in str(label))
+
+
+class _CProfileRun:
+    """确定性剖析：每个分段一个 cProfile.Profile，按标签归并"""
+
+    def __init__(self):
+        self.profiles = {}   # 标签 -> [Profile, ...] (流水线模式下一条公告的各阶段在不同线程)
+        self._lock = threading.Lock()
+        self._warned = False
+
+    @contextmanager
+    def section(self, label):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ 同一时刻只允许一个 cProfile 生效，并发的工作线程请改用 sample 模式
+            if not self._warned:
+                self._warned = True
+                logger.warning("    ⚠️ [Profile] 已有线程在剖析，并发分段被跳过 (建议改用 sample 模式)")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self.profiles.setdefault(label, []).append(profile)
+
+    def write(self, out_dir):
+        merged = None
+        for label, profiles in self.profiles.items():
+            stats = pstats.Stats(*profiles)
+            stats.dump_stats(os.path.join(out_dir, f"{_safe_label(label)}.prof"))
+            if merged is None:
+                merged = pstats.Stats(*profiles)
+            else:
+                merged.add(*profiles)
+        if merged is None:
+            return
+        merged.dump_stats(os.path.join(out_dir, "run.prof"))
+        with open(os.path.join(out_dir, "run.txt"), "w", encoding="utf-8") as f:
+            merged.stream = f
+            merged.sort_stats("cumulative").print_stats(60)
+
+
+class _SampleRun:
+    """
+    采样剖析：一个后台线程按固定间隔读取 sys._current_frames()，
+    只记录正处于某个分段内的线程，样本按分段标签归类
+    附件下载池、对冲请求等临时线程不在分段内，其耗时体现在发起它们的线程的等待栈上
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = {}    # 标签 -> {栈 (外层在前的帧名元组): 样本数}
+        self._threads = {}   # 线程 id -> 标签
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._sampler.start()
+
+    @contextmanager
+    def section(self, label):
+        ident = threading.get_ident()
+        with self._lock:
+            previous = self._threads.get(ident)
+            self._threads[ident] = label
+        try:
+            yield
+        finally:
+            with self._lock:
+                if previous is None:
+                    self._threads.pop(ident, None)
+                else:
+                    self._threads[ident] = previous
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                targets = dict(self._threads)
+            if not targets:
+                continue
+            frames = sys._current_frames()
+            for ident, label in targets.items():
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                key = tuple(reversed(stack))
+                with self._lock:
+                    counts = self.samples.setdefault(label, {})
+                    counts[key] = counts.get(key, 0) + 1
+
+    def _speedscope(self, name, labels):
+        """speedscope 的 sampled 格式，每个标签一个 profile"""
+        frames, index = [], {}
+        profiles = []
+        for label in labels:
+            samples, weights = [], []
+            for stack, count in self.samples[label].items():
+                ids = []
+                for frame in stack:
+                    if frame not in index:
+                        index[frame] = len(frames)
+                        frames.append({"name": frame})
+                    ids.append(index[frame])
+                samples.append(ids)
+                weights.append(count * self.interval)
+            profiles.append({"type": "sampled", "name": str(label), "unit": "seconds",
+                             "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights})
+        return {"$schema": "https://www.speedscope.app/file-format-schema.json", "name": name,
+                "exporter": "nuist-bot", "shared": {"frames": frames}, "profiles": profiles}
+
+    def write(self, out_dir):
+        self._stop.set()
+        self._sampler.join(timeout=5)
+        with self._lock:
+            labels = list(self.samples)
+        for label in labels:
+            with open(os.path.join(out_dir, f"{_safe_label(label)}.speedscope.json"), "w", encoding="utf-8") as f:
+                json.dump(self._speedscope(str(label), [label]), f, ensure_ascii=False)
+        if not labels:
+            return
+        with open(os.path.join(out_dir, "run.speedscope.json"), "w", encoding="utf-8") as f:
+            json.dump(self._speedscope("run", labels), f, ensure_ascii=False)
+        # 折叠栈：标签作为根帧，整轮的所有分段在一张火焰图里对比
+        with open(os.path.join(out_dir, "run.folded"), "w", encoding="utf-8") as f:
+            for label in labels:
+                for stack, count in self.samples[label].items():
+                    frames = ";".join(frame.replace(";", ":") for frame in (str(label),) + stack)
+                    f.write(f"{frames} {count}\n")
+
+
+def start_run(mode=None):
+    """
+    每轮开始时调用；未开启剖析时什么也不做
+    :return: 本轮输出目录，未开启时为 None
+    """
+    global _active
+    mode = mode or config.SYSTEM.get("PROFILE")
+    if not mode:
+        return None
+    base = config.SYSTEM.get("PROFILE_DIR") or data_dir("profiles")
+    out_dir = os.path.join(base, datetime.now().strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(out_dir, exist_ok=True)
+    if mode == "cprofile":
+        run = _CProfileRun()
+    elif mode == "sample":
+        run = _SampleRun(config.SYSTEM.get("PROFILE_INTERVAL_MS", 5) / 1000)
+    else:
+        logger.warning(f"    ⚠️ [Profile] 未知的剖析模式: {mode} (可选 cprofile / sample)")
+        return None
+    with _active_lock:
+        _active = (run, out_dir, time.monotonic())
+    logger.info(f"🔬 [Profile] 本轮开启 {mode} 剖析，结果目录: {out_dir}")
+    return out_dir
+
+
+def stop_run():
+    """每轮结束时调用：写出各分段与整轮合并的剖析结果"""
+    global _active
+    with _active_lock:
+        active, _active = _active, None
+    if not active:
+        return
+    run, out_dir, started = active
+    try:
+        run.write(out_dir)
+        logger.info(f"🔬 [Profile] 剖析结果已写入 {out_dir} (本轮 {time.monotonic() - started:.1f}s)")
+    except Exception as e:
+        logger.warning(f"    ⚠️ [Profile] 写入剖析结果失败: {e}")
+
+
+def section(label):
+    """
+    剖析一个分段 (一条公告的某个阶段、一次列表扫描)；同一标签的多个分段合并为一个文件
+    用法: with profiling.section(f"bulletin-{task_id}"): ...
+    """
+    active = _active
+    if active is None:
+        return _NULL
+    return active[0].section(label)
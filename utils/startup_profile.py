@@ -0,0 +1,41 @@
+import os
+import sys
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def collect_importtime(module="main"):
+    """
+    在子进程中用 -X importtime 导入模块，返回 [(模块名, 自身耗时us, 累计耗时us), ...]
+    子进程保证测到的是冷启动，不受当前进程已加载模块的影响
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    return rows
+
+
+def report(module="main", top=25):
+    """打印导入耗时排行：顶层包按累计耗时排序"""
+    rows = collect_importtime(module)
+    # 缩进层级为 0 的是直接被导入的包，累计耗时包含其全部依赖
+    roots = [(name.strip(), cum) for name, _, cum in rows if not name.startswith("  ")]
+    total = sum(cum for _, cum in roots)
+    print(f"⏱️ 导入 {module} 共耗时 {total / 1000:.1f} ms ({len(rows)} 个模块)")
+    print(f"{'累计(ms)':>10} {'自身(ms)':>10}  模块")
+    for name, self_us, cum_us in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"{cum_us / 1000:10.1f} {self_us / 1000:10.1f}  {name}")
+    return total